@@ -27,13 +27,20 @@ pydev_src_dir = os.path.dirname(os.path.dirname(__file__))
 
 def _get_python_c_args(host, port, indC, args, setup):
     host_literal = "'" + host + "'" if host is not None else 'None'
+    unix_socket = setup.get('unix-socket') if setup else None
+    if unix_socket:
+        # The child process connects through the same kind of transport.
+        unix_socket_arg = ', unix_socket=%r' % (unix_socket,)
+    else:
+        unix_socket_arg = ''
     return ("import sys; sys.path.append(r'%s'); import pydevd; "
-            "pydevd.settrace(host=%s, port=%s, suspend=False, trace_only_current_thread=False, patch_multiprocessing=True); "
+            "pydevd.settrace(host=%s, port=%s, suspend=False, trace_only_current_thread=False, patch_multiprocessing=True%s); "
             "from pydevd import SetupHolder; SetupHolder.setup = %s; %s"
             ) % (
                pydev_src_dir,
                host_literal,
                port,
+               unix_socket_arg,
                setup,
                args[indC + 1])
 
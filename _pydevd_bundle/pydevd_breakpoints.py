@@ -1,8 +1,32 @@
+import itertools
+import sys
+import traceback
+
 from _pydevd_bundle.pydevd_constants import dict_iter_values, IS_PY24
 from _pydev_bundle import pydev_log
 from _pydevd_bundle import pydevd_import_class
 from _pydevd_bundle.pydevd_frame_utils import add_exception_to_frame
-from _pydev_imps._pydev_saved_modules import threading
+
+# Name bound to the current hit count when evaluating a hit condition (the user writes it as @HIT@).
+HIT_COUNT_VAR_NAME = '__pydevd_hit_count__'
+
+
+def compile_breakpoint_expression(expression, description):
+    '''
+    Compiles some expression of a breakpoint (condition, hit condition or log expression) so that it's
+    not parsed again on each hit.
+
+    :return tuple(code, str):
+        The code to be passed to eval() (None if not available) and the error message if it couldn't be compiled.
+    '''
+    if expression is None:
+        return None, None
+
+    try:
+        return compile(expression, '<breakpoint %s>' % (description,), 'eval'), None
+    except:
+        etype, value = sys.exc_info()[:2]
+        return None, ''.join(traceback.format_exception_only(etype, value))
 
 
 class ExceptionBreakpoint(object):
@@ -26,6 +50,8 @@ class ExceptionBreakpoint(object):
 
         self.condition = condition
         self.expression = expression
+        self.compiled_condition, self.condition_error = compile_breakpoint_expression(condition, 'condition')
+        self.compiled_expression, self.expression_error = compile_breakpoint_expression(expression, 'expression')
         self.notify_on_unhandled_exceptions = notify_on_unhandled_exceptions
         self.notify_on_handled_exceptions = notify_on_handled_exceptions
         self.notify_on_first_raise_only = notify_on_first_raise_only
@@ -43,6 +69,9 @@ class ExceptionBreakpoint(object):
     def handle_hit_condition(self, frame):
         return False
 
+    def get_compile_errors(self):
+        return _get_compile_errors(self)
+
 
 class LineBreakpoint(object):
 
@@ -53,10 +82,16 @@ class LineBreakpoint(object):
         self.expression = expression
         self.suspend_policy = suspend_policy
         self.hit_condition = hit_condition
-        self._hit_count = 0
-        self._hit_condition_lock = threading.Lock()
-        # need for frame evaluation: list of code objects, which bytecode was modified by this breakpoint
-        self.code_objects = set()
+        self.compiled_condition, self.condition_error = compile_breakpoint_expression(condition, 'condition')
+        self.compiled_expression, self.expression_error = compile_breakpoint_expression(expression, 'expression')
+
+        self._hit_counter = itertools.count(1)  # Note: next() is atomic (no lock needed).
+        if hit_condition is not None:
+            hit_condition = hit_condition.replace('@HIT@', HIT_COUNT_VAR_NAME)
+        self.compiled_hit_condition, self.hit_condition_error = compile_breakpoint_expression(hit_condition, 'hit condition')
+        # If the hit condition only accesses the hit count the frame locals don't have to be copied.
+        self._hit_condition_needs_locals = self.compiled_hit_condition is not None and \
+            set(self.compiled_hit_condition.co_names) != set([HIT_COUNT_VAR_NAME])
         self.is_logpoint = is_logpoint
 
     @property
@@ -66,15 +101,35 @@ class LineBreakpoint(object):
     def handle_hit_condition(self, frame):
         if self.hit_condition is None:
             return False
-        ret = False
-        with self._hit_condition_lock:
-            self._hit_count += 1
-            expr = self.hit_condition.replace('@HIT@', str(self._hit_count))
-            try:
-                ret = bool(eval(expr, frame.f_globals, frame.f_locals))
-            except Exception:
-                ret = False
-        return ret
+        hit_count = next(self._hit_counter)
+        compiled_hit_condition = self.compiled_hit_condition
+        if compiled_hit_condition is None:
+            return False
+
+        if self._hit_condition_needs_locals:
+            namespace = dict(frame.f_locals)
+        else:
+            namespace = {}
+        namespace[HIT_COUNT_VAR_NAME] = hit_count
+        try:
+            return bool(eval(compiled_hit_condition, frame.f_globals, namespace))
+        except Exception:
+            return False
+
+    def get_compile_errors(self):
+        errors = _get_compile_errors(self)
+        if self.hit_condition_error is not None:
+            errors.append('Hit condition:\n%s\n\nError:\n%s' % (self.hit_condition, self.hit_condition_error))
+        return errors
+
+
+def _get_compile_errors(breakpoint):
+    errors = []
+    if breakpoint.condition_error is not None:
+        errors.append('Condition:\n%s\n\nError:\n%s' % (breakpoint.condition, breakpoint.condition_error))
+    if breakpoint.expression_error is not None:
+        errors.append('Expression:\n%s\n\nError:\n%s' % (breakpoint.expression, breakpoint.expression_error))
+    return errors
 
 
 def get_exception_full_qname(exctype):
@@ -89,18 +144,54 @@ def get_exception_name(exctype):
     return exctype.__name__
 
 
+# Cache with the resolution of exception type -> exception breakpoint (None is also cached).
+# Key: id(exceptions dict), value: (exceptions dict, {exctype: exception breakpoint or None}).
+# Note: the exceptions dicts are never mutated (a copy is assigned back when they change), so, a new dict
+# gets a new cache and a reference to the dict is kept so that its id can't be reused while cached.
+_exceptions_id_to_type_cache = {}
+
+
+def clear_exception_breakpoint_cache():
+    '''
+    Should be called whenever exception breakpoints are added/removed.
+    '''
+    _exceptions_id_to_type_cache.clear()
+
+
 def get_exception_breakpoint(exctype, exceptions):
-    exception_full_qname = get_exception_full_qname(exctype)
+    if exceptions is None:
+        return None
 
-    exc = None
-    if exceptions is not None:
+    cached = _exceptions_id_to_type_cache.get(id(exceptions))
+    if cached is not None and cached[0] is exceptions:
+        type_to_breakpoint = cached[1]
         try:
-            return exceptions[exception_full_qname]
+            return type_to_breakpoint[exctype]
         except KeyError:
-            for exception_breakpoint in dict_iter_values(exceptions):
-                if exception_breakpoint.type is not None and issubclass(exctype, exception_breakpoint.type):
-                    if exc is None or issubclass(exception_breakpoint.type, exc.type):
-                        exc = exception_breakpoint
+            pass
+    else:
+        type_to_breakpoint = {}
+        _exceptions_id_to_type_cache[id(exceptions)] = (exceptions, type_to_breakpoint)
+
+    exc = _resolve_exception_breakpoint(exctype, exceptions)
+    try:
+        type_to_breakpoint[exctype] = exc
+    except TypeError:
+        pass  # Unhashable exctype (just don't cache it).
+    return exc
+
+
+def _resolve_exception_breakpoint(exctype, exceptions):
+    exception_full_qname = get_exception_full_qname(exctype)
+
+    exc = None
+    try:
+        return exceptions[exception_full_qname]
+    except KeyError:
+        for exception_breakpoint in dict_iter_values(exceptions):
+            if exception_breakpoint.type is not None and issubclass(exctype, exception_breakpoint.type):
+                if exc is None or issubclass(exception_breakpoint.type, exc.type):
+                    exc = exception_breakpoint
     return exc
 
 
@@ -13,6 +13,19 @@ each command has a format:
     is returned as XML. Each attribute value is urlencoded, and then the whole
     payload is urlencoded again to prevent stray characters corrupting protocol/xml encodings
 
+Compression:
+    if the debugger asks for ZLIB in the VERSION command, the commands created afterwards with a text bigger than
+    COMPRESSION_MIN_SIZE are compressed: with the binary framing, \x01 is used instead of \x00 as the first byte and
+    the payload is compressed with zlib. Without it, the text is sent as @@ZLIB@@ + base64(zlib(utf-8 text)) (note:
+    the compressed text isn't urlencoded). Compressed commands are also accepted from the debugger.
+
+Binary framing:
+    if the debugger asks for it in the VERSION command (BINARY_FRAMING in its 4th field -- see below), after the
+    VERSION response each command is sent as:
+        \x00 + length (4 bytes, big endian) + id\tsequence-num\ttext
+    where the text is raw utf-8 (the payload isn't urlencoded again and there's no trailing newline).
+    Both formats are always accepted by the reader (a binary frame starts with \x00 and a text command with a digit).
+
     Commands:
 
     NUMBER   NAME                     FROM*     ARGUMENTS                     RESPONSE      NOTE
@@ -34,7 +47,19 @@ each command has a format:
     109      STEP_RETURN              JAVA      thread_id
 
     110      GET_VARIABLE             JAVA      thread_id \t frame_id \t      GET_VARIABLE with XML of var content
-                                                FRAME|GLOBAL \t attributes*
+                                                FRAME|GLOBAL \t attributes*  (with the total number of children
+                                                                              in <xml total="..."> if paged)
+                                                (the scope may be given as
+                                                scope|start|count to get only
+                                                a page of the children)
+                                                or
+                                                thread_id \t handle \t
+                                                BY_HANDLE \t attributes*
+                                                (if VARIABLE_HANDLES was asked
+                                                for in VERSION, containers shown
+                                                in GET_FRAME and GET_VARIABLE
+                                                have a handle attribute -- valid
+                                                until the thread is resumed)
 
     111      SET_BREAK                JAVA      file/line of the breakpoint
     112      REMOVE_BREAK             JAVA      file/line of the return
@@ -47,6 +72,10 @@ each command has a format:
     119      CMD_RELOAD_CODE
     120      CMD_GET_COMPLETIONS      JAVA
 
+    156      CMD_GET_COMMAND_STATS    JAVA      '' or 'STDERR'                stats of the commands processed (as xml)
+                                                                              or dumps them to stderr when
+                                                                              'STDERR' is passed.
+
     200      CMD_REDIRECT_OUTPUT      JAVA      streams to redirect as string - 
                                                 'STDOUT' (redirect only STDOUT)
                                                 'STDERR' (redirect only STDERR)
@@ -54,6 +83,10 @@ each command has a format:
 
 500 series diagnostics/ok
     501      VERSION                  either      Version string (1.0)        Currently just used at startup
+                                                \t ide_os \t breakpoints_by
+                                                \t protocol features (comma separated, i.e.: BINARY_FRAMING,ZLIB,
+                                                PAGED_VARIABLES, VARIABLE_HANDLES)
+                                                (the response has the version and the features accepted).
     502      RETURN                   either      Depends on caller    -
 
 900 series: errors
@@ -63,8 +96,12 @@ each command has a format:
     * PYDB - pydevd, the python end
 '''
 
+import base64
+from codecs import utf_8_decode
+from collections import deque
 import itertools
 import os
+import struct
 
 from _pydev_bundle.pydev_imports import _queue
 from _pydev_imps._pydev_saved_modules import time
@@ -74,8 +111,14 @@ from _pydev_imps._pydev_saved_modules import socket
 from socket import socket, AF_INET, SOCK_STREAM, SHUT_RD, SHUT_WR, SOL_SOCKET, SO_REUSEADDR, SHUT_RDWR, timeout
 from _pydevd_bundle.pydevd_constants import DebugInfoHolder, get_thread_id, IS_JYTHON, IS_PY2, IS_PY3K, \
     IS_PY36_OR_GREATER, STATE_RUN, dict_keys, ASYNC_EVAL_TIMEOUT_SEC, IS_IRONPYTHON, GlobalDebuggerHolder, \
+    WRITER_MAX_BATCH_SIZE, WRITER_FLUSH_DEADLINE, COMPRESSION_MIN_SIZE, \
     get_global_debugger, GetGlobalDebugger, set_global_debugger # Keep for backward compatibility @UnusedImport
 
+try:
+    import zlib
+except ImportError:
+    zlib = None
+
 try:
     from urllib import quote_plus, unquote, unquote_plus
 except:
@@ -92,6 +135,7 @@ import pydevd_tracing
 from _pydevd_bundle import pydevd_xml
 from _pydevd_bundle import pydevd_vm_type
 from pydevd_file_utils import get_abs_path_real_path_and_base_from_frame, NORM_PATHS_AND_BASE_CONTAINER
+from _pydevd_bundle.pydevd_session_recorder import get_session_recorder
 import pydevd_file_utils
 import sys
 import traceback
@@ -185,6 +229,9 @@ CMD_STOP_ON_START = 154
 # When the debugger is stopped in an exception, this command will provide the details of the current exception (in the current thread).
 CMD_GET_EXCEPTION_DETAILS = 155
 
+# Stats on the time spent processing the commands (see: pydevd_command_stats).
+CMD_GET_COMMAND_STATS = 156
+
 CMD_REDIRECT_OUTPUT = 200
 CMD_GET_NEXT_STATEMENT_TARGETS = 201
 CMD_SET_PROJECT_ROOTS = 202
@@ -251,6 +298,7 @@ ID_TO_MEANING = {
     '153': 'CMD_THREAD_DUMP_TO_STDERR',
     '154': 'CMD_STOP_ON_START',
     '155': 'CMD_GET_EXCEPTION_DETAILS',
+    '156': 'CMD_GET_COMMAND_STATS',
 
     '200': 'CMD_REDIRECT_OUTPUT',
     '201': 'CMD_GET_NEXT_STATEMENT_TARGETS',
@@ -265,6 +313,27 @@ MAX_IO_MSG_SIZE = 1000  #if the io is too big, we'll not send all (could make th
 
 VERSION_STRING = "@@BUILD_NUMBER@@"
 
+# Protocol features which may be asked for in CMD_VERSION.
+PROTOCOL_BINARY_FRAMING = 'BINARY_FRAMING'
+PROTOCOL_COMPRESSION = 'ZLIB'
+PROTOCOL_PAGED_VARIABLES = 'PAGED_VARIABLES'  # GET_VARIABLE accepts scope|start|count.
+PROTOCOL_VARIABLE_HANDLES = 'VARIABLE_HANDLES'  # GET_VARIABLE accepts the BY_HANDLE scope.
+if zlib is not None:
+    SUPPORTED_PROTOCOL_FEATURES = (
+        PROTOCOL_BINARY_FRAMING, PROTOCOL_COMPRESSION, PROTOCOL_PAGED_VARIABLES, PROTOCOL_VARIABLE_HANDLES)
+else:
+    SUPPORTED_PROTOCOL_FEATURES = (PROTOCOL_BINARY_FRAMING, PROTOCOL_PAGED_VARIABLES, PROTOCOL_VARIABLE_HANDLES)
+
+# First byte of a command sent with the binary framing (the length of the payload follows it).
+BINARY_FRAME_MARKER = b'\x00'
+# Same as BINARY_FRAME_MARKER, but the payload is compressed with zlib.
+COMPRESSED_BINARY_FRAME_MARKER = b'\x01'
+# Prefix of the text of a command sent without the binary framing whose text is compressed with zlib
+# (the compressed text is base64-encoded after it).
+COMPRESSED_TEXT_PREFIX = '@@ZLIB@@'
+BINARY_FRAME_HEADER_SIZE = 5
+_binary_frame_length = struct.Struct('>I')
+
 from _pydev_bundle._pydev_filesystem_encoding import getfilesystemencoding
 file_system_encoding = getfilesystemencoding()
 filesystem_encoding_is_utf8 = file_system_encoding.lower() in ('utf-8', 'utf_8', 'utf8')
@@ -352,6 +421,9 @@ class PyDBDaemonThread(threading.Thread):
 class ReaderThread(PyDBDaemonThread):
     """ reader thread reads and dispatches commands in an infinite loop """
 
+    # Maximum number of bytes received at once.
+    read_buffer_size = 64 * 1024
+
     def __init__(self, sock):
         PyDBDaemonThread.__init__(self)
         self.sock = sock
@@ -360,6 +432,15 @@ class ReaderThread(PyDBDaemonThread):
         self.process_net_command = process_net_command
         self.global_debugger_holder = GlobalDebuggerHolder
 
+        # Parts of a message not completely received yet.
+        self._pending_parts = []
+        # Bytes still needed to complete the header/payload of the binary frame being received (-1 if the current
+        # message isn't a binary frame).
+        self._frame_bytes_needed = -1
+        self._in_frame_header = False
+        self._frame_compressed = False
+        self._session_recorder = get_session_recorder()
+
 
 
     def do_kill_pydev_thread(self):
@@ -373,49 +454,123 @@ class ReaderThread(PyDBDaemonThread):
 
     def _on_run(self):
         self._stop_trace()
-        read_buffer = ""
+
+        # The data is received in a reusable buffer and only the bytes just received are scanned for the message
+        # delimiter (the parts of a message not completely received are kept until its end is found).
+        read_buffer = bytearray(self.read_buffer_size)
+        read_buffer_view = memoryview(read_buffer)
+        recv_into = getattr(self.sock, 'recv_into', None)
         try:
 
             while not self.killReceived:
                 try:
-                    r = self.sock.recv(1024)
+                    if recv_into is not None:
+                        size = recv_into(read_buffer)
+                        data, data_view = read_buffer, read_buffer_view
+                    else:
+                        data = self.sock.recv(self.read_buffer_size)
+                        size = len(data)
+                        data_view = memoryview(data)
                 except:
                     if not self.killReceived:
                         traceback.print_exc()
                         self.handle_except()
                     return #Finished communication.
 
-                #Note: the java backend is always expected to pass utf-8 encoded strings. We now work with unicode
-                #internally and thus, we may need to convert to the actual encoding where needed (i.e.: filenames
-                #on python 2 may need to be converted to the filesystem encoding).
-                if hasattr(r, 'decode'):
-                    r = r.decode('utf-8')
-
-                read_buffer += r
                 if DebugInfoHolder.DEBUG_RECORD_SOCKET_READS:
-                    sys.stderr.write(u'debugger: received >>%s<<\n' % (read_buffer,))
+                    sys.stderr.write(u'debugger: received >>%s<<\n' % (data_view[:size].tobytes().decode('utf-8', 'replace'),))
                     sys.stderr.flush()
 
-                if len(read_buffer) == 0:
+                if size == 0:
                     self.handle_except()
                     break
-                while read_buffer.find(u'\n') != -1:
-                    command, read_buffer = read_buffer.split(u'\n', 1)
 
-                    args = command.split(u'\t', 2)
-                    try:
-                        cmd_id = int(args[0])
-                        pydev_log.debug('Received command: %s %s\n' % (ID_TO_MEANING.get(str(cmd_id), '???'), command,))
-                        self.process_command(cmd_id, int(args[1]), args[2])
-                    except:
-                        traceback.print_exc()
-                        sys.stderr.write("Can't process net command: %s\n" % command)
-                        sys.stderr.flush()
+                self._process_received(data, data_view, size)
 
         except:
             traceback.print_exc()
             self.handle_except()
 
+    def _process_received(self, data, data_view, size):
+        '''
+        Handles the messages in the bytes received (the first `size` bytes of `data`).
+        '''
+        pending_parts = self._pending_parts
+        start = 0
+        while start < size:
+            if self._frame_bytes_needed == -1:
+                if not pending_parts and data[start:start + 1] in (BINARY_FRAME_MARKER, COMPRESSED_BINARY_FRAME_MARKER):
+                    # Start of a binary frame (the header has the marker and the size of the payload).
+                    self._frame_bytes_needed = BINARY_FRAME_HEADER_SIZE
+                    self._in_frame_header = True
+                    continue
+
+                # Text command: ends with a new line.
+                i = data.find(b'\n', start, size)
+                if i == -1:
+                    pending_parts.append(data_view[start:size].tobytes())
+                    break
+
+                #Note: the java backend is always expected to pass utf-8 encoded strings. We now work with unicode
+                #internally and thus, we may need to convert to the actual encoding where needed (i.e.: filenames
+                #on python 2 may need to be converted to the filesystem encoding).
+                if pending_parts:
+                    pending_parts.append(data_view[start:i].tobytes())
+                    command = b''.join(pending_parts).decode('utf-8')
+                    del pending_parts[:]
+                else:
+                    command = utf_8_decode(data_view[start:i], 'strict', True)[0]
+                start = i + 1
+
+                self._handle_message(command)
+
+            else:
+                # Binary frame: a fixed number of bytes is expected.
+                end = start + self._frame_bytes_needed
+                if end > size:
+                    pending_parts.append(data_view[start:size].tobytes())
+                    self._frame_bytes_needed -= size - start
+                    break
+
+                if pending_parts:
+                    pending_parts.append(data_view[start:end].tobytes())
+                    contents = b''.join(pending_parts)
+                    del pending_parts[:]
+                else:
+                    contents = data_view[start:end]
+                start = end
+
+                if self._in_frame_header:
+                    self._in_frame_header = False
+                    self._frame_compressed = contents[0:1] == COMPRESSED_BINARY_FRAME_MARKER
+                    self._frame_bytes_needed = _binary_frame_length.unpack(contents[1:BINARY_FRAME_HEADER_SIZE])[0]
+                    if self._frame_bytes_needed == 0:
+                        self._frame_bytes_needed = -1
+                        self._handle_message(u'')
+                else:
+                    self._frame_bytes_needed = -1
+                    if self._frame_compressed:
+                        if not isinstance(contents, bytes):
+                            contents = contents.tobytes()
+                        contents = zlib.decompress(contents)
+                    self._handle_message(utf_8_decode(contents, 'strict', True)[0])
+
+    def _handle_message(self, command):
+        args = command.split(u'\t', 2)
+        try:
+            cmd_id = int(args[0])
+            text = args[2]
+            if NetCommand.compression and text.startswith(COMPRESSED_TEXT_PREFIX):
+                text = decompress_text(text)
+            pydev_log.debug('Received command: %s %s\n' % (ID_TO_MEANING.get(str(cmd_id), '???'), command,))
+            seq = int(args[1])
+            if self._session_recorder is not None:
+                self._session_recorder.record_received(cmd_id, seq, text)
+            self.process_command(cmd_id, seq, text)
+        except:
+            traceback.print_exc()
+            sys.stderr.write("Can't process net command: %s\n" % command)
+            sys.stderr.flush()
 
     def handle_except(self):
         self.global_debugger_holder.global_dbg.finish_debugging_session()
@@ -425,16 +580,160 @@ class ReaderThread(PyDBDaemonThread):
 
 
 #----------------------------------------------------------------------------------- SOCKET UTILITIES - WRITER
+#=======================================================================================================================
+# send_all
+#=======================================================================================================================
+def send_all(sock, data):
+    ''' sends all the given bytes (socket.send may send only part of it) '''
+    sendall = getattr(sock, 'sendall', None)
+    if sendall is not None:
+        sendall(data)
+        return
+
+    # i.e.: some older versions of jython don't have a sendall.
+    while data:
+        sent = sock.send(data)
+        data = data[sent:]
+
+
+#=======================================================================================================================
+# PriorityCommandQueue
+#=======================================================================================================================
+# Priorities of the commands sent (commands with a lower number are sent first).
+COMMAND_PRIORITY_CONTROL = 0  # i.e.: thread suspended/resumed/created.
+COMMAND_PRIORITY_RESPONSE = 1  # Responses to requests from the IDE.
+COMMAND_PRIORITY_TELEMETRY = 2  # Output, signatures and concurrency events.
+
+# Policies when the commands of some priority reach the maximum allowed.
+OVERFLOW_BLOCK = 0  # The thread adding a command waits until there's space for it.
+OVERFLOW_DROP_OLDEST = 1  # The oldest pending command is discarded.
+
+
+def get_command_priority(cmd):
+    cmd_id = int(cmd.id)
+    if cmd_id in (CMD_WRITE_TO_CONSOLE, CMD_SIGNATURE_CALL_TRACE, CMD_GET_CONCURRENCY_EVENT, CMD_EXIT):
+        # Note: CMD_EXIT is sent after everything else.
+        return COMMAND_PRIORITY_TELEMETRY
+
+    if cmd.seq % 2 == 1:
+        # Requests from the IDE have odd sequence numbers (and the response uses the same number).
+        return COMMAND_PRIORITY_RESPONSE
+
+    return COMMAND_PRIORITY_CONTROL
+
+
+class PriorityCommandQueue(object):
+    '''
+    Queue with the commands to be sent: a command is only gotten when there are no pending commands with a
+    higher priority (see: get_command_priority).
+
+    Each priority has its own maximum size and overflow policy (by default, the telemetry commands are
+    discarded when too many are pending, so that they can't make the program use too much memory if the IDE
+    is slow to read them).
+    '''
+
+    def __init__(self, max_sizes=(10000, 10000, 10000),
+                 overflow_policies=(OVERFLOW_BLOCK, OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST)):
+        self._lanes = tuple(deque() for _max_size in max_sizes)
+        self._lane_sizes = [0] * len(max_sizes)  # Size (in bytes) of the commands pending in each lane.
+        self._max_sizes = max_sizes
+        self._overflow_policies = overflow_policies
+        self._condition = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, cmd):
+        lane_index = get_command_priority(cmd)
+        lane = self._lanes[lane_index]
+        max_size = self._max_sizes[lane_index]
+        with self._condition:
+            while len(lane) >= max_size and not self._closed:
+                if self._overflow_policies[lane_index] == OVERFLOW_DROP_OLDEST:
+                    self._lane_sizes[lane_index] -= len(lane.popleft().outgoing)
+                    self.dropped += 1
+                else:
+                    self._condition.wait(0.1)
+
+            lane.append(cmd)
+            self._lane_sizes[lane_index] += len(cmd.outgoing)
+            self._condition.notify_all()
+
+    def get(self, block=True, timeout=None):
+        '''
+        Same semantics as Queue.get (raises _queue.Empty if there's nothing to get).
+        '''
+        with self._condition:
+            while True:
+                for lane_index, lane in enumerate(self._lanes):
+                    if lane:
+                        cmd = lane.popleft()
+                        self._lane_sizes[lane_index] -= len(cmd.outgoing)
+                        self._condition.notify_all()
+                        return cmd
+
+                if not block:
+                    raise _queue.Empty()
+
+                if timeout is not None:
+                    if timeout <= 0:
+                        raise _queue.Empty()
+                    initial_time = time.time()
+                    self._condition.wait(timeout)
+                    timeout -= time.time() - initial_time
+                else:
+                    self._condition.wait()
+
+    def empty(self):
+        for lane in self._lanes:
+            if lane:
+                return False
+        return True
+
+    def wait_pending_size_below(self, priority, max_size, timeout):
+        '''
+        Waits up to the given timeout (in seconds) for the size of the commands pending with the given priority
+        to be below max_size.
+
+        :return bool:
+            Whether the size of the pending commands is below max_size.
+        '''
+        with self._condition:
+            if timeout > 0 and not self._closed:
+                initial_time = time.time()
+                remaining = timeout
+                while self._lane_sizes[priority] >= max_size and remaining > 0:
+                    self._condition.wait(remaining)
+                    remaining = timeout - (time.time() - initial_time)
+            return self._lane_sizes[priority] < max_size
+
+    def close(self):
+        '''
+        Called when the commands won't be read anymore (so, threads adding commands shouldn't wait).
+        '''
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
 #=======================================================================================================================
 # WriterThread
 #=======================================================================================================================
 class WriterThread(PyDBDaemonThread):
-    """ writer thread writes out the commands in an infinite loop """
-    def __init__(self, sock):
+    """ writer thread writes out the commands in an infinite loop
+
+    All the commands pending in the queue are sent together (up to max_batch_size bytes). If a flush_deadline
+    is given, it waits up to that time (in seconds) for more commands to send along with the first one.
+
+    Commands are sent by priority (see: PriorityCommandQueue).
+    """
+    def __init__(self, sock, max_batch_size=WRITER_MAX_BATCH_SIZE, flush_deadline=WRITER_FLUSH_DEADLINE):
         PyDBDaemonThread.__init__(self)
         self.sock = sock
         self.setName("pydevd.Writer")
-        self.cmdQueue = _queue.Queue()
+        self.cmdQueue = PriorityCommandQueue()
+        self.max_batch_size = max_batch_size
+        self._session_recorder = get_session_recorder()
+        self.flush_deadline = flush_deadline
         if pydevd_vm_type.get_vm_type() == 'python':
             self.timeout = 0
         else:
@@ -445,9 +744,57 @@ class WriterThread(PyDBDaemonThread):
         if not self.killReceived: #we don't take new data after everybody die
             self.cmdQueue.put(cmd)
 
+    def wait_pending_output_below(self, max_size, timeout):
+        '''
+        :return bool:
+            Whether the size of the output pending to be sent went below max_size in the given timeout.
+        '''
+        return self.cmdQueue.wait_pending_size_below(COMMAND_PRIORITY_TELEMETRY, max_size, timeout)
+
+    def _get_pending_commands(self, cmd):
+        '''
+        :param NetCommand cmd:
+            The first command to be sent.
+
+        :return list(NetCommand):
+            The given command and the ones pending in the queue which should be sent along with it.
+        '''
+        cmds = [cmd]
+        if cmd.id == CMD_EXIT:
+            return cmds
+
+        size = len(cmd.outgoing)
+        deadline = None
+        if self.flush_deadline > 0:
+            deadline = time.time() + self.flush_deadline
+
+        while size < self.max_batch_size:
+            try:
+                if deadline is None:
+                    cmd = self.cmdQueue.get(0)
+                else:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        cmd = self.cmdQueue.get(0)
+                    else:
+                        cmd = self.cmdQueue.get(1, remaining)
+            except _queue.Empty:
+                break
+
+            cmds.append(cmd)
+            if cmd.id == CMD_EXIT:
+                break
+            size += len(cmd.outgoing)
+        return cmds
+
     def _on_run(self):
         """ just loop and write responses """
+        try:
+            self._write_commands()
+        finally:
+            self.cmdQueue.close()
 
+    def _write_commands(self):
         self._stop_trace()
         get_has_timeout = sys.hexversion >= 0x02030000 # 2.3 onwards have it.
         try:
@@ -475,26 +822,38 @@ class WriterThread(PyDBDaemonThread):
                     #when liberating the thread here, we could have errors because we were shutting down
                     #but the thread was still not liberated
                     return
-                out = cmd.outgoing
 
-                if DebugInfoHolder.DEBUG_TRACE_LEVEL >= 1:
-                    out_message = 'sending cmd --> '
-                    out_message += "%20s" % ID_TO_MEANING.get(out[:3], 'UNKNOWN')
-                    out_message += ' '
-                    out_message += unquote(unquote(out)).replace('\n', ' ')
-                    try:
-                        sys.stderr.write('%s\n' % (out_message,))
-                    except:
-                        pass
+                cmds = self._get_pending_commands(cmd)
+                outgoing = []
+                for cmd in cmds:
+                    out = cmd.outgoing
+                    if self._session_recorder is not None:
+                        self._session_recorder.record_written(cmd.id, cmd.seq, cmd.text)
+
+                    if DebugInfoHolder.DEBUG_TRACE_LEVEL >= 1:
+                        out_message = 'sending cmd --> '
+                        out_message += "%20s" % ID_TO_MEANING.get(str(cmd.id), 'UNKNOWN')
+                        out_message += ' '
+                        if cmd.binary_framing or cmd.compressed:
+                            out_message += unquote(to_string(cmd.text)).replace('\n', ' ')
+                        else:
+                            out_message += unquote(unquote(out)).replace('\n', ' ')
+                        try:
+                            sys.stderr.write('%s\n' % (out_message,))
+                        except:
+                            pass
 
-                if IS_PY3K:
-                    out = bytearray(out, 'utf-8')
-                self.sock.send(out) #TODO: this does not guarantee that all message are sent (and jython does not have a send all)
+                    if not isinstance(out, bytes):
+                        out = out.encode('utf-8')
+                    outgoing.append(out)
+
+                send_all(self.sock, b''.join(outgoing))
                 if cmd.id == CMD_EXIT:
                     break
                 if time is None:
                     break #interpreter shutdown
-                time.sleep(self.timeout)
+                if self.timeout:
+                    time.sleep(self.timeout)
         except Exception:
             GlobalDebuggerHolder.global_dbg.finish_debugging_session()
             if DebugInfoHolder.DEBUG_TRACE_LEVEL >= 0:
@@ -578,6 +937,85 @@ def start_client(host, port):
     sys.exit(1) #TODO: is it safe?
 
 
+#=======================================================================================================================
+# start_server_unix_socket
+#=======================================================================================================================
+def start_server_unix_socket(path):
+    """ binds to a unix domain socket, waits for the debugger to connect """
+    from socket import AF_UNIX  # Not available on Windows.
+    import stat
+
+    try:
+        if stat.S_ISSOCK(os.stat(path).st_mode):
+            os.unlink(path)  # Remove a socket file left by a previous run.
+    except OSError:
+        pass
+
+    s = socket(AF_UNIX, SOCK_STREAM)
+    s.settimeout(None)
+    s.bind(path)
+    pydevd_log(1, "Bound to unix socket ", path)
+
+    try:
+        s.listen(1)
+        newSock, _addr = s.accept()
+        pydevd_log(1, "Connection accepted")
+        # closing server socket is not necessary but we don't need it
+        s.close()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        return newSock
+
+    except:
+        sys.stderr.write("Could not bind to unix socket: %s\n" % (path,))
+        sys.stderr.flush()
+        traceback.print_exc()
+
+#=======================================================================================================================
+# start_client_unix_socket
+#=======================================================================================================================
+def start_client_unix_socket(path):
+    """ connects to a unix domain socket """
+    from socket import AF_UNIX  # Not available on Windows.
+    pydevd_log(1, "Connecting to unix socket ", path)
+
+    MAX_TRIES = 100
+    i = 0
+    while i<MAX_TRIES:
+        s = socket(AF_UNIX, SOCK_STREAM)
+        try:
+            s.connect(path)
+        except:
+            s.close()
+            i+=1
+            time.sleep(0.2)
+            continue
+        pydevd_log(1, "Connected.")
+        return s
+
+    sys.stderr.write("Could not connect to unix socket: %s\n" % (path,))
+    sys.stderr.flush()
+    traceback.print_exc()
+    sys.exit(1)
+
+#=======================================================================================================================
+# socket_from_fd
+#=======================================================================================================================
+def socket_from_fd(fd):
+    """ creates a socket for a connection already established (i.e.: an inherited file descriptor) """
+    pydevd_log(1, "Using connection from file descriptor ", str(fd))
+    try:
+        return socket(fileno=fd)  # Python 3 detects the family/type.
+    except TypeError:
+        # Python 2: the family is only used for the address related methods.
+        from _pydev_imps._pydev_saved_modules import socket as socket_module
+        s = socket_module.fromfd(fd, socket_module.AF_UNIX, SOCK_STREAM)
+        os.close(fd)  # fromfd duplicates the file descriptor.
+        return s
+
+
 
 #------------------------------------------------------------------------------------ MANY COMMUNICATION STUFF
 
@@ -592,6 +1030,12 @@ class NetCommand:
     """
     next_seq = 0 # sequence numbers
 
+    # Whether new commands are sent with the binary framing (negotiated in CMD_VERSION).
+    binary_framing = False
+
+    # Whether the text of new commands may be compressed (negotiated in CMD_VERSION).
+    compression = False
+
     def __init__(self, id, seq, text):
         """ smart handling of parameters
         if sequence is 0, new sequence will be generated
@@ -602,8 +1046,48 @@ class NetCommand:
             seq = NetCommand.next_seq
         self.seq = seq
         self.text = text
-        encoded = quote(to_string(text), '/<>_=" \t')
-        self.outgoing = '%s\t%s\t%s\n' % (id, seq, encoded)
+        self.binary_framing = NetCommand.binary_framing
+        text = to_string(text)
+        # Small commands are never compressed (so that they don't have the additional latency).
+        self.compressed = NetCommand.compression and len(text) >= COMPRESSION_MIN_SIZE
+        if self.binary_framing:
+            payload = '%s\t%s\t%s' % (id, seq, text)
+            if not isinstance(payload, bytes):
+                payload = payload.encode('utf-8')
+            if self.compressed:
+                self.outgoing = COMPRESSED_BINARY_FRAME_MARKER
+                payload = zlib.compress(payload)
+            else:
+                self.outgoing = BINARY_FRAME_MARKER
+            self.outgoing += _binary_frame_length.pack(len(payload)) + payload
+        else:
+            if self.compressed:
+                encoded = compress_text(text)
+            else:
+                encoded = quote(text, '/<>_=" \t')
+            self.outgoing = '%s\t%s\t%s\n' % (id, seq, encoded)
+
+
+def compress_text(text):
+    '''
+    :return str:
+        The given text compressed to be sent in a single line (see: COMPRESSED_TEXT_PREFIX).
+    '''
+    if not isinstance(text, bytes):
+        text = text.encode('utf-8')
+    encoded = base64.b64encode(zlib.compress(text))
+    if IS_PY3K:
+        encoded = encoded.decode('ascii')
+    return COMPRESSED_TEXT_PREFIX + encoded
+
+
+def decompress_text(text):
+    '''
+    :return unicode:
+        The text which was compressed with compress_text.
+    '''
+    return zlib.decompress(base64.b64decode(text[len(COMPRESSED_TEXT_PREFIX):])).decode('utf-8')
+
 
 #=======================================================================================================================
 # NetCommandFactory
@@ -688,6 +1172,12 @@ class NetCommandFactory:
         # notify debugger that value was changed successfully
         return NetCommand(CMD_RETURN, seq, payload)
 
+    def make_command_stats_message(self, seq, payload):
+        try:
+            return NetCommand(CMD_GET_COMMAND_STATS, seq, payload)
+        except:
+            return self.make_error_message(seq, get_exception_traceback_str())
+
     def make_io_message(self, v, ctx):
         '''
         @param v: the message to pass to the debug server
@@ -704,8 +1194,10 @@ class NetCommandFactory:
         except:
             return self.make_error_message(0, get_exception_traceback_str())
 
-    def make_version_message(self, seq):
+    def make_version_message(self, seq, protocol_features=()):
         try:
+            if protocol_features:
+                return NetCommand(CMD_VERSION, seq, '%s\t%s' % (VERSION_STRING, ','.join(protocol_features)))
             return NetCommand(CMD_VERSION, seq, VERSION_STRING)
         except:
             return self.make_error_message(seq, get_exception_traceback_str())
@@ -1148,19 +1640,31 @@ class InternalSetNextStatementThread(InternalThreadCommand):
 #=======================================================================================================================
 class InternalGetVariable(InternalThreadCommand):
     """ gets the value of a variable """
-    def __init__(self, seq, thread_id, frame_id, scope, attrs):
+    def __init__(self, seq, thread_id, frame_id, scope, attrs, start=None, count=None):
         self.sequence = seq
         self.thread_id = thread_id
         self.frame_id = frame_id
         self.scope = scope
         self.attributes = attrs
+        self.start = start
+        self.count = count
 
     def do_it(self, dbg):
         """ Converts request into python variable """
         try:
             xml = StringIO.StringIO()
-            xml.write("<xml>")
-            _typeName, val_dict = pydevd_vars.resolve_compound_variable_fields(self.thread_id, self.frame_id, self.scope, self.attributes)
+            if self.start is None:
+                _typeName, val_dict = pydevd_vars.resolve_compound_variable_fields(
+                    self.thread_id, self.frame_id, self.scope, self.attributes)
+                total = None
+            else:
+                _typeName, val_dict, total = pydevd_vars.resolve_compound_variable_fields_page(
+                    self.thread_id, self.frame_id, self.scope, self.attributes, self.start, self.count)
+
+            if total is None:
+                xml.write("<xml>")
+            else:
+                xml.write('<xml total="%s">' % (total,))
             if val_dict is None:
                 val_dict = {}
 
@@ -1170,10 +1674,15 @@ class InternalGetVariable(InternalThreadCommand):
             if not (_typeName == "OrderedDict" or val_dict.__class__.__name__ == "OrderedDict" or IS_PY36_OR_GREATER):
                 keys.sort(key=compare_object_attrs_key)
 
+            if dbg.use_variable_handles:
+                variable_handles = pydevd_vars.get_variable_handles(self.thread_id)
+            else:
+                variable_handles = None
             for k in keys:
                 val = val_dict[k]
                 evaluate_full_value = pydevd_xml.should_evaluate_full_value(val)
-                xml.write(pydevd_xml.var_to_xml(val, k, evaluate_full_value=evaluate_full_value))
+                xml.write(pydevd_xml.var_to_xml(
+                    val, k, evaluate_full_value=evaluate_full_value, variable_handles=variable_handles))
 
             xml.write("</xml>")
             cmd = dbg.cmd_factory.make_get_variable_message(self.sequence, xml.getvalue())
@@ -1256,8 +1765,12 @@ class InternalGetFrame(InternalThreadCommand):
             frame = pydevd_vars.find_frame(self.thread_id, self.frame_id)
             if frame is not None:
                 hidden_ns = pydevconsole.get_ipython_hidden_vars()
+                if dbg.use_variable_handles:
+                    variable_handles = pydevd_vars.get_variable_handles(self.thread_id)
+                else:
+                    variable_handles = None
                 xml = "<xml>"
-                xml += pydevd_xml.frame_vars_to_xml(frame.f_locals, hidden_ns)
+                xml += pydevd_xml.frame_vars_to_xml(frame.f_locals, hidden_ns, variable_handles=variable_handles)
                 del frame
                 xml += "</xml>"
                 cmd = dbg.cmd_factory.make_get_frame_message(self.sequence, xml)
@@ -51,6 +51,8 @@ ACCEPTED_ARG_HANDLERS = [
     ArgHandlerWithParam('port', int, 0),
     ArgHandlerWithParam('vm_type'),
     ArgHandlerWithParam('client'),
+    ArgHandlerWithParam('unix-socket'),  # Connect (or bind, with --server) to a unix domain socket instead of a port.
+    ArgHandlerWithParam('inherited-fd', int),  # Use a connection already established (file descriptor inherited).
 
     ArgHandlerBool('server'),
     ArgHandlerBool('DEBUG_RECORD_SOCKET_READS'),
@@ -64,6 +66,9 @@ ACCEPTED_ARG_HANDLERS = [
     ArgHandlerBool('module'),
 ]
 
+# The inherited connection can't be shared with new processes (they use the port/unix socket to connect).
+NOT_PROPAGATED_ARGS = ('inherited-fd',)
+
 ARGV_REP_TO_HANDLER = {}
 for handler in ACCEPTED_ARG_HANDLERS:
     ARGV_REP_TO_HANDLER[handler.arg_v_rep] = handler
@@ -87,7 +92,7 @@ def setup_to_argv(setup):
     ret = [get_pydevd_file()]
 
     for handler in ACCEPTED_ARG_HANDLERS:
-        if handler.arg_name in setup:
+        if handler.arg_name in setup and handler.arg_name not in NOT_PROPAGATED_ARGS:
             handler.to_argv(ret, setup)
     return ret
 
@@ -0,0 +1,114 @@
+'''
+Statistics on the commands processed by the debugger (to find out which requests make it slow to respond):
+
+- Commands received from the IDE: how many were processed and the time spent processing each one (with
+  py_db._main_lock held).
+
+- Internal commands (executed by the thread they're posted to): how long each one was queued until it was
+  executed and the time spent executing it.
+
+The times are kept in histograms (see: HISTOGRAM_BUCKETS) along with the total and the maximum time.
+'''
+import sys
+
+from _pydev_imps._pydev_saved_modules import threading
+from _pydevd_bundle.pydevd_constants import dict_iter_items
+
+# Upper bounds (in seconds) of the buckets of the histograms (the last bucket has the times above the last bound).
+HISTOGRAM_BUCKETS = (0.001, 0.01, 0.1, 1.0)
+
+
+class _TimeStats(object):
+
+    __slots__ = ['count', 'total_time', 'max_time', 'histogram']
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.histogram = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+
+    def add(self, elapsed):
+        self.count += 1
+        self.total_time += elapsed
+        if elapsed > self.max_time:
+            self.max_time = elapsed
+
+        for i, bound in enumerate(HISTOGRAM_BUCKETS):
+            if elapsed < bound:
+                self.histogram[i] += 1
+                break
+        else:
+            self.histogram[-1] += 1
+
+
+class CommandStats(object):
+
+    # Kinds of the times recorded.
+    PROCESSED = 'processed'  # Time processing a command received (under the main lock).
+    QUEUED = 'queued'  # Time an internal command waited to be executed.
+    EXECUTED = 'executed'  # Time executing an internal command.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def clear(self):
+        with self._lock:
+            self._stats = {}
+
+    def add(self, kind, name, elapsed):
+        key = (kind, name)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _TimeStats()
+            stats.add(elapsed)
+
+    def add_processed(self, name, elapsed):
+        self.add(self.PROCESSED, name, elapsed)
+
+    def add_internal_command(self, name, queued_time, execution_time):
+        self.add(self.QUEUED, name, queued_time)
+        self.add(self.EXECUTED, name, execution_time)
+
+    def get_stats(self):
+        '''
+        :return list(tuple(str, str, _TimeStats)):
+            The kind, name and stats recorded (sorted by kind and name).
+        '''
+        with self._lock:
+            return sorted((kind, name, stats) for (kind, name), stats in dict_iter_items(self._stats))
+
+    def to_xml(self):
+        xml = ['<xml>']
+        for kind, name, stats in self.get_stats():
+            xml.append('<stats kind="%s" name="%s" count="%s" total="%.6f" max="%.6f" histogram="%s" />' % (
+                kind, name, stats.count, stats.total_time, stats.max_time,
+                ','.join(str(count) for count in stats.histogram)))
+        xml.append('</xml>')
+        return ''.join(xml)
+
+    def dump(self, stream=None):
+        '''
+        Writes the stats to the given stream (default is stderr).
+        '''
+        if stream is None:
+            stream = sys.stderr
+
+        bucket_names = ['<%sms' % (int(bound * 1000),) for bound in HISTOGRAM_BUCKETS]
+        bucket_names.append('>=%sms' % (int(HISTOGRAM_BUCKETS[-1] * 1000),))
+
+        lines = ['pydevd command stats (times in ms):\n']
+        lines.append('%-10s %-40s %8s %10s %10s  %s\n' % ('kind', 'name', 'count', 'total', 'max', ' '.join(
+            '%8s' % (bucket_name,) for bucket_name in bucket_names)))
+        for kind, name, stats in self.get_stats():
+            lines.append('%-10s %-40s %8s %10.1f %10.1f  %s\n' % (
+                kind, name, stats.count, stats.total_time * 1000, stats.max_time * 1000,
+                ' '.join('%8s' % (count,) for count in stats.histogram)))
+        stream.write(''.join(lines))
+        stream.flush()
+
+
+# Stats of the commands processed in this process.
+command_stats = CommandStats()
@@ -118,6 +118,20 @@ IS_PYCHARM = False
 LOAD_VALUES_ASYNC = os.getenv('PYDEVD_LOAD_VALUES_ASYNC', 'False') == 'True'
 DEFAULT_VALUE = "__pydevd_value_async"
 ASYNC_EVAL_TIMEOUT_SEC = 60
+# Maximum number of bytes the writer thread sends at once (pending commands are sent together up to this size).
+WRITER_MAX_BATCH_SIZE = int(os.getenv('PYDEVD_WRITER_MAX_BATCH_SIZE', 64 * 1024))
+# Time (in seconds) the writer thread may wait for more commands to send them together (0 means no waiting).
+WRITER_FLUSH_DEADLINE = float(os.getenv('PYDEVD_WRITER_FLUSH_DEADLINE', 0))
+# Minimum size of the text of a command to compress it (when compression was negotiated with the IDE).
+COMPRESSION_MIN_SIZE = int(os.getenv('PYDEVD_COMPRESSION_MIN_SIZE', 4 * 1024))
+# Time (in seconds) the redirected output may be kept to send it along with the output written afterwards.
+OUTPUT_FLUSH_DELAY = float(os.getenv('PYDEVD_OUTPUT_FLUSH_DELAY', 0.05))
+# When the output waiting to be sent reaches this size (in bytes), new output waits up to OUTPUT_BLOCK_TIMEOUT
+# seconds for it to be sent and is discarded afterwards (0 means discarding it right away).
+OUTPUT_HIGH_WATER_MARK = int(os.getenv('PYDEVD_OUTPUT_HIGH_WATER_MARK', 1024 * 1024))
+OUTPUT_BLOCK_TIMEOUT = float(os.getenv('PYDEVD_OUTPUT_BLOCK_TIMEOUT', 0.5))
+# Directory where the commands exchanged with the IDE are recorded (see: pydevd_session_recorder).
+RECORD_SESSION_DIR = os.getenv('PYDEVD_RECORD_SESSION', '')
 NEXT_VALUE_SEPARATOR = "__pydev_val__"
 BUILTINS_MODULE_NAME = '__builtin__' if IS_PY2 else 'builtins'
 SHOW_DEBUG_INFO_ENV = os.getenv('PYCHARM_DEBUG') == 'True' or os.getenv('PYDEV_DEBUG') == 'True'
@@ -11,7 +11,7 @@ pydev_log.debug("Using Cython speedups")
 # from _pydevd_bundle.pydevd_frame import PyDBFrame
 # ENDIF
 
-version = 11
+version = 13
 
 if not hasattr(sys, '_current_frames'):
 
@@ -169,7 +169,7 @@ from _pydevd_bundle.pydevd_constants import STATE_SUSPEND, get_thread_id, STATE_
 from _pydevd_bundle.pydevd_dont_trace_files import DONT_TRACE, PYDEV_FILE
 from _pydevd_bundle.pydevd_frame_utils import add_exception_to_frame, just_raised, remove_exception_from_frame, ignore_exception_trace
 from _pydevd_bundle.pydevd_utils import get_clsname_for_code
-from pydevd_file_utils import get_abs_path_real_path_and_base_from_frame
+from pydevd_file_utils import get_abs_path_real_path_and_base_from_frame, NORM_PATHS_AND_BASE_CONTAINER
 try:
     from inspect import CO_GENERATOR
 except:
@@ -199,7 +199,16 @@ def handle_breakpoint_condition(py_db, info, breakpoint, new_frame):
         if condition is None:
             return False
 
-        return eval(condition, new_frame.f_globals, new_frame.f_locals)
+        compiled_condition = breakpoint.compiled_condition
+        if compiled_condition is None:
+            # It couldn't be compiled (the error was already reported when the breakpoint was added).
+            if not py_db.suspend_on_breakpoint_exception:
+                return False
+            info.conditional_breakpoint_exception = \
+                ('Condition:\n' + condition + '\n\nError:\n' + breakpoint.condition_error, [])
+            return True
+
+        return eval(compiled_condition, new_frame.f_globals, new_frame.f_locals)
 
     except:
         if type(condition) != type(''):
@@ -233,7 +242,12 @@ def handle_breakpoint_condition(py_db, info, breakpoint, new_frame):
 def handle_breakpoint_expression(breakpoint, info, new_frame):
     try:
         try:
-            val = eval(breakpoint.expression, new_frame.f_globals, new_frame.f_locals)
+            compiled_expression = breakpoint.compiled_expression
+            if compiled_expression is None:
+                # It couldn't be compiled (the error was already reported when the breakpoint was added).
+                val = breakpoint.expression_error
+            else:
+                val = eval(compiled_expression, new_frame.f_globals, new_frame.f_locals)
         except:
             val = sys.exc_info()[1]
     finally:
@@ -241,6 +255,60 @@ def handle_breakpoint_expression(breakpoint, info, new_frame):
             info.pydev_message = str(val)
 
 
+# Bits of the verdict given by get_trace_verdict.
+TRACE_VERDICT_SKIP = 1  # Never traced (pydevd files or library files out of the project scope).
+TRACE_VERDICT_SKIP_WHEN_STEPPING = 2  # Ignored when stepping (stepping filters or library files when filtering libraries).
+TRACE_VERDICT_DONT_TRACE = 4  # Tagged with @DontTrace (see: pydevd_dont_trace.should_trace_hook).
+
+
+def get_trace_verdict(py_db, frame, frame_cache_key):
+    '''
+    Provides the verdict on whether the code of the given frame should be traced along with its canonical filename.
+
+    The many questions asked about the same code (is it a pydevd file? is it in the project scope? is it
+    ignored by the stepping filters? does it have @DontTrace?) are answered at once and cached in
+    py_db.code_to_trace_verdict (keyed by the frame_cache_key, which identifies the code), so, later calls
+    just do a single lookup. The cache is cleared in py_db.clear_skip_caches().
+
+    :return tuple(int, str):
+        The verdict (a bit set with the TRACE_VERDICT_* constants) and the canonical filename.
+    '''
+    try:
+        return py_db.code_to_trace_verdict[frame_cache_key]
+    except KeyError:
+        pass
+
+    try:
+        # Make fast path faster!
+        abs_path_real_path_and_base = NORM_PATHS_AND_BASE_CONTAINER[frame.f_code.co_filename]
+    except:
+        abs_path_real_path_and_base = get_abs_path_real_path_and_base_from_frame(frame)
+
+    filename = abs_path_real_path_and_base[1]
+    verdict = 0
+    file_type = get_file_type(abs_path_real_path_and_base[-1])  # we don't want to debug threading or anything related to pydevd
+    if file_type is not None:
+        if file_type == 1:  # inlining LIB_FILE = 1
+            if not py_db.in_project_scope(filename):
+                verdict |= 1  # TRACE_VERDICT_SKIP = 1
+        else:
+            verdict |= 1  # TRACE_VERDICT_SKIP = 1
+
+    if py_db.is_filter_enabled and py_db.is_ignored_by_filters(filename):
+        verdict |= 2  # TRACE_VERDICT_SKIP_WHEN_STEPPING = 2
+
+    if py_db.is_filter_libraries and not py_db.in_project_scope(filename):
+        verdict |= 2  # TRACE_VERDICT_SKIP_WHEN_STEPPING = 2
+
+    should_trace_hook = pydevd_dont_trace.should_trace_hook
+    if should_trace_hook is not None and not should_trace_hook(frame, filename):
+        verdict |= 4  # TRACE_VERDICT_DONT_TRACE = 4
+
+    ret = (verdict, filename)
+    py_db.code_to_trace_verdict[frame_cache_key] = ret
+    return ret
+
+
 #=======================================================================================================================
 # PyDBFrame
 #=======================================================================================================================
@@ -768,11 +836,8 @@ cdef class PyDBFrame:
                     # if the frame is traced after breakpoint stop,
                     # but the file should be ignored while stepping because of filters
                     if step_cmd != -1:
-                        if main_debugger.is_filter_enabled and main_debugger.is_ignored_by_filters(filename):
-                            # ignore files matching stepping filters
-                            return self.trace_dispatch
-                        if main_debugger.is_filter_libraries and not main_debugger.in_project_scope(filename):
-                            # ignore library files while stepping
+                        if get_trace_verdict(main_debugger, frame, frame_cache_key)[0] & 2:  # TRACE_VERDICT_SKIP_WHEN_STEPPING = 2
+                            # ignore files matching stepping filters (or library files while stepping)
                             return self.trace_dispatch
 
                 if main_debugger.show_return_values:
@@ -815,7 +880,7 @@ cdef class PyDBFrame:
                         # I.e.: cache the result on self.should_skip (no need to evaluate the same frame multiple times).
                         # Note that on a code reload, we won't re-evaluate this because in practice, the frame.f_code
                         # Which will be handled by this frame is read-only, so, we can cache it safely.
-                        if not pydevd_dont_trace.should_trace_hook(frame, filename):
+                        if get_trace_verdict(main_debugger, frame, frame_cache_key)[0] & 4:  # TRACE_VERDICT_DONT_TRACE = 4
                             # -1, 0, 1 to be Cython-friendly
                             should_skip = self.should_skip = 1
                         else:
@@ -951,9 +1016,7 @@ import traceback
 from _pydev_bundle.pydev_is_thread_alive import is_thread_alive
 from _pydev_imps._pydev_saved_modules import threading
 from _pydevd_bundle.pydevd_constants import get_thread_id, IS_IRONPYTHON
-from _pydevd_bundle.pydevd_dont_trace_files import DONT_TRACE
 from _pydevd_bundle.pydevd_kill_all_pydevd_threads import kill_all_pydev_threads
-from pydevd_file_utils import get_abs_path_real_path_and_base_from_frame, NORM_PATHS_AND_BASE_CONTAINER
 from pydevd_tracing import SetTrace
 # IFDEF CYTHON -- DONT EDIT THIS FILE (it is automatically generated)
 # In Cython, set_additional_thread_info is bundled in the file.
@@ -961,12 +1024,11 @@ from cpython.object cimport PyObject
 from cpython.ref cimport Py_INCREF, Py_XDECREF
 # ELSE
 # from _pydevd_bundle.pydevd_additional_thread_info import set_additional_thread_info
-# from _pydevd_bundle.pydevd_frame import PyDBFrame
+# from _pydevd_bundle.pydevd_frame import PyDBFrame, get_trace_verdict
 # ENDIF
 from os.path import basename, splitext
 
 threadingCurrentThread = threading.currentThread
-get_file_type = DONT_TRACE.get
 
 # IFDEF CYTHON -- DONT EDIT THIS FILE (it is automatically generated)
 # cdef dict global_cache_skips
@@ -1179,12 +1241,11 @@ cdef class ThreadTracer:
         '''
         # IFDEF CYTHON -- DONT EDIT THIS FILE (it is automatically generated)
         cdef str filename;
-        cdef str base;
+        cdef int verdict;
         cdef int pydev_step_cmd;
         cdef tuple frame_cache_key;
         cdef dict cache_skips;
         cdef bint is_stepping;
-        cdef tuple abs_path_real_path_and_base;
         cdef PyDBAdditionalThreadInfo additional_info;
         # ENDIF
         # print('ENTER: trace_dispatch', frame.f_code.co_filename, frame.f_lineno, event, frame.f_code.co_name)
@@ -1223,33 +1284,17 @@ cdef class ThreadTracer:
                 # print('skipped: trace_dispatch (cache hit)', frame_cache_key, frame.f_lineno, event, frame.f_code.co_name)
                 return None
 
-            try:
-                # Make fast path faster!
-                abs_path_real_path_and_base = NORM_PATHS_AND_BASE_CONTAINER[frame.f_code.co_filename]
-            except:
-                abs_path_real_path_and_base = get_abs_path_real_path_and_base_from_frame(frame)
-                
-            filename = abs_path_real_path_and_base[1]
-            file_type = get_file_type(abs_path_real_path_and_base[-1]) #we don't want to debug threading or anything related to pydevd
-
-            if file_type is not None:
-                if file_type == 1: # inlining LIB_FILE = 1
-                    if not py_db.in_project_scope(filename):
-                        # print('skipped: trace_dispatch (not in scope)', abs_path_real_path_and_base[-1], frame.f_lineno, event, frame.f_code.co_name, file_type)
-                        cache_skips[frame_cache_key] = 1
-                        return None
-                else:
-                    # print('skipped: trace_dispatch', abs_path_real_path_and_base[-1], frame.f_lineno, event, frame.f_code.co_name, file_type)
-                    cache_skips[frame_cache_key] = 1
-                    return None
+            # A single lookup answers whether it's a pydevd file, in the project scope or ignored by filters.
+            verdict, filename = get_trace_verdict(py_db, frame, frame_cache_key)
 
-            if is_stepping:
-                if py_db.is_filter_enabled and py_db.is_ignored_by_filters(filename):
-                    # ignore files matching stepping filters
-                    return None
-                if py_db.is_filter_libraries and not py_db.in_project_scope(filename):
-                    # ignore library files while stepping
-                    return None
+            if verdict & 1:  # TRACE_VERDICT_SKIP = 1
+                # print('skipped: trace_dispatch', filename, frame.f_lineno, event, frame.f_code.co_name, verdict)
+                cache_skips[frame_cache_key] = 1
+                return None
+
+            if is_stepping and verdict & 2:  # TRACE_VERDICT_SKIP_WHEN_STEPPING = 2
+                # ignore files matching stepping filters (or library files while stepping)
+                return None
 
             # print('trace_dispatch', base, frame.f_lineno, event, frame.f_code.co_name, file_type)
             if additional_info.is_tracing:
@@ -99,6 +99,7 @@ def clear_trace_filter_cache():
 
     finally:
         should_trace_hook = old_hook
+    _clear_trace_verdicts()
 
 
 def trace_filter(mode):
@@ -118,6 +119,17 @@ def trace_filter(mode):
         should_trace_hook = default_should_trace_hook
     else:
         should_trace_hook = None
+    _clear_trace_verdicts()
 
     return mode
 
+
+def _clear_trace_verdicts():
+    '''
+    The debugger caches the result of the hook per code (see pydevd_frame.get_trace_verdict).
+    '''
+    from _pydevd_bundle.pydevd_constants import get_global_debugger
+    debugger = get_global_debugger()
+    if debugger is not None:
+        debugger.clear_skip_caches()
+
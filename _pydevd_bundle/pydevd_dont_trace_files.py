@@ -64,8 +64,10 @@ DONT_TRACE = {
     'pydevd_additional_thread_info.py': PYDEV_FILE,
     'pydevd_additional_thread_info_regular.py': PYDEV_FILE,
     'pydevd_breakpoints.py': PYDEV_FILE,
+    'pydevd_code_patching.py': PYDEV_FILE,
     'pydevd_comm.py': PYDEV_FILE,
     'pydevd_command_line_handling.py': PYDEV_FILE,
+    'pydevd_command_stats.py': PYDEV_FILE,
     'pydevd_concurrency_logger.py': PYDEV_FILE,
     'pydevd_console.py': PYDEV_FILE,
     'pydevd_constants.py': PYDEV_FILE,
@@ -95,9 +97,12 @@ DONT_TRACE = {
     'pydevd_referrers.py': PYDEV_FILE,
     'pydevd_reload.py': PYDEV_FILE,
     'pydevd_resolver.py': PYDEV_FILE,
+    'pydevd_safe_repr.py': PYDEV_FILE,
     'pydevd_save_locals.py': PYDEV_FILE,
+    'pydevd_session_recorder.py': PYDEV_FILE,
     'pydevd_signature.py': PYDEV_FILE,
     'pydevd_stackless.py': PYDEV_FILE,
+    'pydevd_sys_monitoring.py': PYDEV_FILE,
     'pydevd_thread_wrappers.py': PYDEV_FILE,
     'pydevd_trace_api.py': PYDEV_FILE,
     'pydevd_trace_dispatch.py': PYDEV_FILE,
@@ -23,6 +23,10 @@ class _AbstractResolver(_with_metaclass(abc.ABCMeta)):
         - list: get_dictionary could return a dict with index->item and use the index to resolve it later
         - set: get_dictionary could return a dict with id(object)->object and reiterate in that array to resolve it later
         - arbitrary instance: get_dictionary could return dict with attr_name->attr and use getattr to resolve it later
+
+        Resolvers of containers may also implement get_dictionary_page(var, start, count) (returning only the
+        children in the range [start, start + count)) so that the client can page through big containers
+        (the total is gotten with len(var)).
     """
 
     @abc.abstractmethod
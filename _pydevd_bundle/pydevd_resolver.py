@@ -3,6 +3,7 @@ try:
 except:
     import io as StringIO
 import traceback
+from itertools import islice
 from os.path import basename
 
 from _pydevd_bundle import pydevd_constants
@@ -242,6 +243,20 @@ class DictResolver:
         ret.update(additional_fields)
         return ret
 
+    def get_dictionary_page(self, dict, start, count):
+        '''
+        :return: the items in the range [start, start + count) (the __len__ and the additional fields are only
+        added to the first page).
+        '''
+        ret = self.init_dict()
+        for key, val in islice(dict_iter_items(dict), start, start + count):
+            ret['%s (%s)' % (self.key_to_str(key), id(key))] = val
+
+        if start == 0:
+            ret['__len__'] = len(dict)
+            ret.update(defaultResolver.get_dictionary(dict))
+        return ret
+
 
 #=======================================================================================================================
 # TupleResolver
@@ -281,6 +296,31 @@ class TupleResolver: #to enumerate tuples and lists
         d.update(additional_fields)
         return d
 
+    def get_dictionary_page(self, var, start, count):
+        '''
+        :return: the items in the range [start, start + count) (the __len__ and the additional fields are only
+        added to the first page).
+        '''
+        l = len(var)
+        d = {}
+
+        format_str = '%0' + str(int(len(str(l)))) + 'd'
+
+        if isinstance(var, (list, tuple)):
+            items = var[start:start + count]
+        else:
+            items = islice(var, start, start + count)
+
+        i = start
+        for item in items:
+            d[format_str % i] = item
+            i += 1
+
+        if start == 0:
+            d['__len__'] = l
+            d.update(defaultResolver.get_dictionary(var))
+        return d
+
 
 
 #=======================================================================================================================
@@ -324,6 +364,20 @@ class SetResolver:
         d.update(additional_fields)
         return d
 
+    def get_dictionary_page(self, var, start, count):
+        '''
+        :return: the items in the range [start, start + count) (the __len__ and the additional fields are only
+        added to the first page).
+        '''
+        d = {}
+        for item in islice(var, start, start + count):
+            d[str(id(item))] = item
+
+        if start == 0:
+            d['__len__'] = len(var)
+            d.update(defaultResolver.get_dictionary(var))
+        return d
+
 
 #=======================================================================================================================
 # InstanceResolver
@@ -433,6 +487,12 @@ class DequeResolver(TupleResolver):
         d['maxlen'] = getattr(var, 'maxlen', None)
         return d
 
+    def get_dictionary_page(self, var, start, count):
+        d = TupleResolver.get_dictionary_page(self, var, start, count)
+        if start == 0:
+            d['maxlen'] = getattr(var, 'maxlen', None)
+        return d
+
 
 #=======================================================================================================================
 # OrderedDictResolver
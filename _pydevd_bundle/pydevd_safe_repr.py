@@ -0,0 +1,255 @@
+'''
+Bounded representation of objects (in the style of reprlib) used to show the value of variables.
+
+Instead of converting the whole object with str()/repr() and truncating it afterwards, the output stops being
+generated as soon as the budget of characters is used up (so, showing a 50 MB bytes object or a dict with
+millions of items only computes the part which is actually shown).
+
+- The builtin types and containers are handled natively and the result is the same as str()/repr() whenever it
+  fits in the budget.
+
+- numpy arrays and pandas objects are printed with a bounded number of items.
+
+- Other objects use their own str()/repr() (but a container with more items than the budget and a custom
+  __repr__ is summarized instead).
+'''
+import sys
+
+from _pydevd_bundle.pydevd_constants import IS_PY3K, MAXIMUM_VARIABLE_REPRESENTATION_SIZE, dict_iter_items
+
+try:
+    from collections import deque
+except:
+    deque = None
+
+# Containers nested deeper than this are shown as '...'.
+MAX_DEPTH = 32
+
+# Ints bigger than this (about 4000 digits) aren't converted to a string.
+MAX_INT_BITS = 13000
+
+# Items shown at the beginning and at the end of each dimension of summarized numpy arrays.
+NUMPY_EDGE_ITEMS = 3
+
+# Maximum number of rows/columns shown for pandas objects.
+PANDAS_MAX_ROWS = 60
+PANDAS_MAX_COLUMNS = 20
+
+if IS_PY3K:
+    _TEXT_TYPES = (str,)
+    _INT_TYPES = (int,)
+else:
+    _TEXT_TYPES = (str, unicode)  # @UndefinedVariable
+    _INT_TYPES = (int, long)  # @UndefinedVariable
+
+_SCALAR_TYPES = frozenset(_INT_TYPES + (bool, float, complex, type(None)))
+
+# Containers whose custom repr() isn't called if they have more items than the budget.
+_SIZED_CONTAINERS = (list, tuple, dict, set, frozenset)
+if deque is not None:
+    _SIZED_CONTAINERS += (deque,)
+
+
+class _BudgetExhausted(Exception):
+    pass
+
+
+#=======================================================================================================================
+# _SafeReprWriter
+#=======================================================================================================================
+class _SafeReprWriter(object):
+
+    def __init__(self, max_size):
+        self.parts = []
+        self.remaining = max_size
+        self._ids_in_progress = set()
+
+    def write(self, s):
+        if len(s) > self.remaining:
+            self.parts.append(s[:self.remaining])
+            self.remaining = 0
+            raise _BudgetExhausted()
+        self.parts.append(s)
+        self.remaining -= len(s)
+
+    def write_obj(self, obj, as_str, depth):
+        obj_type = type(obj)
+
+        if obj_type in _SCALAR_TYPES:
+            if obj_type in _INT_TYPES and obj.bit_length() > MAX_INT_BITS:
+                # Converting a huge int to a string is quadratic (and newer versions of Python refuse to do it).
+                self.write('<int with about %s digits>' % (int(obj.bit_length() * 0.30103),))
+            else:
+                self.write(str(obj) if as_str else repr(obj))
+            return
+
+        if obj_type in _TEXT_TYPES:
+            # Note: the slice can't be shorter than the output, so, the output is the same as the one of
+            # the whole object if it fits in the budget.
+            part = obj[:self.remaining + 1]
+            self.write(part if as_str else repr(part))
+            return
+
+        if obj_type is bytes or obj_type is bytearray:
+            part = obj[:self.remaining + 1]
+            if as_str and not IS_PY3K:
+                self.write(str(part))
+            else:
+                # On Python 3 str() is the same as repr().
+                self.write(repr(part))
+            return
+
+        container_writer = self._get_container_writer(obj, obj_type, as_str)
+        if container_writer is not None:
+            obj_id = id(obj)
+            if depth >= MAX_DEPTH or obj_id in self._ids_in_progress:
+                # Too deep or recursive (i.e.: a list which contains itself).
+                container_writer(obj, depth, recursive=True)
+                return
+
+            self._ids_in_progress.add(obj_id)
+            try:
+                container_writer(obj, depth, recursive=False)
+            finally:
+                self._ids_in_progress.discard(obj_id)
+            return
+
+        self._write_other(obj, obj_type, as_str)
+
+    def _get_container_writer(self, obj, obj_type, as_str):
+        if as_str and obj_type.__str__ is not object.__str__:
+            return None
+
+        if obj_type is tuple or (isinstance(obj, tuple) and obj_type.__repr__ is tuple.__repr__):
+            return self._write_tuple
+        if obj_type is list or (isinstance(obj, list) and obj_type.__repr__ is list.__repr__):
+            return self._write_list
+        if obj_type is dict or (isinstance(obj, dict) and obj_type.__repr__ is dict.__repr__):
+            return self._write_dict
+        if isinstance(obj, (set, frozenset)) and obj_type.__repr__ in (set.__repr__, frozenset.__repr__):
+            return self._write_set
+        if obj_type is deque:
+            return self._write_deque
+        return None
+
+    def _write_items(self, items, start, end, depth, recursive):
+        write = self.write
+        write(start)
+        if recursive:
+            write('...')
+        else:
+            for i, item in enumerate(items):
+                if i > 0:
+                    write(', ')
+                self.write_obj(item, False, depth + 1)
+        write(end)
+
+    def _write_tuple(self, obj, depth, recursive):
+        self._write_items(obj, '(', ',)' if len(obj) == 1 else ')', depth, recursive)
+
+    def _write_list(self, obj, depth, recursive):
+        self._write_items(obj, '[', ']', depth, recursive)
+
+    def _write_dict(self, obj, depth, recursive):
+        write = self.write
+        write('{')
+        if recursive:
+            write('...')
+        else:
+            for i, (key, value) in enumerate(dict_iter_items(obj)):
+                if i > 0:
+                    write(', ')
+                self.write_obj(key, False, depth + 1)
+                write(': ')
+                self.write_obj(value, False, depth + 1)
+        write('}')
+
+    def _write_set(self, obj, depth, recursive):
+        type_name = type(obj).__name__
+        if IS_PY3K:
+            if not obj:
+                self.write('%s()' % (type_name,))
+            elif type(obj) is set:
+                self._write_items(obj, '{', '}', depth, recursive)
+            else:
+                self._write_items(obj, '%s({' % (type_name,), '})', depth, recursive)
+        else:
+            self._write_items(obj, '%s([' % (type_name,), '])', depth, recursive)
+
+    def _write_deque(self, obj, depth, recursive):
+        if obj.maxlen is None:
+            end = '])'
+        else:
+            end = '], maxlen=%s)' % (obj.maxlen,)
+        self._write_items(obj, 'deque([', end, depth, recursive)
+
+    def _write_other(self, obj, obj_type, as_str):
+        module_name = getattr(obj_type, '__module__', None) or ''
+        if module_name.startswith('numpy'):
+            if self._write_numpy_array(obj, as_str):
+                return
+        elif module_name.startswith('pandas'):
+            if self._write_pandas_object(obj, as_str):
+                return
+
+        if isinstance(obj, _SIZED_CONTAINERS):
+            size = len(obj)
+            if size > self.remaining:
+                # A container with a custom repr (i.e.: OrderedDict, defaultdict, namedtuple) which couldn't be shown.
+                self.write('<Too big to print. Len: %s>' % (size,))
+                return
+
+        self.write(str(obj) if as_str else repr(obj))
+
+    def _write_numpy_array(self, obj, as_str):
+        numpy = sys.modules.get('numpy')
+        if numpy is None or not isinstance(obj, numpy.ndarray):
+            return False
+
+        # Arrays with more items than the threshold are summarized (only the items at the edges are shown).
+        threshold = max(NUMPY_EDGE_ITEMS * 2, min(self.remaining // 2, 1000))
+        if hasattr(numpy, 'printoptions'):
+            with numpy.printoptions(threshold=threshold, edgeitems=NUMPY_EDGE_ITEMS):
+                s = str(obj) if as_str else repr(obj)
+        else:
+            # numpy < 1.15
+            options = numpy.get_printoptions()
+            numpy.set_printoptions(threshold=threshold, edgeitems=NUMPY_EDGE_ITEMS)
+            try:
+                s = str(obj) if as_str else repr(obj)
+            finally:
+                numpy.set_printoptions(**options)
+        self.write(s)
+        return True
+
+    def _write_pandas_object(self, obj, as_str):
+        pandas = sys.modules.get('pandas')
+        if pandas is None or not isinstance(obj, (pandas.DataFrame, pandas.Series, pandas.Index)):
+            return False
+
+        with pandas.option_context(
+                'display.max_rows', PANDAS_MAX_ROWS, 'display.max_columns', PANDAS_MAX_COLUMNS, 'display.max_seq_items', PANDAS_MAX_ROWS):
+            s = str(obj) if as_str else repr(obj)
+        self.write(s)
+        return True
+
+
+def safe_repr(obj, max_size=MAXIMUM_VARIABLE_REPRESENTATION_SIZE, as_str=False):
+    '''
+    :param max_size:
+        The maximum number of chars of the representation (None means that there's no limit).
+
+    :param as_str:
+        If True the representation is based on str() instead of repr().
+
+    :return tuple(str, bool):
+        The representation of the object (with at most max_size chars) and whether it was truncated.
+    '''
+    if max_size is None:
+        max_size = sys.maxsize
+    writer = _SafeReprWriter(max_size)
+    try:
+        writer.write_obj(obj, as_str, 0)
+    except _BudgetExhausted:
+        return ''.join(writer.parts), True
+    return ''.join(writer.parts), False
@@ -0,0 +1,174 @@
+'''
+Records the commands exchanged with the IDE (in both directions) so that a session can be replayed later on
+without the IDE (see: tests_python/session_replay.py).
+
+To record a session, set the environment variable PYDEVD_RECORD_SESSION to a directory (a file named
+pydevd_session_<pid>.gz is created for each process debugged).
+
+The file is a gzip with one line per entry (all fields separated by tabs):
+
+    the first line has a header: 'H' \t json with the version, pid, cwd and argv of the process.
+
+    afterwards, one line for each command: direction \t time \t cmd_id \t seq \t quoted text
+
+    - direction: 'R' for a command received from the IDE and 'W' for a command written to the IDE.
+    - time: seconds since the session started.
+    - quoted text: the text of the command with url-quoting (so that it never has tabs or new lines).
+'''
+import atexit
+import gzip
+import json
+import os
+import sys
+
+from _pydev_imps._pydev_saved_modules import threading
+from _pydev_imps._pydev_saved_modules import time
+from _pydevd_bundle.pydevd_constants import IS_PY3K
+
+try:
+    from urllib import quote, unquote
+except:
+    from urllib.parse import quote, unquote  #@Reimport @UnresolvedImport
+
+SESSION_FORMAT_VERSION = 1
+
+DIRECTION_RECEIVED = 'R'
+DIRECTION_WRITTEN = 'W'
+
+# The gzip is flushed at most with this interval (in seconds) so that the file is still usable if the
+# process is killed.
+_FLUSH_INTERVAL = 1.0
+
+
+#=======================================================================================================================
+# SessionRecorder
+#=======================================================================================================================
+class SessionRecorder(object):
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._stream = gzip.open(filename, 'wb')
+        self._start_time = time.time()
+        self._last_flush_time = self._start_time
+        header = json.dumps({
+            'version': SESSION_FORMAT_VERSION,
+            'pid': os.getpid(),
+            'cwd': os.getcwd(),
+            'argv': sys.argv,
+            'start_time': self._start_time,
+        })
+        self._write('H\t%s\n' % (header,))
+
+    def _write(self, line):
+        if not isinstance(line, bytes):
+            line = line.encode('utf-8')
+        self._stream.write(line)
+
+    def record(self, direction, cmd_id, seq, text):
+        if not isinstance(text, bytes):
+            text = text.encode('utf-8')
+        line = '%s\t%.6f\t%s\t%s\t%s\n' % (direction, time.time() - self._start_time, cmd_id, seq, quote(text, '/<>_=" '))
+        with self._lock:
+            if self._stream is None:
+                return
+            self._write(line)
+            curr_time = time.time()
+            if curr_time - self._last_flush_time >= _FLUSH_INTERVAL:
+                self._last_flush_time = curr_time
+                self._stream.flush()
+
+    def record_received(self, cmd_id, seq, text):
+        self.record(DIRECTION_RECEIVED, cmd_id, seq, text)
+
+    def record_written(self, cmd_id, seq, text):
+        self.record(DIRECTION_WRITTEN, cmd_id, seq, text)
+
+    def close(self):
+        with self._lock:
+            if self._stream is not None:
+                if self._pid == os.getpid():
+                    self._stream.close()
+                # else: i.e.: inherited in a forked process (the file belongs to the parent).
+                self._stream = None
+
+
+_session_recorder = None
+_registered_atexit = False
+
+
+def get_session_recorder():
+    '''
+    :return SessionRecorder:
+        The recorder of the current session (or None if the session is not being recorded).
+    '''
+    return _session_recorder
+
+
+def start_session_recorder(directory):
+    '''
+    Starts recording the session in a new file in the given directory (the session being recorded
+    previously, if any, is finished).
+    '''
+    global _session_recorder
+    global _registered_atexit
+    stop_session_recorder()
+    if not _registered_atexit:
+        _registered_atexit = True
+        atexit.register(stop_session_recorder)
+
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    _session_recorder = SessionRecorder(os.path.join(directory, 'pydevd_session_%s.gz' % (os.getpid(),)))
+    return _session_recorder
+
+
+def stop_session_recorder():
+    global _session_recorder
+    recorder = _session_recorder
+    _session_recorder = None
+    if recorder is not None:
+        recorder.close()
+
+
+def read_session(filename):
+    '''
+    :return tuple(dict, list(tuple(str, float, int, int, unicode))):
+        The header and the entries (direction, time, cmd_id, seq, text) of a recorded session.
+    '''
+    chunks = []
+    stream = gzip.open(filename, 'rb')
+    try:
+        while True:
+            try:
+                chunk = stream.read(64 * 1024)
+            except (IOError, EOFError):
+                # i.e.: the process was killed before closing it (use what was flushed).
+                break
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        stream.close()
+    contents = b''.join(chunks)
+    if not contents.endswith(b'\n'):
+        # Discard an incomplete entry.
+        contents = contents[:contents.rfind(b'\n') + 1]
+
+    header = None
+    entries = []
+    for line in contents.decode('utf-8').splitlines():
+        if not line:
+            continue
+        if line.startswith('H\t'):
+            header = json.loads(line[2:])
+            continue
+
+        direction, elapsed, cmd_id, seq, text = line.split('\t', 4)
+        if IS_PY3K:
+            text = unquote(text)
+        else:
+            text = unquote(text.encode('utf-8')).decode('utf-8')
+        entries.append((direction, float(elapsed), int(cmd_id), int(seq), text))
+    return header, entries
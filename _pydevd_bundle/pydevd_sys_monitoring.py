@@ -0,0 +1,288 @@
+'''
+Tracing backend based on sys.monitoring (PEP 669 -- available on Python 3.12 onwards).
+
+Instead of installing a tracing function with sys.settrace (which makes every line of every traced frame
+call into Python code), callbacks are registered for the LINE, PY_START, PY_RETURN, PY_YIELD, PY_RESUME and
+RAISE events and code locations which don't have a breakpoint (and which are not needed for a step) return
+DISABLE, so that the interpreter stops reporting them and they run at (almost) native speed afterwards.
+
+Whenever some location may need to be reported again (i.e.: breakpoints were changed, a thread was
+suspended or started a step) sys.monitoring.restart_events() is called.
+
+When some location actually needs to be handled, the decision on what to do is delegated to the same
+PyDBFrame.trace_dispatch used by the settrace-based tracing, so, breakpoints (PyDB.breakpoints), the
+stepping state (PyDBAdditionalThreadInfo) and the net commands are shared among both backends.
+
+To use it set the environment variable: PYDEVD_USE_SYS_MONITORING=YES
+'''
+import os
+import sys
+import traceback
+
+from _pydev_bundle import pydev_log
+from _pydev_imps._pydev_saved_modules import thread, threading
+from _pydevd_bundle.pydevd_constants import STATE_SUSPEND
+
+IS_SYS_MONITORING_SUPPORTED = hasattr(sys, 'monitoring')
+
+# "NO" means we should not use sys.monitoring, anything else means we should use it (if available).
+USE_SYS_MONITORING = os.environ.get('PYDEVD_USE_SYS_MONITORING', 'NO')
+
+use_sys_monitoring = False
+
+if USE_SYS_MONITORING != 'NO':
+    if IS_SYS_MONITORING_SUPPORTED:
+        use_sys_monitoring = True
+    else:
+        from _pydev_bundle.pydev_monkey import log_error_once
+        log_error_once('warning: PYDEVD_USE_SYS_MONITORING is only available on Python 3.12 onwards (using sys.settrace).')
+
+thread_get_ident = thread.get_ident
+threadingCurrentThread = threading.currentThread
+
+
+#=======================================================================================================================
+# _MonitoringState
+#=======================================================================================================================
+class _MonitoringState:
+    '''This class exists just to keep some variables (so that we don't keep them in the global namespace).
+    '''
+    py_db = None
+    active = False
+
+    # Ids of the threads which must receive the events in every location (i.e.: a step is in progress or a
+    # suspend was requested). While it's not empty no location may be disabled.
+    thread_ids_requiring_events = set()
+
+
+def is_monitoring_active():
+    return _MonitoringState.active
+
+
+def start_monitoring(py_db):
+    '''
+    Registers the debugger callbacks in sys.monitoring.
+
+    :return bool:
+        Whether sys.monitoring is being used to trace (if False, sys.settrace should be used).
+    '''
+    if not IS_SYS_MONITORING_SUPPORTED:
+        return False
+
+    if _MonitoringState.active:
+        _MonitoringState.py_db = py_db
+        return True
+
+    monitoring = sys.monitoring
+    tool_id = monitoring.DEBUGGER_ID
+    try:
+        monitoring.use_tool_id(tool_id, 'pydevd')
+    except ValueError:
+        pydev_log.error('Unable to use sys.monitoring (tool id already in use by: %s). Using sys.settrace.' % (
+            monitoring.get_tool(tool_id),))
+        return False
+
+    events = monitoring.events
+    monitoring.register_callback(tool_id, events.LINE, _on_line)
+    monitoring.register_callback(tool_id, events.PY_START, _on_py_start)
+    monitoring.register_callback(tool_id, events.PY_RESUME, _on_py_start)
+    monitoring.register_callback(tool_id, events.PY_RETURN, _on_py_return)
+    monitoring.register_callback(tool_id, events.PY_YIELD, _on_py_return)
+    monitoring.register_callback(tool_id, events.RAISE, _on_raise)
+    monitoring.set_events(
+        tool_id,
+        events.LINE | events.PY_START | events.PY_RESUME | events.PY_RETURN | events.PY_YIELD | events.RAISE
+    )
+    # Locations disabled in a previous session must be reported again.
+    monitoring.restart_events()
+
+    _MonitoringState.py_db = py_db
+    _MonitoringState.active = True
+    pydevd_tracing.TracingFunctionHolder._use_sys_monitoring = True
+    return True
+
+
+def stop_monitoring():
+    if not _MonitoringState.active:
+        return
+
+    _MonitoringState.active = False
+    _MonitoringState.py_db = None
+    pydevd_tracing.TracingFunctionHolder._use_sys_monitoring = False
+    _MonitoringState.thread_ids_requiring_events.clear()
+
+    monitoring = sys.monitoring
+    tool_id = monitoring.DEBUGGER_ID
+    monitoring.set_events(tool_id, monitoring.events.NO_EVENTS)
+    for event in (
+            monitoring.events.LINE,
+            monitoring.events.PY_START,
+            monitoring.events.PY_RESUME,
+            monitoring.events.PY_RETURN,
+            monitoring.events.PY_YIELD,
+            monitoring.events.RAISE):
+        monitoring.register_callback(tool_id, event, None)
+    monitoring.free_tool_id(tool_id)
+
+
+def restart_events():
+    '''
+    Should be called whenever a location which was previously disabled may need to be reported again
+    (i.e.: breakpoints were added).
+    '''
+    if _MonitoringState.active:
+        sys.monitoring.restart_events()
+
+
+def update_thread_events(thread, info):
+    '''
+    Should be called when the stepping/suspend state of the given thread changes (i.e.: when a thread is resumed
+    with a step command or when a suspend is requested), so that the thread receives the events it needs.
+    '''
+    if not _MonitoringState.active:
+        return
+
+    thread_id = thread.ident
+    if info.pydev_step_cmd != -1 or info.pydev_state == STATE_SUSPEND:
+        _MonitoringState.thread_ids_requiring_events.add(thread_id)
+        sys.monitoring.restart_events()
+    else:
+        _MonitoringState.thread_ids_requiring_events.discard(thread_id)
+
+
+def _get_disable():
+    return sys.monitoring.DISABLE
+
+
+def _can_disable_location(py_db, code, line):
+    '''
+    :return bool:
+        True if the given location doesn't have to be reported anymore (until the next restart_events()).
+    '''
+    if _MonitoringState.thread_ids_requiring_events:
+        return False
+
+    if py_db.has_plugin_line_breaks or py_db.signature_factory is not None:
+        return False
+
+    try:
+        # Make fast path faster!
+        abs_path_real_path_and_base = NORM_PATHS_AND_BASE_CONTAINER[code.co_filename]
+    except:
+        abs_path_real_path_and_base = get_abs_path_real_path_and_base_from_file(code.co_filename)
+
+    breakpoints_for_file = py_db.breakpoints.get(abs_path_real_path_and_base[1])
+    if not breakpoints_for_file:
+        return True
+
+    if line is None:
+        # Function-level events: they're only needed when stepping.
+        return True
+
+    return line not in breakpoints_for_file
+
+
+def _dispatch(frame, event, arg):
+    '''
+    Delegates the handling of the event to PyDBFrame.trace_dispatch (the same handling which is done
+    when sys.settrace is used).
+
+    :return bool:
+        True if the location could be disabled.
+    '''
+    py_db = _MonitoringState.py_db
+    if py_db is None or py_db._finish_debugging_session:
+        return False
+
+    t = threadingCurrentThread()
+    if getattr(t, 'is_pydev_daemon_thread', False) or getattr(t, 'pydev_do_not_trace', False):
+        return False
+
+    additional_info = set_additional_thread_info(t)
+    if additional_info.is_tracing:
+        return False  # we don't wan't to trace code invoked from pydevd_frame.trace_dispatch
+
+    code = frame.f_code
+    frame_cache_key = (code.co_firstlineno, code.co_name, code.co_filename)
+    verdict, filename = get_trace_verdict(py_db, frame, frame_cache_key)
+    if verdict & TRACE_VERDICT_SKIP:
+        return True
+
+    if additional_info.pydev_step_cmd != -1 and verdict & TRACE_VERDICT_SKIP_WHEN_STEPPING:
+        # ignore files matching stepping filters (or library files while stepping)
+        return False
+
+    PyDBFrame(
+        (
+            py_db, filename, additional_info, t, global_cache_frame_skips, frame_cache_key,
+        )
+    ).trace_dispatch(frame, event, arg)
+
+    # Update the events needed for this thread (the state may've been changed by a suspend).
+    if additional_info.pydev_step_cmd == -1 and additional_info.pydev_state != STATE_SUSPEND:
+        _MonitoringState.thread_ids_requiring_events.discard(t.ident)
+    return False
+
+
+def _handle_event(code, line, event, arg):
+    py_db = _MonitoringState.py_db
+    if py_db is None:
+        return _get_disable()
+
+    try:
+        if thread_get_ident() not in _MonitoringState.thread_ids_requiring_events:
+            if _can_disable_location(py_db, code, line):
+                return _get_disable()
+
+            if _MonitoringState.thread_ids_requiring_events and line is None:
+                # Some other thread is stepping (so, we can't disable it), but there's nothing
+                # to do for function-level events in this one.
+                return None
+
+        # Note: the frame of the code which generated the event is the one right before the callback.
+        if _dispatch(sys._getframe(2), event, arg):
+            if not _MonitoringState.thread_ids_requiring_events:
+                return _get_disable()
+    except SystemExit:
+        pass
+    except Exception:
+        traceback.print_exc()
+    return None
+
+
+def _on_line(code, line):
+    return _handle_event(code, line, 'line', None)
+
+
+def _on_py_start(code, instruction_offset):
+    return _handle_event(code, None, 'call', None)
+
+
+def _on_py_return(code, instruction_offset, retval):
+    return _handle_event(code, None, 'return', retval)
+
+
+def _on_raise(code, instruction_offset, exception):
+    # Note: RAISE can't be disabled.
+    py_db = _MonitoringState.py_db
+    if py_db is None:
+        return None
+
+    if not py_db.break_on_caught_exceptions and not py_db.has_plugin_exception_breaks:
+        return None
+
+    try:
+        _dispatch(sys._getframe(1), 'exception', (type(exception), exception, exception.__traceback__))
+    except SystemExit:
+        pass
+    except Exception:
+        traceback.print_exc()
+    return None
+
+
+# Note: imported at the end so that the settings above are available without importing the tracing machinery.
+from _pydevd_bundle.pydevd_additional_thread_info import set_additional_thread_info
+from _pydevd_bundle.pydevd_frame import PyDBFrame, get_trace_verdict, TRACE_VERDICT_SKIP, TRACE_VERDICT_SKIP_WHEN_STEPPING
+from _pydevd_bundle.pydevd_trace_dispatch import global_cache_frame_skips
+from pydevd_file_utils import get_abs_path_real_path_and_base_from_file, NORM_PATHS_AND_BASE_CONTAINER
+import pydevd_tracing
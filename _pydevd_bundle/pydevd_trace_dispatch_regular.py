@@ -3,9 +3,7 @@ import traceback
 from _pydev_bundle.pydev_is_thread_alive import is_thread_alive
 from _pydev_imps._pydev_saved_modules import threading
 from _pydevd_bundle.pydevd_constants import get_thread_id, IS_IRONPYTHON
-from _pydevd_bundle.pydevd_dont_trace_files import DONT_TRACE
 from _pydevd_bundle.pydevd_kill_all_pydevd_threads import kill_all_pydev_threads
-from pydevd_file_utils import get_abs_path_real_path_and_base_from_frame, NORM_PATHS_AND_BASE_CONTAINER
 from pydevd_tracing import SetTrace
 # IFDEF CYTHON
 # # In Cython, set_additional_thread_info is bundled in the file.
@@ -13,12 +11,11 @@ from pydevd_tracing import SetTrace
 # from cpython.ref cimport Py_INCREF, Py_XDECREF
 # ELSE
 from _pydevd_bundle.pydevd_additional_thread_info import set_additional_thread_info
-from _pydevd_bundle.pydevd_frame import PyDBFrame
+from _pydevd_bundle.pydevd_frame import PyDBFrame, get_trace_verdict
 # ENDIF
 from os.path import basename, splitext
 
 threadingCurrentThread = threading.currentThread
-get_file_type = DONT_TRACE.get
 
 # IFDEF CYTHON -- DONT EDIT THIS FILE (it is automatically generated)
 # cdef dict global_cache_skips
@@ -231,12 +228,11 @@ class ThreadTracer:
         '''
         # IFDEF CYTHON
         # cdef str filename;
-        # cdef str base;
+        # cdef int verdict;
         # cdef int pydev_step_cmd;
         # cdef tuple frame_cache_key;
         # cdef dict cache_skips;
         # cdef bint is_stepping;
-        # cdef tuple abs_path_real_path_and_base;
         # cdef PyDBAdditionalThreadInfo additional_info;
         # ENDIF
         # print('ENTER: trace_dispatch', frame.f_code.co_filename, frame.f_lineno, event, frame.f_code.co_name)
@@ -275,33 +271,17 @@ class ThreadTracer:
                 # print('skipped: trace_dispatch (cache hit)', frame_cache_key, frame.f_lineno, event, frame.f_code.co_name)
                 return None
 
-            try:
-                # Make fast path faster!
-                abs_path_real_path_and_base = NORM_PATHS_AND_BASE_CONTAINER[frame.f_code.co_filename]
-            except:
-                abs_path_real_path_and_base = get_abs_path_real_path_and_base_from_frame(frame)
-                
-            filename = abs_path_real_path_and_base[1]
-            file_type = get_file_type(abs_path_real_path_and_base[-1]) #we don't want to debug threading or anything related to pydevd
+            # A single lookup answers whether it's a pydevd file, in the project scope or ignored by filters.
+            verdict, filename = get_trace_verdict(py_db, frame, frame_cache_key)
 
-            if file_type is not None:
-                if file_type == 1: # inlining LIB_FILE = 1
-                    if not py_db.in_project_scope(filename):
-                        # print('skipped: trace_dispatch (not in scope)', abs_path_real_path_and_base[-1], frame.f_lineno, event, frame.f_code.co_name, file_type)
-                        cache_skips[frame_cache_key] = 1
-                        return None
-                else:
-                    # print('skipped: trace_dispatch', abs_path_real_path_and_base[-1], frame.f_lineno, event, frame.f_code.co_name, file_type)
-                    cache_skips[frame_cache_key] = 1
-                    return None
+            if verdict & 1:  # TRACE_VERDICT_SKIP = 1
+                # print('skipped: trace_dispatch', filename, frame.f_lineno, event, frame.f_code.co_name, verdict)
+                cache_skips[frame_cache_key] = 1
+                return None
 
-            if is_stepping:
-                if py_db.is_filter_enabled and py_db.is_ignored_by_filters(filename):
-                    # ignore files matching stepping filters
-                    return None
-                if py_db.is_filter_libraries and not py_db.in_project_scope(filename):
-                    # ignore library files while stepping
-                    return None
+            if is_stepping and verdict & 2:  # TRACE_VERDICT_SKIP_WHEN_STEPPING = 2
+                # ignore files matching stepping filters (or library files while stepping)
+                return None
 
             # print('trace_dispatch', base, frame.f_lineno, event, frame.f_code.co_name, file_type)
             if additional_info.is_tracing:
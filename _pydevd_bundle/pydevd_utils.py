@@ -31,7 +31,11 @@ def save_main_module(file, module_name):
     with warnings.catch_warnings():
         warnings.simplefilter("ignore", category=DeprecationWarning)
         warnings.simplefilter("ignore", category=PendingDeprecationWarning)
-        from imp import new_module
+        try:
+            from imp import new_module
+        except ImportError:
+            # The imp module is not available on Python 3.12 onwards.
+            from types import ModuleType as new_module
 
     m = new_module('__main__')
     sys.modules['__main__'] = m
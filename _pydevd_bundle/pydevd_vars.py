@@ -82,6 +82,102 @@ def get_additional_frames_by_id(thread_id):
     return AdditionalFramesContainer.additional_frames.get(thread_id)
 
 
+# ===============================================================================
+# SuspendedFramesContainer
+# ===============================================================================
+class SuspendedFramesContainer:
+    frames_by_id = {}  # thread_id -> dict(frame_id -> frame) with the stack of the suspended thread
+
+
+def add_suspended_frames(thread_id, frame):
+    '''
+    Indexes the stack of a thread which is suspended (so that find_frame doesn't have to walk the stack
+    for each command received while the thread is suspended).
+    '''
+    frames_by_id = {}
+    while frame is not None:
+        frames_by_id[id(frame)] = frame
+        frame = frame.f_back
+    SuspendedFramesContainer.frames_by_id[thread_id] = frames_by_id
+
+
+def remove_suspended_frames(thread_id):
+    SuspendedFramesContainer.frames_by_id.pop(thread_id, None)
+
+
+# ===============================================================================
+# VariableHandles
+# ===============================================================================
+class VariableHandles(object):
+    '''
+    Integer handles to the objects shown to the IDE while a thread is suspended (so that the children of an
+    object can be found with a single lookup instead of resolving the whole path of attributes again).
+
+    The handles (and the references to the objects) are valid only until the thread is resumed.
+    '''
+
+    def __init__(self):
+        self._handle_to_obj = {}
+        self._id_to_handle = {}
+
+    def add(self, obj):
+        # Note: while the handle is alive the object is also alive, so, its id may be used to give the same
+        # handle to an object which is shown more than once.
+        obj_id = id(obj)
+        handle = self._id_to_handle.get(obj_id)
+        if handle is None:
+            handle = _next_variable_handle()
+            self._id_to_handle[obj_id] = handle
+            self._handle_to_obj[handle] = obj
+        return handle
+
+    def get(self, handle):
+        '''
+        :raise VariableError: if there's no object with the given handle (i.e.: the thread was resumed).
+        '''
+        try:
+            return self._handle_to_obj[handle]
+        except KeyError:
+            raise VariableError('Variable handle not found: %s (the thread was resumed?)' % (handle,))
+
+    def __len__(self):
+        return len(self._handle_to_obj)
+
+
+class VariableHandlesContainer:
+    lock = thread.allocate_lock()
+    variable_handles = {}  # thread_id -> VariableHandles
+    last_handle = 0
+
+
+def _next_variable_handle():
+    # The handles are unique among all the threads/suspensions so that a stale handle is never reused.
+    with VariableHandlesContainer.lock:
+        VariableHandlesContainer.last_handle += 1
+        return VariableHandlesContainer.last_handle
+
+
+def get_variable_handles(thread_id):
+    '''
+    :return VariableHandles:
+        The handles of the given thread (created if needed).
+    '''
+    variable_handles = VariableHandlesContainer.variable_handles.get(thread_id)
+    if variable_handles is None:
+        with VariableHandlesContainer.lock:
+            variable_handles = VariableHandlesContainer.variable_handles.get(thread_id)
+            if variable_handles is None:
+                variable_handles = VariableHandlesContainer.variable_handles[thread_id] = VariableHandles()
+    return variable_handles
+
+
+def remove_variable_handles(thread_id):
+    '''
+    Releases the handles of the given thread (called when the thread is resumed).
+    '''
+    VariableHandlesContainer.variable_handles.pop(thread_id, None)
+
+
 def find_frame(thread_id, frame_id):
     """ returns a frame on the thread that has a given frame_id """
     try:
@@ -103,6 +199,12 @@ def find_frame(thread_id, frame_id):
                 if frame is not None:
                     return frame
 
+        frames_by_id = SuspendedFramesContainer.frames_by_id.get(thread_id)
+        if frames_by_id is not None:
+            frame = frames_by_id.get(lookingFor)
+            if frame is not None:
+                return frame
+
         curFrame = get_frame()
         if frame_id == "*":
             return curFrame  # any frame is specified with "*"
@@ -162,16 +264,27 @@ def getVariable(thread_id, frame_id, scope, attrs):
     """
     returns the value of a variable
 
-    :scope: can be BY_ID, EXPRESSION, GLOBAL, LOCAL, FRAME
+    :scope: can be BY_ID, BY_HANDLE, EXPRESSION, GLOBAL, LOCAL, FRAME
 
     BY_ID means we'll traverse the list of all objects alive to get the object.
 
+    BY_HANDLE means we'll get the object from the handles given to the variables of the (suspended) thread
+    (see: VariableHandles).
+
     :attrs: after reaching the proper scope, we have to get the attributes until we find
             the proper location (i.e.: obj\tattr1\tattr2)
 
     :note: when BY_ID is used, the frame_id is considered the id of the object to find and
-           not the frame (as we don't care about the frame in this case).
+           not the frame (as we don't care about the frame in this case). Likewise, when BY_HANDLE is used,
+           the frame_id is considered the handle of the object.
     """
+    if scope == 'BY_HANDLE':
+        if thread_id != get_thread_id(threading.currentThread()):
+            raise VariableError("getVariable: must execute on same thread")
+
+        var = get_variable_handles(thread_id).get(int(frame_id))
+        return resolve_var_object(var, attrs)
+
     if scope == 'BY_ID':
         if thread_id != get_thread_id(threading.currentThread()):
             raise VariableError("getVariable: must execute on same thread")
@@ -240,7 +353,7 @@ def resolve_compound_variable_fields(thread_id, frame_id, scope, attrs):
 
     :param thread_id: id of the variable's thread
     :param frame_id: id of the variable's frame
-    :param scope: can be BY_ID, EXPRESSION, GLOBAL, LOCAL, FRAME
+    :param scope: can be BY_ID, BY_HANDLE, EXPRESSION, GLOBAL, LOCAL, FRAME
     :param attrs: after reaching the proper scope, we have to get the attributes until we find
             the proper location (i.e.: obj\tattr1\tattr2)
     :return: a dictionary of variables's fields
@@ -257,6 +370,30 @@ def resolve_compound_variable_fields(thread_id, frame_id, scope, attrs):
         traceback.print_exc()
 
 
+def resolve_compound_variable_fields_page(thread_id, frame_id, scope, attrs, start, count):
+    """
+    Resolve a page of the fields of a compound variable in debugger scopes by its name and attributes
+
+    :param start: index of the first field to be returned
+    :param count: maximum number of fields to be returned
+    :return: the type name, a dictionary with the variable's fields in the page and the total number of
+            fields (None if the resolver can't page through the fields, in which case all of them are returned)
+    """
+    var = getVariable(thread_id, frame_id, scope, attrs)
+
+    try:
+        _type, _typeName, resolver = get_type(var)
+        get_dictionary_page = getattr(resolver, 'get_dictionary_page', None)
+        if get_dictionary_page is None:
+            return _typeName, resolver.get_dictionary(var), None
+        return _typeName, get_dictionary_page(var, start, count), len(var)
+    except:
+        sys.stderr.write('Error evaluating: thread_id: %s\nframe_id: %s\nscope: %s\nattrs: %s\n' % (
+            thread_id, frame_id, scope, attrs,))
+        traceback.print_exc()
+        return None, None, None
+
+
 def resolve_var_object(var, attrs):
     """
     Resolve variable's attribute
@@ -8,6 +8,7 @@ from _pydevd_bundle.pydevd_constants import dict_iter_items, dict_keys, IS_PY3K,
     DEFAULT_VALUE
 from _pydev_bundle.pydev_imports import quote
 from _pydevd_bundle.pydevd_extension_api import TypeResolveProvider, StrPresentationProvider
+from _pydevd_bundle.pydevd_safe_repr import safe_repr
 
 try:
     import types
@@ -116,6 +117,7 @@ class TypeResolveHandler(object):
         # the default resolvers that are already available if they want.
         self._type_to_resolver_cache = {}
         self._type_to_str_provider_cache = {}
+        self._type_to_presentation_cache = {}
         self._initialized = False
 
     def _initialize(self):
@@ -141,8 +143,9 @@ class TypeResolveHandler(object):
         return self._get_type(o, type_object, type_name)
 
     def _get_type(self, o, type_object, type_name):
-        resolver = self._type_to_resolver_cache.get(type_object)
-        if resolver is not None:
+        # Note: None is a valid resolver (for types which aren't containers), so, it's also cached.
+        resolver = self._type_to_resolver_cache.get(type_object, self.NO_PROVIDER)
+        if resolver is not self.NO_PROVIDER:
             return type_object, type_name, resolver
 
         if not self._initialized:
@@ -201,6 +204,47 @@ class TypeResolveHandler(object):
         self._type_to_str_provider_cache[type_object] = self.NO_PROVIDER
         return None
 
+    def get_type_presentation(self, type_object, type_name):
+        '''
+        :return tuple(str, str, str):
+            The type name (escaped for xml), the qualifier attribute (escaped for xml or '' if the type has no
+            module) and the class name shown as the prefix of the value of the variables of the given type.
+
+        :note: cached per type (so that the string manipulation isn't redone for each variable).
+        '''
+        presentation = self._type_to_presentation_cache.get(type_object)
+        if presentation is not None:
+            return presentation
+
+        type_qualifier = getattr(type_object, "__module__", "")
+        if type_qualifier:
+            xml_qualifier = 'qualifier="%s"' % make_valid_xml_value(type_qualifier)
+        else:
+            xml_qualifier = ''
+
+        presentation = (make_valid_xml_value(type_name), xml_qualifier, _get_class_name(type_object))
+        self._type_to_presentation_cache[type_object] = presentation
+        return presentation
+
+
+def _get_class_name(type_object):
+    if type_object in (list, tuple):
+        return str(type_object)
+
+    try:
+        cName = str(type_object)
+        if cName.find('.') != -1:
+            cName = cName.split('.')[-1]
+
+        elif cName.find("'") != -1:  # does not have '.' (could be something like <type 'int'>)
+            cName = cName[cName.index("'") + 1:]
+
+        if cName.endswith("'>"):
+            cName = cName[:-2]
+    except:
+        cName = str(type_object)
+    return cName
+
 
 _TYPE_RESOLVE_HANDLER = TypeResolveHandler()
 
@@ -218,6 +262,8 @@ get_type = _TYPE_RESOLVE_HANDLER.get_type
 
 _str_from_providers = _TYPE_RESOLVE_HANDLER.str_from_providers
 
+_get_type_presentation = _TYPE_RESOLVE_HANDLER.get_type_presentation
+
 
 def is_builtin(x):
     return getattr(x, '__module__', None) == BUILTINS_MODULE_NAME
@@ -234,9 +280,11 @@ def return_values_from_dict_to_xml(return_dict):
     return res
 
 
-def frame_vars_to_xml(frame_f_locals, hidden_ns=None):
+def frame_vars_to_xml(frame_f_locals, hidden_ns=None, variable_handles=None):
     """ dumps frame variables to XML
     <var name="var_name" scope="local" type="type" value="value"/>
+
+    :param variable_handles: see: var_to_xml
     """
     xml = ""
 
@@ -255,14 +303,15 @@ def frame_vars_to_xml(frame_f_locals, hidden_ns=None):
 
             if k == RETURN_VALUES_DICT:
                 for name, val in dict_iter_items(v):
-                    return_values_xml += var_to_xml(val, name, additional_in_xml=' isRetVal="True"')
+                    return_values_xml += var_to_xml(val, name, additional_in_xml=' isRetVal="True"',
+                                                    variable_handles=variable_handles)
 
             else:
                 if hidden_ns is not None and k in hidden_ns:
                     xml += var_to_xml(v, str(k), additional_in_xml=' isIPythonHidden="True"',
-                                      evaluate_full_value=eval_full_val)
+                                      evaluate_full_value=eval_full_val, variable_handles=variable_handles)
                 else:
-                    xml += var_to_xml(v, str(k), evaluate_full_value=eval_full_val)
+                    xml += var_to_xml(v, str(k), evaluate_full_value=eval_full_val, variable_handles=variable_handles)
         except Exception:
             traceback.print_exc()
             pydev_log.error("Unexpected error, recovered safely.\n")
@@ -271,8 +320,20 @@ def frame_vars_to_xml(frame_f_locals, hidden_ns=None):
     return return_values_xml + xml
 
 
-def var_to_xml(val, name, doTrim=True, additional_in_xml='', evaluate_full_value=True):
-    """ single variable or dictionary to xml representation """
+def _value_with_prefix(prefix, v, max_size):
+    prefix = '%s: ' % (prefix,)
+    if max_size is not None:
+        max_size = max(1, max_size - len(prefix))
+    return prefix + safe_repr(v, max_size, as_str=True)[0]
+
+
+def var_to_xml(val, name, doTrim=True, additional_in_xml='', evaluate_full_value=True, variable_handles=None):
+    """ single variable or dictionary to xml representation
+
+    :param variable_handles:
+        If given, the VariableHandles used to give a handle to containers (so that the IDE can ask for their
+        children without resolving the whole path again).
+    """
 
     try:
         # This should be faster than isinstance (but we have to protect against not having a '__class__' attribute).
@@ -286,10 +347,13 @@ def var_to_xml(val, name, doTrim=True, additional_in_xml='', evaluate_full_value
         v = val
 
     _type, typeName, resolver = get_type(v)
-    type_qualifier = getattr(_type, "__module__", "")
+    xml_type_name, xml_qualifier, class_name = _get_type_presentation(_type, typeName)
     if not evaluate_full_value:
         value = DEFAULT_VALUE
     else:
+        # Note: the representation is computed with one char more than the maximum so that it's still trimmed
+        # (with '...' added) below if it doesn't fit.
+        max_size = MAXIMUM_VARIABLE_REPRESENTATION_SIZE + 1 if doTrim else None
         try:
             str_from_provider = _str_from_providers(v, _type, typeName)
             if str_from_provider is not None:
@@ -297,32 +361,13 @@ def var_to_xml(val, name, doTrim=True, additional_in_xml='', evaluate_full_value
             elif hasattr(v, '__class__'):
                 if v.__class__ == frame_type:
                     value = pydevd_resolver.frameResolver.get_frame_name(v)
-
-                elif v.__class__ in (list, tuple):
-                    if len(v) > 300:
-                        value = '%s: %s' % (str(v.__class__), '<Too big to print. Len: %s>' % (len(v),))
-                    else:
-                        value = '%s: %s' % (str(v.__class__), v)
                 else:
-                    try:
-                        cName = str(v.__class__)
-                        if cName.find('.') != -1:
-                            cName = cName.split('.')[-1]
-
-                        elif cName.find("'") != -1:  # does not have '.' (could be something like <type 'int'>)
-                            cName = cName[cName.index("'") + 1:]
-
-                        if cName.endswith("'>"):
-                            cName = cName[:-2]
-                    except:
-                        cName = str(v.__class__)
-
-                    value = '%s: %s' % (cName, v)
+                    value = _value_with_prefix(class_name, v, max_size)
             else:
                 value = str(v)
         except:
             try:
-                value = repr(v)
+                value = safe_repr(v, max_size)[0]
             except:
                 value = 'Unable to get repr for %s' % v.__class__
 
@@ -331,12 +376,7 @@ def var_to_xml(val, name, doTrim=True, additional_in_xml='', evaluate_full_value
     except:
         pass
 
-    xml = '<var name="%s" type="%s" ' % (make_valid_xml_value(name), make_valid_xml_value(typeName))
-
-    if type_qualifier:
-        xml_qualifier = 'qualifier="%s"' % make_valid_xml_value(type_qualifier)
-    else:
-        xml_qualifier = ''
+    xml = '<var name="%s" type="%s" ' % (make_valid_xml_value(name), xml_type_name)
 
     if value:
         # cannot be too big... communication may not handle it.
@@ -363,7 +403,10 @@ def var_to_xml(val, name, doTrim=True, additional_in_xml='', evaluate_full_value
         xml_container = ' isErrorOnEval="True"'
     else:
         if resolver is not None:
-            xml_container = ' isContainer="True"'
+            if variable_handles is not None:
+                xml_container = ' isContainer="True" handle="%s"' % (variable_handles.add(v),)
+            else:
+                xml_container = ' isContainer="True"'
         else:
             xml_container = ''
 
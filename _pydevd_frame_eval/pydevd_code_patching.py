@@ -0,0 +1,354 @@
+'''
+Breakpoints by code patching: an alternative to the frame evaluation for when the Cython evaluator is not
+available.
+
+Instead of changing the code of each frame when it's evaluated, the code of the functions in files with
+breakpoints is replaced (function.__code__) by code where a call to the breakpoint hook (_pydev_stop_at_break)
+is inserted at the start of each line with a breakpoint (through pydevd_modify_bytecode). So, no tracing function
+is needed until a breakpoint is actually hit (the tracing is only enabled for stepping).
+
+- When breakpoints change, the functions of the affected files are found with the gc and patched (or restored
+  to their original code if the file has no breakpoints anymore).
+
+- Modules imported afterwards have their code patched before being executed (through an import hook). The code of
+  nested functions and classes is patched too (so, functions created later on also have the breakpoints).
+
+- The script being debugged isn't imported, so, it's executed with execfile() from this module.
+
+Note: frames which are already running when a breakpoint is added are not affected (only new calls are).
+
+The bytecode rewriting is only available for CPython 3.6 and 3.7.
+
+To use it set the environment variable: PYDEVD_USE_CODE_PATCHING=YES
+'''
+import gc
+import platform
+import sys
+from types import CodeType, FunctionType
+
+from _pydev_bundle import pydev_log
+from _pydev_imps._pydev_saved_modules import threading
+from _pydevd_bundle.pydevd_constants import dict_iter_items
+
+try:
+    import builtins
+except ImportError:
+    import __builtin__ as builtins  # Python 2
+
+IS_CODE_PATCHING_SUPPORTED = platform.python_implementation() == 'CPython' and (3, 6) <= sys.version_info[:2] < (3, 8)
+
+# The tracing function is only needed while stepping.
+dummy_trace_dispatch = None
+
+
+#=======================================================================================================================
+# _CodePatchingState
+#=======================================================================================================================
+class _CodePatchingState:
+    '''This class exists just to keep some variables (so that we don't keep them in the global namespace).
+    '''
+    active = False
+
+    lock = threading.RLock()
+
+    # Canonical filename -> frozenset(lines) with the breakpoints currently applied.
+    file_to_lines = {}
+
+    # Patched code -> original code (used to restore the original code of functions).
+    patched_code_to_original = {}
+
+    # (original code, frozenset(lines)) -> patched code (valid only while the breakpoints don't change).
+    patched_code_cache = {}
+
+    # co_filename -> canonical filename
+    co_filename_to_filename = {}
+
+
+def is_code_patching_active():
+    return _CodePatchingState.active
+
+
+def _get_filename(co_filename):
+    try:
+        return _CodePatchingState.co_filename_to_filename[co_filename]
+    except KeyError:
+        filename = _CodePatchingState.co_filename_to_filename[co_filename] = \
+            get_abs_path_real_path_and_base_from_file(co_filename)[1]
+        return filename
+
+
+def _replace_consts(code, consts):
+    return CodeType(
+        code.co_argcount,  # integer
+        code.co_kwonlyargcount,  # integer
+        code.co_nlocals,  # integer
+        code.co_stacksize,  # integer
+        code.co_flags,  # integer
+        code.co_code,  # bytes
+        consts,  # tuple
+        code.co_names,  # tuple
+        code.co_varnames,  # tuple
+        code.co_filename,  # string
+        code.co_name,  # string
+        code.co_firstlineno,  # integer
+        code.co_lnotab,  # bytes
+        code.co_freevars,  # tuple
+        code.co_cellvars  # tuple
+    )
+
+
+def patch_code(code, lines):
+    '''
+    :param code: the original code.
+    :param frozenset lines: the lines with breakpoints.
+
+    :return: the code with the breakpoint hook inserted at the start of the given lines (in the code itself or in
+    the code of nested functions and classes). If none of the lines is in the code, the code itself is returned.
+    '''
+    key = (code, lines)
+    try:
+        return _CodePatchingState.patched_code_cache[key]
+    except KeyError:
+        pass
+
+    new_consts = []
+    changed = False
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            new_const = patch_code(const, lines)
+            if new_const is not const:
+                changed = True
+            const = new_const
+        new_consts.append(const)
+
+    new_code = code
+    if changed:
+        new_code = _replace_consts(code, tuple(new_consts))
+
+    success, patched_code = insert_code_at_lines(new_code, pydev_trace_code_wrapper.__code__, lines)
+    if success:
+        new_code = patched_code
+
+    if new_code is not code:
+        _CodePatchingState.patched_code_to_original[new_code] = code
+    _CodePatchingState.patched_code_cache[key] = new_code
+    return new_code
+
+
+def _get_original_code(code):
+    return _CodePatchingState.patched_code_to_original.get(code, code)
+
+
+def _update_functions(changed_files):
+    '''
+    Patches (or restores) the code of the functions in the given files according to the current breakpoints.
+    '''
+    file_to_lines = _CodePatchingState.file_to_lines
+    for obj in gc.get_objects():
+        if type(obj) is not FunctionType:
+            continue
+
+        current_code = obj.__code__
+        filename = _get_filename(current_code.co_filename)
+        if filename not in changed_files:
+            continue
+
+        original_code = _get_original_code(current_code)
+        lines = file_to_lines.get(filename)
+        if lines:
+            new_code = patch_code(original_code, lines)
+        else:
+            new_code = original_code
+
+        if new_code is not current_code:
+            try:
+                obj.__code__ = new_code
+            except ValueError:
+                # i.e.: the number of free vars changed (shouldn't really happen).
+                pydev_log.debug('Unable to change the code of: %s' % (obj,))
+
+
+def update_breakpoints(py_db):
+    '''
+    Applies the breakpoints currently in py_db.breakpoints (only the files whose lines changed are updated).
+    '''
+    if not _CodePatchingState.active:
+        return
+
+    with _CodePatchingState.lock:
+        file_to_lines = {}
+        for filename, breakpoints in list(dict_iter_items(py_db.breakpoints)):
+            if breakpoints:
+                file_to_lines[filename] = frozenset(breakpoints)
+
+        old_file_to_lines = _CodePatchingState.file_to_lines
+        changed_files = set()
+        for filename in set(file_to_lines).union(old_file_to_lines):
+            if file_to_lines.get(filename) != old_file_to_lines.get(filename):
+                changed_files.add(filename)
+
+        if not changed_files:
+            return
+
+        _CodePatchingState.file_to_lines = file_to_lines
+        _CodePatchingState.patched_code_cache.clear()
+        _update_functions(changed_files)
+
+
+def patch_code_for_breakpoints(code):
+    '''
+    :return: the given (module) code with the breakpoints of its file inserted.
+    '''
+    if not _CodePatchingState.active:
+        return code
+
+    with _CodePatchingState.lock:
+        lines = _CodePatchingState.file_to_lines.get(_get_filename(code.co_filename))
+        if not lines:
+            return code
+        return patch_code(code, lines)
+
+
+def execfile(file, glob=None, loc=None):
+    '''
+    Same as _pydev_execfile.execfile, but the breakpoints are inserted in the code before it's executed.
+    '''
+    if glob is None:
+        glob = sys._getframe().f_back.f_globals
+    if loc is None:
+        loc = glob
+
+    import tokenize
+    stream = tokenize.open(file)
+    try:
+        contents = stream.read()
+    finally:
+        stream.close()
+
+    # note: it's important to compile first to have the filename set in debug mode
+    exec(patch_code_for_breakpoints(compile(contents + "\n", file, 'exec')), glob, loc)
+
+
+#=======================================================================================================================
+# _CodePatchingLoader
+#=======================================================================================================================
+class _CodePatchingLoader(object):
+    '''
+    Wraps the loader of a module so that the code returned by get_code() (which is also the code executed by
+    exec_module()) has the breakpoints inserted.
+    '''
+
+    def __init__(self, loader):
+        self._loader = loader
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def get_code(self, fullname):
+        code = self._loader.get_code(fullname)
+        if code is not None:
+            code = patch_code_for_breakpoints(code)
+        return code
+
+    def exec_module(self, module):
+        code = self.get_code(module.__name__)
+        if code is None:
+            raise ImportError('cannot load module %r when get_code() returns None' % (module.__name__,))
+        exec(code, module.__dict__)
+
+
+#=======================================================================================================================
+# _CodePatchingFinder
+#=======================================================================================================================
+class _CodePatchingFinder(object):
+    '''
+    Import hook which provides the same spec as the other finders, but with a loader which inserts the breakpoints
+    in the code of the modules whose file has breakpoints.
+    '''
+
+    def find_spec(self, fullname, path, target=None):
+        if not _CodePatchingState.file_to_lines:
+            return None
+
+        for finder in sys.meta_path:
+            if finder is self:
+                continue
+            find_spec = getattr(finder, 'find_spec', None)
+            if find_spec is None:
+                continue
+            spec = find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+
+        loader = spec.loader
+        if spec.origin is None or not hasattr(loader, 'get_code') or not hasattr(loader, 'exec_module'):
+            return spec
+
+        if _get_filename(spec.origin) in _CodePatchingState.file_to_lines:
+            spec.loader = _CodePatchingLoader(loader)
+        return spec
+
+
+_code_patching_finder = _CodePatchingFinder()
+
+
+def frame_eval_func():
+    '''
+    Starts using code patching for the breakpoints (same API as the frame evaluation).
+    '''
+    if _CodePatchingState.active:
+        return
+
+    with _CodePatchingState.lock:
+        _CodePatchingState.active = True
+        builtins._pydev_stop_at_break = _pydev_stop_at_break
+        if _code_patching_finder not in sys.meta_path:
+            sys.meta_path.insert(0, _code_patching_finder)
+        dummy_tracing_holder.set_trace_func(dummy_trace_dispatch)
+
+    py_db = get_global_debugger()
+    if py_db is not None:
+        update_breakpoints(py_db)
+
+
+def stop_frame_eval():
+    '''
+    Stops using code patching (the original code of the functions is restored).
+    '''
+    if not _CodePatchingState.active:
+        return
+
+    with _CodePatchingState.lock:
+        changed_files = set(_CodePatchingState.file_to_lines)
+        _CodePatchingState.file_to_lines = {}
+        _update_functions(changed_files)
+        _CodePatchingState.patched_code_cache.clear()
+        _CodePatchingState.patched_code_to_original.clear()
+        _CodePatchingState.active = False
+        try:
+            sys.meta_path.remove(_code_patching_finder)
+        except ValueError:
+            pass
+
+
+def enable_cache_frames_without_breaks(new_value):
+    # There's no cache of frames without breakpoints when patching the code.
+    pass
+
+
+def increment_breakpoints_generation():
+    py_db = get_global_debugger()
+    if py_db is not None:
+        update_breakpoints(py_db)
+
+
+# Note: imported at the end so that the settings above are available without importing the tracing machinery.
+from _pydevd_bundle.pydevd_comm import get_global_debugger
+from _pydevd_frame_eval.pydevd_frame_tracing import pydev_trace_code_wrapper, dummy_tracing_holder, _pydev_stop_at_break
+from _pydevd_frame_eval.pydevd_modify_bytecode import insert_code_at_lines
+from pydevd_file_utils import get_abs_path_real_path_and_base_from_file
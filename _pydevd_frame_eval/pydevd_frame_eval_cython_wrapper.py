@@ -1,10 +1,10 @@
 try:
     try:
         from _pydevd_frame_eval_ext.pydevd_frame_evaluator import frame_eval_func, stop_frame_eval, \
-            enable_cache_frames_without_breaks, dummy_trace_dispatch
+            enable_cache_frames_without_breaks, dummy_trace_dispatch, increment_breakpoints_generation
     except ImportError:
         from _pydevd_frame_eval.pydevd_frame_evaluator import frame_eval_func, stop_frame_eval, \
-            enable_cache_frames_without_breaks, dummy_trace_dispatch
+            enable_cache_frames_without_breaks, dummy_trace_dispatch, increment_breakpoints_generation
 
 except ImportError:
     try:
@@ -33,5 +33,6 @@ except ImportError:
         mod = getattr(mod, mod_name)
         frame_eval_func, stop_frame_eval, enable_cache_frames_without_breaks, dummy_trace_dispatch = \
             mod.frame_eval_func, mod.stop_frame_eval, mod.enable_cache_frames_without_breaks, mod.dummy_trace_dispatch
+        increment_breakpoints_generation = mod.increment_breakpoints_generation
     except ImportError:
         raise
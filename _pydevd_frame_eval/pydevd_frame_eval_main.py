@@ -9,6 +9,7 @@ frame_eval_func = None
 stop_frame_eval = None
 enable_cache_frames_without_breaks = None
 dummy_trace_dispatch = None
+increment_breakpoints_generation = None
 show_frame_eval_warning = False
 
 # "NO" means we should not use frame evaluation, anythinge else means we should use it.
@@ -21,7 +22,7 @@ else:
     if IS_PY36_OR_GREATER:
         try:
             from _pydevd_frame_eval.pydevd_frame_eval_cython_wrapper import frame_eval_func, stop_frame_eval, enable_cache_frames_without_breaks, \
-                dummy_trace_dispatch
+                dummy_trace_dispatch, increment_breakpoints_generation
         except ImportError:
             from _pydev_bundle.pydev_monkey import log_error_once
 
@@ -30,4 +31,17 @@ else:
                 log_error_once("warning: Debugger speedups using cython not found. Run '\"%s\" \"%s\" build_ext --inplace' to build." % (
                     sys.executable, os.path.join(dirname, 'setup_cython.py')))
             else:
-                show_frame_eval_warning = True
\ No newline at end of file
+                show_frame_eval_warning = True
+
+# "NO" means we should not patch the code of the functions with breakpoints (only used when the frame evaluation
+# is not available), anything else means we should use it.
+USE_CODE_PATCHING = os.environ.get('PYDEVD_USE_CODE_PATCHING', 'NO')
+
+if frame_eval_func is None and USE_CODE_PATCHING != 'NO':
+    from _pydevd_frame_eval.pydevd_code_patching import IS_CODE_PATCHING_SUPPORTED
+    if IS_CODE_PATCHING_SUPPORTED:
+        from _pydevd_frame_eval.pydevd_code_patching import frame_eval_func, stop_frame_eval, \
+            enable_cache_frames_without_breaks, dummy_trace_dispatch, increment_breakpoints_generation
+    else:
+        from _pydev_bundle.pydev_monkey import log_error_once
+        log_error_once('warning: PYDEVD_USE_CODE_PATCHING is only available on CPython 3.6 and 3.7.')
@@ -4,8 +4,8 @@ from _pydevd_bundle.pydevd_additional_thread_info import set_additional_thread_i
 from _pydevd_bundle.pydevd_comm import get_global_debugger
 from _pydevd_bundle.pydevd_dont_trace_files import DONT_TRACE
 from _pydevd_frame_eval.pydevd_frame_tracing import pydev_trace_code_wrapper, update_globals_dict, dummy_tracing_holder
-from _pydevd_frame_eval.pydevd_modify_bytecode import insert_code
-from pydevd_file_utils import get_abs_path_real_path_and_base_from_frame, NORM_PATHS_AND_BASE_CONTAINER
+from _pydevd_frame_eval.pydevd_modify_bytecode import insert_code_at_lines_cached
+from pydevd_file_utils import get_abs_path_real_path_and_base_from_file, NORM_PATHS_AND_BASE_CONTAINER
 
 AVOID_RECURSION = [
     'pydevd_additional_thread_info_regular.py',
@@ -14,15 +14,11 @@ AVOID_RECURSION = [
 ]
 
 get_file_type = DONT_TRACE.get
-NO_BREAKS_IN_FRAME = 1
 
 
 class UseCodeExtraHolder:
     # Use this flag in order to disable co_extra field
     use_code_extra = True
-    # Keep the index of co_extra in a thread-local storage
-    local = threading.local()
-    local.index = -1
 
 
 def is_use_code_extra():
@@ -34,120 +30,229 @@ def enable_cache_frames_without_breaks(new_value):
     UseCodeExtraHolder.use_code_extra = new_value
 
 
+# Incremented whenever breakpoints are changed: the information cached in the `co_extra` of a code object
+# is only valid while its generation is the current one.
+cdef int _breakpoints_generation = 0
+
+
+def increment_breakpoints_generation():
+    global _breakpoints_generation
+    _breakpoints_generation += 1
+
+
 cpdef dummy_trace_dispatch(frame, str event, arg):
     return None
 
 
-cdef PyObject* get_bytecode_while_frame_eval(PyFrameObject *frame_obj, int exc):
-    frame = <object> frame_obj
-    cdef str filepath = frame.f_code.co_filename
-    cdef bint skip_file = exc
-    cdef void* extra = NULL
-    cdef int* extra_value = NULL
-    cdef int thread_index = -1
+#=======================================================================================================================
+# CodeExtraInfo
+#=======================================================================================================================
+cdef class CodeExtraInfo:
+    '''This is the information which is cached in the `co_extra` of each code object.
+    '''
 
-    if is_use_code_extra is None or AVOID_RECURSION is None:
-        # Sometimes during process shutdown these global variables become None
-        return _PyEval_EvalFrameDefault(frame_obj, exc)
+    # The value of _breakpoints_generation when the breakpoints were last checked for the code.
+    cdef int breakpoints_generation
+
+    # If True, there are no breakpoints for the code (in the breakpoints_generation) and it can be
+    # evaluated without any changes.
+    cdef bint no_breaks
+
+    # If True, the code must always be evaluated without changes (i.e.: pydevd files, files which can
+    # lead to a recursion or code which already had the breakpoints inserted).
+    cdef bint always_skip
+
+    # The canonical filename of the code (None until first needed).
+    cdef str filename
+
+    # Maps the lines of the code to the offset where each line starts (computed only once per code
+    # object and reused when the breakpoints are changed).
+    cdef dict line_to_offset
+
+    # The code with the breakpoints inserted (in the breakpoints_generation) to be evaluated instead of
+    # this code.
+    cdef object modified_code
+
+    def __init__(self):
+        self.breakpoints_generation = -1
+        self.no_breaks = False
+        self.always_skip = False
+        self.filename = None
+        self.line_to_offset = None
+        self.modified_code = None
 
-    if is_use_code_extra():
-        extra = PyMem_Malloc(sizeof(int))
-        try:
-            thread_index = UseCodeExtraHolder.local.index
-        except:
-            pass
-        if thread_index != -1:
-            _PyCode_GetExtra(<PyObject*> frame.f_code, thread_index, &extra)
-            if extra is not NULL:
-                extra_value = <int*> extra
-                if extra_value[0] == NO_BREAKS_IN_FRAME:
-                    return _PyEval_EvalFrameDefault(frame_obj, exc)
 
+cdef void release_co_extra(void *obj):
+    Py_XDECREF(<PyObject *> obj)
+
+
+cdef Py_ssize_t _code_extra_index = _PyEval_RequestCodeExtraIndex(release_co_extra)
+
+
+cdef CodeExtraInfo get_code_extra_info(code_obj):
+    '''
+    :return CodeExtraInfo:
+        The info cached for the given code (created and cached if it still doesn't exist).
+    '''
+    cdef void* extra = NULL
+    cdef CodeExtraInfo code_extra_info
+    cdef str filepath
+
+    _PyCode_GetExtra(<PyObject *> code_obj, _code_extra_index, &extra)
+    if extra is not NULL:
+        return <CodeExtraInfo> <object> extra
+
+    code_extra_info = CodeExtraInfo()
+    filepath = code_obj.co_filename
     for file in AVOID_RECURSION:
         # we can't call any other function without this check, because we can get stack overflow
+        # (note: done only once per code object).
         for path_separator in ('/', '\\'):
             if filepath.endswith(path_separator + file):
-                skip_file = True
+                code_extra_info.always_skip = True
                 break
 
-    if not skip_file:
-        try:
-            t = threading.currentThread()
-        except:
-            skip_file = True
-
-    if not skip_file:
-        try:
-            additional_info = t.additional_info
-            if additional_info is None:
-                raise AttributeError()
-        except:
-            additional_info = set_additional_thread_info(t)
-            # request `co_extra` inside every new thread
-            thread_index = _PyEval_RequestCodeExtraIndex(PyMem_Free)
-            UseCodeExtraHolder.local.index = thread_index
-
-        if additional_info.is_tracing or getattr(t, 'pydev_do_not_trace', None):
-            return _PyEval_EvalFrameDefault(frame_obj, exc)
+    Py_INCREF(code_extra_info)
+    _PyCode_SetExtra(<PyObject *> code_obj, _code_extra_index, <PyObject *> code_extra_info)
+    return code_extra_info
+
+
+#=======================================================================================================================
+# ThreadInfo
+#=======================================================================================================================
+cdef class ThreadInfo:
+    '''Kept in a thread-local so that threading.currentThread() doesn't have to be called on each frame evaluation.
+    '''
+
+    cdef public object thread
+    cdef public object additional_info
+
+    def __init__(self, thread, additional_info):
+        self.thread = thread
+        self.additional_info = additional_info
+
+
+_thread_local_info = threading.local()
 
-        additional_info.is_tracing = True
-        try:
-            abs_path_real_path_and_base = NORM_PATHS_AND_BASE_CONTAINER[frame.f_code.co_filename]
-        except:
-            abs_path_real_path_and_base = get_abs_path_real_path_and_base_from_frame(frame)
 
-        file_type = get_file_type(abs_path_real_path_and_base[-1])  #we don't want to debug anything related to pydevd
-        if file_type is not None:
-            additional_info.is_tracing = False
+cdef ThreadInfo get_thread_info():
+    cdef ThreadInfo thread_info
+    try:
+        return _thread_local_info.thread_info
+    except:
+        pass
+
+    t = threading.currentThread()
+    additional_info = getattr(t, 'additional_info', None)
+    if additional_info is None:
+        additional_info = set_additional_thread_info(t)
+
+    thread_info = ThreadInfo(t, additional_info)
+    _thread_local_info.thread_info = thread_info
+    return thread_info
+
+
+cdef PyObject* get_bytecode_while_frame_eval(PyFrameObject *frame_obj, int exc):
+    cdef CodeExtraInfo code_extra_info
+    cdef ThreadInfo thread_info
+
+    if exc or is_use_code_extra is None or AVOID_RECURSION is None:
+        # Sometimes during process shutdown these global variables become None
+        return _PyEval_EvalFrameDefault(frame_obj, exc)
+
+    frame = <object> frame_obj
+    code_object = frame.f_code
+    code_extra_info = get_code_extra_info(code_object)
+    if code_extra_info.always_skip:
+        return _PyEval_EvalFrameDefault(frame_obj, exc)
+
+    if code_extra_info.breakpoints_generation == _breakpoints_generation and is_use_code_extra():
+        # Fast path: nothing changed since the breakpoints were last checked for this code.
+        if code_extra_info.no_breaks:
             return _PyEval_EvalFrameDefault(frame_obj, exc)
 
-        was_break = False
-        main_debugger = get_global_debugger()
-        breakpoints = main_debugger.breakpoints.get(abs_path_real_path_and_base[1])
-        code_object = frame.f_code
-        if breakpoints:
-            breakpoints_to_update = []
-            for offset, line in dis.findlinestarts(code_object):
-                if line in breakpoints:
-                    breakpoint = breakpoints[line]
-                    if code_object not in breakpoint.code_objects:
-                        # This check is needed for generator functions, because after each yield the new frame is created
-                        # but the former code object is used
-                        success, new_code = insert_code(frame.f_code, pydev_trace_code_wrapper.__code__, line)
-                        if success:
-                            breakpoints_to_update.append(breakpoint)
-                            Py_INCREF(new_code)
-                            frame_obj.f_code = <PyCodeObject *> new_code
-                            was_break = True
-                        else:
-                            main_debugger.set_trace_for_frame_and_parents(frame)
-                            was_break = False
-                            break
-            if was_break:
-                update_globals_dict(frame.f_globals)
-                for bp in breakpoints_to_update:
-                    bp.code_objects.add(frame.f_code)
-        else:
-            if main_debugger.has_plugin_line_breaks:
-                can_not_skip = main_debugger.plugin.can_not_skip(main_debugger, None, frame)
-                if can_not_skip:
-                    was_break = True
-                    main_debugger.SetTrace(main_debugger.trace_dispatch)
-                    main_debugger.set_trace_for_frame_and_parents(frame)
-
-        if not was_break:
-            extra_value = <int*> PyMem_Malloc(sizeof(int))
-            extra_value[0] = NO_BREAKS_IN_FRAME
+        new_code = code_extra_info.modified_code
+        if new_code is not None:
+            Py_INCREF(new_code)
+            frame_obj.f_code = <PyCodeObject *> new_code
+            return _PyEval_EvalFrameDefault(frame_obj, exc)
+
+    try:
+        thread_info = get_thread_info()
+    except:
+        return _PyEval_EvalFrameDefault(frame_obj, exc)
+
+    additional_info = thread_info.additional_info
+    if additional_info.is_tracing or getattr(thread_info.thread, 'pydev_do_not_trace', None):
+        return _PyEval_EvalFrameDefault(frame_obj, exc)
+
+    additional_info.is_tracing = True
+    try:
+        if code_extra_info.filename is None:
             try:
-                thread_index = UseCodeExtraHolder.local.index
+                abs_path_real_path_and_base = NORM_PATHS_AND_BASE_CONTAINER[code_object.co_filename]
             except:
-                pass
-            if thread_index != -1:
-                _PyCode_SetExtra(<PyObject*> code_object, thread_index, extra_value)
+                abs_path_real_path_and_base = get_abs_path_real_path_and_base_from_file(code_object.co_filename)
+
+            code_extra_info.filename = abs_path_real_path_and_base[1]
+            if get_file_type(abs_path_real_path_and_base[-1]) is not None:
+                # we don't want to debug anything related to pydevd
+                code_extra_info.always_skip = True
 
+        if not code_extra_info.always_skip:
+            update_code_extra_info(frame_obj, frame, code_object, code_extra_info)
+    finally:
         additional_info.is_tracing = False
     return _PyEval_EvalFrameDefault(frame_obj, exc)
 
+
+cdef update_code_extra_info(PyFrameObject *frame_obj, frame, code_object, CodeExtraInfo code_extra_info):
+    '''
+    Checks the breakpoints for the given code (inserting them in the frame code if needed) and caches
+    whether it has no breakpoints for the current breakpoints generation.
+    '''
+    cdef dict line_to_offset
+    was_break = False
+    modified_code = None
+    main_debugger = get_global_debugger()
+    breakpoints_generation = _breakpoints_generation
+    breakpoints = main_debugger.breakpoints.get(code_extra_info.filename)
+    if breakpoints:
+        line_to_offset = code_extra_info.line_to_offset
+        if line_to_offset is None:
+            line_to_offset = {}
+            for offset, line in dis.findlinestarts(code_object):
+                if line not in line_to_offset:
+                    line_to_offset[line] = offset
+            code_extra_info.line_to_offset = line_to_offset
+
+        lines = [line for line in breakpoints if line in line_to_offset]
+        if lines:
+            # Note: the modified code is cached (so, it's only created again if the breakpoints for the code change).
+            success, new_code = insert_code_at_lines_cached(code_object, pydev_trace_code_wrapper.__code__, lines)
+            if success:
+                # The code with the breakpoints inserted must not be changed again (i.e.: when a generator is resumed).
+                get_code_extra_info(new_code).always_skip = True
+                update_globals_dict(frame.f_globals)
+                Py_INCREF(new_code)
+                frame_obj.f_code = <PyCodeObject *> new_code
+                modified_code = new_code
+                was_break = True
+            else:
+                main_debugger.set_trace_for_frame_and_parents(frame)
+    else:
+        if main_debugger.has_plugin_line_breaks:
+            can_not_skip = main_debugger.plugin.can_not_skip(main_debugger, None, frame)
+            if can_not_skip:
+                was_break = True
+                main_debugger.SetTrace(main_debugger.trace_dispatch)
+                main_debugger.set_trace_for_frame_and_parents(frame)
+
+    code_extra_info.no_breaks = not was_break
+    code_extra_info.modified_code = modified_code
+    code_extra_info.breakpoints_generation = breakpoints_generation
+
+
 def frame_eval_func():
     cdef PyThreadState *state = PyThreadState_Get()
     state.interp.eval_frame = get_bytecode_while_frame_eval
@@ -2,6 +2,7 @@ import sys
 
 from _pydev_bundle import pydev_log
 from _pydev_imps._pydev_saved_modules import threading
+from _pydevd_bundle.pydevd_additional_thread_info import set_additional_thread_info
 from _pydevd_bundle.pydevd_comm import get_global_debugger, CMD_SET_BREAK, CMD_SET_NEXT_STATEMENT
 from pydevd_file_utils import get_abs_path_real_path_and_base_from_frame, NORM_PATHS_AND_BASE_CONTAINER
 from _pydevd_bundle.pydevd_frame import handle_breakpoint_condition, handle_breakpoint_expression
@@ -56,12 +57,18 @@ def _get_line_for_frame(frame):
 def _pydev_stop_at_break():
     frame = sys._getframe(1)
     t = threading.currentThread()
-    if t.additional_info.is_tracing:
+    # Note: when patching the code there may be no tracing in the thread before the first breakpoint is hit
+    # (so, the additional info may still not be there).
+    additional_info = set_additional_thread_info(t)
+    if additional_info.is_tracing:
         return False
 
-    if t.additional_info.pydev_step_cmd == -1 and frame.f_trace in (None, dummy_tracing_holder.dummy_trace_func):
+    if additional_info.pydev_step_cmd == -1 and (
+            frame.f_trace in (None, dummy_tracing_holder.dummy_trace_func) or sys.gettrace() is None):
         # do not handle breakpoints while stepping, because they're handled by old tracing function
-        t.additional_info.is_tracing = True
+        # (note: the frame may have a tracing function which isn't called because the tracing is disabled
+        # in the thread -- i.e.: when patching the code instead of using the frame evaluation).
+        additional_info.is_tracing = True
         debugger = get_global_debugger()
 
         try:
@@ -74,16 +81,17 @@ def _pydev_stop_at_break():
         line = _get_line_for_frame(frame)
         try:
             breakpoint = breakpoints_for_file[line]
-        except KeyError:
+        except (KeyError, TypeError):
+            # Note: TypeError if there are no breakpoints for the file anymore.
             pydev_log.debug("Couldn't find breakpoint in the file {} on line {}".format(frame.f_code.co_filename, line))
-            t.additional_info.is_tracing = False
+            additional_info.is_tracing = False
             return False
         if breakpoint and handle_breakpoint(frame, t, debugger, breakpoint):
             pydev_log.debug("Suspending at breakpoint in file: {} on line {}".format(frame.f_code.co_filename, line))
             debugger.set_suspend(t, CMD_SET_BREAK)
             debugger.do_wait_suspend(t, frame, 'line', None, "frame_eval")
-        t.additional_info.is_tracing = False
-        return t.additional_info.pydev_step_cmd == CMD_SET_NEXT_STATEMENT
+        additional_info.is_tracing = False
+        return additional_info.pydev_step_cmd == CMD_SET_NEXT_STATEMENT
     return False
 
 
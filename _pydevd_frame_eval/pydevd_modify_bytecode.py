@@ -6,171 +6,185 @@ from types import CodeType
 MAX_BYTE = 255
 RETURN_VALUE_SIZE = 2
 
+_HAS_JREL = frozenset(dis.hasjrel)
+_HAS_JABS = frozenset(dis.hasjabs)
+_HAS_NAME = frozenset(dis.hasname)
+_HAS_LOCAL = frozenset(dis.haslocal)
 
-def _add_attr_values_from_insert_to_original(original_code, insert_code, insert_code_list, attribute_name, op_list):
-    """
-    This function appends values of the attribute `attribute_name` of the inserted code to the original values,
-     and changes indexes inside inserted code. If some bytecode instruction in the inserted code used to call argument
-     number i, after modification it calls argument n + i, where n - length of the values in the original code.
-     So it helps to avoid variables mixing between two pieces of code.
-
-    :param original_code: code to modify
-    :param insert_code: code to insert
-    :param insert_code_obj: bytes sequence of inserted code, which should be modified too
-    :param attribute_name: name of attribute to modify ('co_names', 'co_consts' or 'co_varnames')
-    :param op_list: sequence of bytecodes whose arguments should be changed
-    :return: modified bytes sequence of the code to insert and new values of the attribute `attribute_name` for
-    original code
-    """
-    orig_value = getattr(original_code, attribute_name)
-    insert_value = getattr(insert_code, attribute_name)
-    orig_names_len = len(orig_value)
-    code_with_new_values = list(insert_code_list)
-    offset = 0
-    while offset < len(code_with_new_values):
-        op = code_with_new_values[offset]
-        if op in op_list:
-            new_val = code_with_new_values[offset + 1] + orig_names_len
-            if new_val > MAX_BYTE:
-                code_with_new_values[offset + 1] = new_val & MAX_BYTE
-                code_with_new_values = code_with_new_values[:offset] + [EXTENDED_ARG, new_val >> 8] + \
-                                       code_with_new_values[offset:]
-                offset += 2
-            else:
-                code_with_new_values[offset + 1] = new_val
-        offset += 2
-    new_values = orig_value + insert_value
-    return bytes(code_with_new_values), new_values
-
-
-def _modify_new_lines(code_to_modify, all_inserted_code):
-    """
-    Update new lines in order to hide inserted code inside the original code
-    :param code_to_modify: code to modify
-    :param all_inserted_code: list of tuples (offset, list of code instructions) with all inserted pieces of code
-    :return: bytes sequence of code with updated lines offsets
-    """
-    new_list = list(code_to_modify.co_lnotab)
-    abs_offset = prev_abs_offset = 0
-    i = 0
-    while i < len(new_list):
-        prev_abs_offset = abs_offset
-        abs_offset += new_list[i]
-        for (inserted_offset, inserted_code) in all_inserted_code:
-            if prev_abs_offset <= inserted_offset < abs_offset:
-                size_of_inserted = len(inserted_code)
-                new_list[i] += size_of_inserted
-                abs_offset += size_of_inserted
-        if new_list[i] > MAX_BYTE:
-            new_list[i] = new_list[i] - MAX_BYTE
-            new_list = new_list[:i] + [MAX_BYTE, 0] + new_list[i:]
-        i += 2
-    return bytes(new_list)
-
-
-def _unpack_opargs(code, inserted_code_list, current_index):
-    """
-    Modified version of `_unpack_opargs` function from module `dis`.
-    We have to use it, because sometimes code can be in an inconsistent state: if EXTENDED_ARG
-    operator was introduced into the code, but it hasn't been inserted into `code_list` yet.
-    In this case we can't use standard `_unpack_opargs` and we should check whether there are
-    some new operators in `inserted_code_list`.
+# Maps an original code object to a dict with the frozenset of lines where the code was inserted -> modified code.
+_modified_code_cache = {}
+
+
+class _Instruction(object):
+    """
+    An instruction (with its EXTENDED_ARG prefixes already merged into the arg).
+    """
+
+    __slots__ = ['op', 'arg', 'target', 'key', 'size', 'new_offset']
+
+    def __init__(self, op, arg, target=None, key=None):
+        self.op = op
+        self.arg = arg
+
+        # For jumps: the offset (in the original code) of the jump target.
+        self.target = target
+
+        # The offset (in the original code) which should be mapped to the start of this instruction (only set for
+        # the first instruction emitted for an original offset -- which may be an inserted one).
+        self.key = key
+
+        self.size = 2
+        self.new_offset = 0
+
+
+def _get_size(arg):
+    size = 2
+    if arg is not None:
+        while arg > MAX_BYTE:
+            size += 2
+            arg >>= 8
+    return size
+
+
+def _decode_instructions(code):
     """
+    :return: list of tuples (offset of the instruction start, offset of the opcode, op, arg)
+    """
+    co_code = code.co_code
+    instructions = []
     extended_arg = 0
-    for i in range(0, len(code), 2):
-        op = code[i]
+    start = None
+    for i in range(0, len(co_code), 2):
+        op = co_code[i]
+        if start is None:
+            start = i
         if op >= HAVE_ARGUMENT:
-            if not extended_arg:
-                # in case if we added EXTENDED_ARG, but haven't inserted it to the source code yet.
-                for code_index in range(current_index, len(inserted_code_list)):
-                    inserted_offset, inserted_code = inserted_code_list[code_index]
-                    if inserted_offset == i and inserted_code[0] == EXTENDED_ARG:
-                        extended_arg = inserted_code[1] << 8
-            arg = code[i+1] | extended_arg
-            extended_arg = (arg << 8) if op == EXTENDED_ARG else 0
+            arg = co_code[i + 1] | extended_arg
+            if op == EXTENDED_ARG:
+                extended_arg = arg << 8
+                continue
+            extended_arg = 0
         else:
             arg = None
-        yield (i, op, arg)
-
-
-def _update_label_offsets(code_obj, breakpoint_offset, breakpoint_code_list):
-    """
-    Update labels for the relative and absolute jump targets
-    :param code_obj: code to modify
-    :param breakpoint_offset: offset for the inserted code
-    :param breakpoint_code_list: size of the inserted code
-    :return: bytes sequence with modified labels; list of tuples (resulting offset, list of code instructions) with
-    information about all inserted pieces of code
-    """
-    inserted_code = list()
-    # the list with all inserted pieces of code
-    inserted_code.append((breakpoint_offset, breakpoint_code_list))
-    code_list = list(code_obj)
-    j = 0
-
-    while j < len(inserted_code):
-        current_offset, current_code_list = inserted_code[j]
-        offsets_for_modification = []
-
-        for offset, op, arg in _unpack_opargs(code_list, inserted_code, j):
-            if arg is not None:
-                if op in dis.hasjrel:
-                    # has relative jump target
-                    label = offset + 2 + arg
-                    if offset < current_offset < label:
-                        # change labels for relative jump targets if code was inserted inside
-                        offsets_for_modification.append(offset)
-                elif op in dis.hasjabs:
-                    # change label for absolute jump if code was inserted before it
-                    if current_offset < arg:
-                        offsets_for_modification.append(offset)
-        for i in range(0, len(code_list), 2):
-            op = code_list[i]
-            if i in offsets_for_modification and op >= dis.HAVE_ARGUMENT:
-                new_arg = code_list[i + 1] + len(current_code_list)
-                if new_arg <= MAX_BYTE:
-                    code_list[i + 1] = new_arg
-                else:
-                    # handle bytes overflow
-                    if i - 2 > 0 and code_list[i - 2] == EXTENDED_ARG and code_list[i - 1] < MAX_BYTE:
-                        # if new argument > 255 and EXTENDED_ARG already exists we need to increase it's argument
-                        code_list[i - 1] += 1
-                    else:
-                        # if there isn't EXTENDED_ARG operator yet we have to insert the new operator
-                        extended_arg_code = [EXTENDED_ARG, new_arg >> 8]
-                        inserted_code.append((i, extended_arg_code))
-                    code_list[i + 1] = new_arg & MAX_BYTE
+        instructions.append((start, i, op, arg))
+        start = None
+    return instructions
 
-        code_list = code_list[:current_offset] + current_code_list + code_list[current_offset:]
 
-        for k in range(len(inserted_code)):
-            offset, inserted_code_list = inserted_code[k]
-            if current_offset < offset:
-                inserted_code[k] = (offset + len(current_code_list), inserted_code_list)
-        j += 1
+def _get_code_to_insert_instructions(code_to_modify, code_to_insert):
+    """
+    :return: list of tuples (op, arg) for the code to insert (without the 'RETURN_VALUE' instruction) with the
+    arguments changed to reference the values appended to the names, constants and variables of the original code.
+    """
+    names_len = len(code_to_modify.co_names)
+    consts_len = len(code_to_modify.co_consts)
+    varnames_len = len(code_to_modify.co_varnames)
+    load_const = opmap['LOAD_CONST']
 
-    return bytes(code_list), inserted_code
+    instructions = []
+    for _start, _offset, op, arg in _decode_instructions(code_to_insert)[:-1]:
+        if op in _HAS_NAME:
+            arg += names_len
+        elif op == load_const:
+            arg += consts_len
+        elif op in _HAS_LOCAL:
+            arg += varnames_len
+        elif op in _HAS_JREL or op in _HAS_JABS:
+            raise ValueError('Jumps are not supported in the code to insert.')
+        instructions.append((op, arg))
+    return instructions
 
 
-def _return_none_fun():
-    return None
+def _assemble(instructions):
+    """
+    Computes the offsets (and the EXTENDED_ARG prefixes needed) for the given instructions and fixes the jumps
+    arguments.
 
+    :return: bytes sequence of the code; dict mapping the original offsets to the new offsets
+    """
+    while True:
+        offset = 0
+        new_offsets = {}
+        for instruction in instructions:
+            instruction.new_offset = offset
+            offset += instruction.size
+            if instruction.key is not None:
+                new_offsets[instruction.key] = instruction.new_offset
+        new_offsets[None] = offset  # the end of the code
 
-def add_jump_instruction(jump_arg, code_to_insert):
+        changed = False
+        for instruction in instructions:
+            if instruction.target is not None:
+                target = new_offsets[instruction.target]
+                if instruction.op in _HAS_JREL:
+                    instruction.arg = target - (instruction.new_offset + instruction.size)
+                else:
+                    instruction.arg = target
+                size = _get_size(instruction.arg)
+                if size > instruction.size:
+                    # A bigger instruction changes all the offsets after it (so, we have to compute them again --
+                    # note that it never gets smaller, so, this always finishes).
+                    instruction.size = size
+                    changed = True
+        if not changed:
+            break
+
+    code_list = []
+    for instruction in instructions:
+        arg = instruction.arg
+        if arg is None:
+            arg = 0
+        for i in range(instruction.size // 2 - 1, 0, -1):
+            code_list.append(EXTENDED_ARG)
+            code_list.append((arg >> (8 * i)) & MAX_BYTE)
+        code_list.append(instruction.op)
+        code_list.append(arg & MAX_BYTE)
+    return bytes(code_list), new_offsets
+
+
+def _encode_lnotab(code_to_modify, new_offsets):
     """
-    Add additional instruction POP_JUMP_IF_TRUE to implement a proper jump for "set next statement" action
-    Jump should be done to the beginning of the inserted fragment
-    :param jump_arg: argument for jump instruction
-    :param code_to_insert: code to insert
-    :return: a code to insert with properly added jump instruction
+    Update new lines in order to hide inserted code inside the original code (the code inserted before the start of
+    a line is a part of that line).
+
+    :return: bytes sequence of the new co_lnotab
     """
-    extended_arg_list = []
-    if jump_arg > MAX_BYTE:
-        extended_arg_list += [EXTENDED_ARG, jump_arg >> 8]
-        jump_arg = jump_arg & MAX_BYTE
+    lnotab = code_to_modify.co_lnotab
+    line_starts = []
+    addr = 0
+    for i in range(0, len(lnotab), 2):
+        addr += lnotab[i]
+        line_incr = lnotab[i + 1]
+        if line_incr >= 0x80:
+            line_incr -= 0x100
+        if line_starts and line_starts[-1][0] == addr:
+            line_starts[-1][1] += line_incr
+        else:
+            line_starts.append([addr, line_incr])
 
-    # remove 'RETURN_VALUE' instruction and add 'POP_JUMP_IF_TRUE' with (if needed) 'EXTENDED_ARG'
-    return list(code_to_insert.co_code[:-RETURN_VALUE_SIZE]) + extended_arg_list + [opmap['POP_JUMP_IF_TRUE'], jump_arg]
+    code_len = len(code_to_modify.co_code)
+    new_lnotab = []
+    prev_offset = 0
+    for addr, line_incr in line_starts:
+        if line_incr == 0:
+            # i.e.: just a continuation because the address increment was too big.
+            continue
+        new_offset = new_offsets[None if addr == code_len else addr]
+        addr_incr = new_offset - prev_offset
+        prev_offset = new_offset
+        while addr_incr > MAX_BYTE:
+            new_lnotab.extend((MAX_BYTE, 0))
+            addr_incr -= MAX_BYTE
+        while line_incr > 0x7f:
+            new_lnotab.extend((addr_incr, 0x7f))
+            addr_incr = 0
+            line_incr -= 0x7f
+        while line_incr < -0x80:
+            new_lnotab.extend((addr_incr, 0x80))
+            addr_incr = 0
+            line_incr += 0x80
+        new_lnotab.extend((addr_incr, line_incr & MAX_BYTE))
+    return bytes(new_lnotab)
 
 
 def insert_code(code_to_modify, code_to_insert, before_line):
@@ -183,37 +197,76 @@ def insert_code(code_to_modify, code_to_insert, before_line):
     :param before_line: Number of line for code insertion
     :return: boolean flag whether insertion was successful, modified code
     """
-    linestarts = dict(dis.findlinestarts(code_to_modify))
-    if before_line not in linestarts.values():
-        return code_to_modify
-    offset = None
-    for off, line_no in linestarts.items():
-        if line_no == before_line:
-            offset = off
+    return insert_code_at_lines(code_to_modify, code_to_insert, (before_line,))
+
+
+def insert_code_at_lines(code_to_modify, code_to_insert, lines):
+    """
+    Insert piece of code `code_to_insert` to `code_to_modify` right inside each of the given lines (before the
+    instruction on the line) rebuilding the bytecode, the line numbers and the names, constants and variables only
+    once for all the lines.
+
+    A POP_JUMP_IF_TRUE instruction is added after each inserted piece of code to implement a proper jump for the
+    "set next statement" action (the jump is done to the beginning of the inserted fragment).
+
+    :param code_to_modify: Code to modify
+    :param code_to_insert: Code to insert
+    :param lines: Numbers of lines for code insertion
+    :return: boolean flag whether insertion was successful, modified code
+    """
+    linestarts = {}
+    for offset, line_no in dis.findlinestarts(code_to_modify):
+        # Note: if a line appears more than once, the code is inserted at its last start.
+        linestarts[line_no] = offset
+
+    insert_offsets = set()
+    for line in lines:
+        offset = linestarts.get(line)
+        if offset is not None:
+            insert_offsets.add(offset)
+
+    if not insert_offsets:
+        return False, code_to_modify
 
-    code_to_insert_list = add_jump_instruction(offset, code_to_insert)
     try:
-        code_to_insert_list, new_names = \
-            _add_attr_values_from_insert_to_original(code_to_modify, code_to_insert, code_to_insert_list, 'co_names',
-                                                     dis.hasname)
-        code_to_insert_list, new_consts = \
-            _add_attr_values_from_insert_to_original(code_to_modify, code_to_insert, code_to_insert_list, 'co_consts',
-                                                     [opmap['LOAD_CONST']])
-        code_to_insert_list, new_vars = \
-            _add_attr_values_from_insert_to_original(code_to_modify, code_to_insert, code_to_insert_list, 'co_varnames',
-                                                     dis.haslocal)
-        new_bytes, all_inserted_code = _update_label_offsets(code_to_modify.co_code, offset, list(code_to_insert_list))
-
-        new_lnotab = _modify_new_lines(code_to_modify, all_inserted_code)
+        code_to_insert_instructions = _get_code_to_insert_instructions(code_to_modify, code_to_insert)
+
+        starts = set()
+        instructions = []
+        for start, op_offset, op, arg in _decode_instructions(code_to_modify):
+            starts.add(start)
+            key = start
+            if start in insert_offsets:
+                for insert_op, insert_arg in code_to_insert_instructions:
+                    instructions.append(_Instruction(insert_op, insert_arg, key=key))
+                    key = None
+                instructions.append(_Instruction(opmap['POP_JUMP_IF_TRUE'], start, target=start))
+
+            target = None
+            if op in _HAS_JREL:
+                target = op_offset + 2 + arg
+            elif op in _HAS_JABS:
+                target = arg
+            instructions.append(_Instruction(op, arg, target=target, key=key))
+
+        for instruction in instructions:
+            if instruction.target is not None and instruction.target not in starts:
+                raise ValueError('Jump to an unexpected offset: %s' % (instruction.target,))
+        new_bytes, new_offsets = _assemble(instructions)
+        new_lnotab = _encode_lnotab(code_to_modify, new_offsets)
     except ValueError:
         traceback.print_exc()
         return False, code_to_modify
 
+    new_names = code_to_modify.co_names + code_to_insert.co_names
+    new_consts = code_to_modify.co_consts + code_to_insert.co_consts
+    new_vars = code_to_modify.co_varnames + code_to_insert.co_varnames
+
     new_code = CodeType(
         code_to_modify.co_argcount,  # integer
         code_to_modify.co_kwonlyargcount,  # integer
         len(new_vars),  # integer
-        code_to_modify.co_stacksize,  # integer
+        code_to_modify.co_stacksize + code_to_insert.co_stacksize,  # integer
         code_to_modify.co_flags,  # integer
         new_bytes,  # bytes
         new_consts,  # tuple
@@ -227,3 +280,44 @@ def insert_code(code_to_modify, code_to_insert, before_line):
         code_to_modify.co_cellvars  # tuple
     )
     return True, new_code
+
+
+def insert_code_at_lines_cached(code_to_modify, code_to_insert, lines):
+    """
+    Same as `insert_code_at_lines`, but the modified code is cached by (code_to_modify, frozenset(lines)), so that
+    re-entering the same function (or resuming a generator) reuses the same modified code.
+
+    When lines are added, the code previously modified with the biggest subset of the lines is modified with just the
+    new lines (instead of modifying the original code with all the lines again).
+
+    Note: `code_to_insert` must always be the same for the same `code_to_modify`.
+
+    :return: boolean flag whether insertion was successful, modified code
+    """
+    lines = frozenset(lines)
+    lines_to_modified_code = _modified_code_cache.get(code_to_modify)
+    if lines_to_modified_code is None:
+        lines_to_modified_code = _modified_code_cache[code_to_modify] = {}
+    else:
+        try:
+            return lines_to_modified_code[lines]
+        except KeyError:
+            pass
+
+    base_lines = frozenset()
+    base_code = code_to_modify
+    for modified_lines, (success, modified_code) in list(lines_to_modified_code.items()):
+        if success and len(modified_lines) > len(base_lines) and modified_lines.issubset(lines):
+            base_lines = modified_lines
+            base_code = modified_code
+
+    if base_lines:
+        success, new_code = insert_code_at_lines(base_code, code_to_insert, lines - base_lines)
+        if not success:
+            # i.e.: none of the new lines is in the code: the code modified with the subset may be reused.
+            success, new_code = True, base_code
+    else:
+        success, new_code = insert_code_at_lines(code_to_modify, code_to_insert, lines)
+
+    ret = lines_to_modified_code[lines] = (success, new_code)
+    return ret
@@ -13,8 +13,9 @@ import os
 import traceback
 
 from _pydevd_bundle.pydevd_constants import IS_JYTH_LESS25, IS_PYCHARM, get_thread_id, \
-    dict_keys, dict_iter_items, DebugInfoHolder, PYTHON_SUSPEND, STATE_SUSPEND, STATE_RUN, get_frame, xrange, \
-    clear_cached_thread_id, INTERACTIVE_MODE_AVAILABLE, SHOW_DEBUG_INFO_ENV, IS_PY34_OR_GREATER, IS_PY2, NULL
+    dict_keys, dict_values, dict_items, dict_iter_items, DebugInfoHolder, PYTHON_SUSPEND, STATE_SUSPEND, STATE_RUN, get_frame, xrange, \
+    clear_cached_thread_id, INTERACTIVE_MODE_AVAILABLE, SHOW_DEBUG_INFO_ENV, IS_PY34_OR_GREATER, IS_PY2, NULL, \
+    OUTPUT_FLUSH_DELAY, OUTPUT_HIGH_WATER_MARK, OUTPUT_BLOCK_TIMEOUT, RECORD_SESSION_DIR
 from _pydev_bundle import fix_getpass
 from _pydev_bundle import pydev_imports, pydev_log
 from _pydev_bundle._pydev_filesystem_encoding import getfilesystemencoding
@@ -27,23 +28,29 @@ import pydevd_tracing
 from _pydevd_bundle import pydevd_utils
 from _pydevd_bundle import pydevd_vars
 from _pydevd_bundle.pydevd_additional_thread_info import set_additional_thread_info
-from _pydevd_bundle.pydevd_breakpoints import ExceptionBreakpoint
+from _pydevd_bundle.pydevd_breakpoints import ExceptionBreakpoint, clear_exception_breakpoint_cache
 from _pydevd_bundle.pydevd_comm import CMD_SET_BREAK, CMD_SET_NEXT_STATEMENT, CMD_STEP_INTO, CMD_STEP_OVER, \
     CMD_STEP_RETURN, CMD_STEP_INTO_MY_CODE, CMD_THREAD_SUSPEND, CMD_RUN_TO_LINE, \
     CMD_ADD_EXCEPTION_BREAK, CMD_SMART_STEP_INTO, InternalConsoleExec, NetCommandFactory, \
     PyDBDaemonThread, _queue, ReaderThread, GetGlobalDebugger, get_global_debugger, \
     set_global_debugger, WriterThread, pydevd_find_thread_by_id, pydevd_log, \
-    start_client, start_server, InternalGetBreakpointException, InternalSendCurrExceptionTrace, \
-    InternalSendCurrExceptionTraceProceeded
+    start_client, start_server, start_client_unix_socket, start_server_unix_socket, socket_from_fd, \
+    InternalGetBreakpointException, InternalSendCurrExceptionTrace, \
+    InternalSendCurrExceptionTraceProceeded, NetCommand, MAX_IO_MSG_SIZE
+from _pydevd_bundle.pydevd_command_stats import command_stats
+from _pydevd_bundle.pydevd_session_recorder import start_session_recorder
 from _pydevd_bundle.pydevd_custom_frames import CustomFramesContainer, custom_frames_container_init
 from _pydevd_bundle.pydevd_frame_utils import add_exception_to_frame, remove_exception_from_frame
 from _pydevd_bundle.pydevd_kill_all_pydevd_threads import kill_all_pydev_threads
+from _pydevd_bundle import pydevd_sys_monitoring
 from _pydevd_bundle.pydevd_trace_dispatch import trace_dispatch as _trace_dispatch, global_cache_skips, global_cache_frame_skips
-from _pydevd_frame_eval.pydevd_frame_eval_main import frame_eval_func, stop_frame_eval, enable_cache_frames_without_breaks, dummy_trace_dispatch
+from _pydevd_frame_eval.pydevd_frame_eval_main import frame_eval_func, stop_frame_eval, enable_cache_frames_without_breaks, dummy_trace_dispatch, \
+    increment_breakpoints_generation
+from _pydevd_frame_eval import pydevd_code_patching
 from _pydevd_bundle.pydevd_utils import save_main_module
 from pydevd_concurrency_analyser.pydevd_concurrency_logger import ThreadingLogger, AsyncioLogger, send_message, cur_time
 from pydevd_concurrency_analyser.pydevd_thread_wrappers import wrap_threads
-from pydevd_file_utils import get_fullname, rPath
+from pydevd_file_utils import get_fullname, rPath, get_abs_path_real_path_and_base_from_file
 import pydev_ipython  # @UnusedImport
 
 __version_info__ = (1, 3, 3)
@@ -62,6 +69,9 @@ __version__ = '.'.join(__version_info_str__)
 
 
 SUPPORT_PLUGINS = not IS_JYTH_LESS25
+
+# Interval (in seconds) between the scans of all the threads when their start/stop are already notified through hooks.
+THREADS_RECONCILE_INTERVAL = 1.0
 PluginManager = None
 if SUPPORT_PLUGINS:
     from _pydevd_bundle.pydevd_plugin_utils import PluginManager
@@ -149,8 +159,14 @@ class CheckOutputThread(PyDBDaemonThread):
             if disable_tracing:
                 pydevd_tracing.SetTrace(None)  # no debugging on this thread
 
+        next_check_alive_time = time.time() + 0.3
         while not self.killReceived:
-            time.sleep(0.3)
+            time.sleep(min(0.3, max(0.01, OUTPUT_FLUSH_DELAY)))
+            flush_redirected_output()
+            if time.time() < next_check_alive_time:
+                continue
+            next_check_alive_time = time.time() + 0.3
+
             if not self.py_db.has_threads_alive() and self.py_db.writer.empty():
                 try:
                     pydev_log.debug("No alive threads, finishing debug session")
@@ -196,6 +212,8 @@ class PyDB:
         self.quitting = None
         self.cmd_factory = NetCommandFactory()
         self._cmd_queue = {}  # the hash of Queues. Key is thread id, value is thread
+        # Thread id -> threading.Event set when a suspended thread has something to do (see: do_wait_suspend).
+        self._thread_id_to_suspended_event = {}
 
         self.breakpoints = {}
 
@@ -234,7 +252,12 @@ class PyDB:
         #find that thread alive anymore, we must remove it from this list and make the java side know that the thread
         #was killed.
         self._running_thread_ids = {}
+        # Set when the threads start/stop are notified through the pydev_monkey hooks (see: patch_threads).
+        self._thread_lifecycle_hooks_installed = False
+        self._next_threads_reconcile_time = 0
         self._set_breakpoints_with_id = False
+        # Whether handles are given to the variables shown to the IDE (see: PROTOCOL_VARIABLE_HANDLES).
+        self.use_variable_handles = False
 
         # This attribute holds the file-> lines which have an @IgnoreException.
         self.filename_to_lines_where_exceptions_are_ignored = {}
@@ -252,6 +275,8 @@ class PyDB:
         self.mpl_modules_for_patching = {}
 
         self._filename_to_not_in_scope = {}
+        # Cache of frame_cache_key -> (verdict, filename) (see: pydevd_frame.get_trace_verdict).
+        self.code_to_trace_verdict = {}
         self.first_breakpoint_reached = False
         self.is_filter_enabled = pydevd_utils.is_filter_enabled()
         self.is_filter_libraries = pydevd_utils.is_filter_libraries()
@@ -305,6 +330,7 @@ class PyDB:
 
     def finish_debugging_session(self):
         self._finish_debugging_session = True
+        self.notify_thread('*')
 
 
     def initialize_network(self, sock):
@@ -312,6 +338,11 @@ class PyDB:
             sock.settimeout(None)  # infinite, no timeouts from now on - jython does not have it
         except:
             pass
+        # i.e.: they may be negotiated again in CMD_VERSION.
+        NetCommand.binary_framing = False
+        NetCommand.compression = False
+        if RECORD_SESSION_DIR:
+            start_session_recorder(RECORD_SESSION_DIR)
         self.writer = WriterThread(sock)
         self.reader = ReaderThread(sock)
         self.writer.start()
@@ -319,8 +350,21 @@ class PyDB:
 
         time.sleep(0.1)  # give threads time to start
 
-    def connect(self, host, port):
-        if host:
+    def connect(self, host, port, unix_socket=None, inherited_fd=None, server=False):
+        '''
+        :param unix_socket: if given, a unix domain socket is used instead of the host/port (the connection is done
+            to it or, if server is True, it's bound to wait for the connection).
+
+        :param inherited_fd: if given, the file descriptor of a connection already established.
+        '''
+        if inherited_fd is not None:
+            s = socket_from_fd(inherited_fd)
+        elif unix_socket:
+            if server:
+                s = start_server_unix_socket(unix_socket)
+            else:
+                s = start_client_unix_socket(unix_socket)
+        elif host:
             s = start_client(host, port)
         else:
             s = start_server(port)
@@ -341,16 +385,38 @@ class PyDB:
 
     def post_internal_command(self, int_cmd, thread_id):
         """ if thread_id is *, post to all """
+        int_cmd.posted_time = time.time()
         if thread_id == "*":
             threads = threadingEnumerate()
             for t in threads:
                 thread_id = get_thread_id(t)
                 queue = self.get_internal_queue(thread_id)
                 queue.put(int_cmd)
+            self.notify_thread('*')
 
         else:
             queue = self.get_internal_queue(thread_id)
             queue.put(int_cmd)
+            self.notify_thread(thread_id)
+
+    def get_suspended_event(self, thread_id):
+        ''' returns the event a suspended thread waits on for new commands or for a state change '''
+        try:
+            return self._thread_id_to_suspended_event[thread_id]
+        except KeyError:
+            return self._thread_id_to_suspended_event.setdefault(thread_id, threading.Event())
+
+    def notify_thread(self, thread_id):
+        ''' wakes up the given thread if it's suspended (if thread_id is *, wakes up all) '''
+        if thread_id == "*":
+            for event in list(dict_values(self._thread_id_to_suspended_event)):
+                event.set()
+        else:
+            if thread_id.startswith('__frame__'):
+                thread_id = thread_id[thread_id.rfind('|') + 1:]
+            event = self._thread_id_to_suspended_event.get(thread_id)
+            if event is not None:
+                event.set()
 
     def enable_output_redirection(self, redirect_stdout, redirect_stderr):
         global bufferStdOutToServer
@@ -470,6 +536,8 @@ class PyDB:
 
         with self._lock_running_thread_ids if use_lock else NULL:
             thread = self._running_thread_ids.pop(thread_id, None)
+            self._thread_id_to_suspended_event.pop(thread_id, None)
+            self._cmd_queue.pop(thread_id, None)
             if thread is None:
                 return
 
@@ -479,99 +547,124 @@ class PyDB:
 
         self.writer.add_command(self.cmd_factory.make_thread_killed_message(thread_id))
 
+    def _reconcile_running_threads(self):
+        '''
+        Compares the threads alive with the ones already notified (notifying about the created and finished ones).
+
+        :return bool:
+            Whether some program thread is still alive (if not, the debug session is finished).
+        '''
+        program_threads_alive = {}
+        all_threads = threadingEnumerate()
+        program_threads_dead = []
+        with self._lock_running_thread_ids:
+            for t in all_threads:
+                if getattr(t, 'is_pydev_daemon_thread', False):
+                    pass # I.e.: skip the DummyThreads created from pydev daemon threads
+                elif isinstance(t, PyDBDaemonThread):
+                    pydev_log.error_once('Error in debugger: Found PyDBDaemonThread not marked with is_pydev_daemon_thread=True.\n')
+
+                elif is_thread_alive(t):
+                    if not self._running_thread_ids:
+                        # Fix multiprocessing debug with breakpoints in both main and child processes
+                        # (https://youtrack.jetbrains.com/issue/PY-17092) When the new process is created, the main
+                        # thread in the new process already has the attribute 'pydevd_id', so the new thread doesn't
+                        # get new id with its process number and the debugger loses access to both threads.
+                        # Therefore we should update thread_id for every main thread in the new process.
+
+                        # Fix it for all existing threads.
+                        for existing_thread in all_threads:
+                            old_thread_id = get_thread_id(existing_thread)
+                            clear_cached_thread_id(t)
+
+                            thread_id = get_thread_id(t)
+                            if thread_id != old_thread_id:
+                                if pydevd_vars.has_additional_frames_by_id(old_thread_id):
+                                    frames_by_id = pydevd_vars.get_additional_frames_by_id(old_thread_id)
+                                    pydevd_vars.add_additional_frame_by_id(thread_id, frames_by_id)
+
+                    thread_id = get_thread_id(t)
+                    program_threads_alive[thread_id] = t
+
+                    self.notify_thread_created(thread_id, t, use_lock=False)
+
+            # Compute and notify about threads which are no longer alive.
+            thread_ids = list(self._running_thread_ids.keys())
+            for thread_id in thread_ids:
+                if thread_id not in program_threads_alive:
+                    program_threads_dead.append(thread_id)
+
+            for thread_id in program_threads_dead:
+                self.notify_thread_not_alive(thread_id, use_lock=False)
+
+        # Without self._lock_running_thread_ids
+        if len(program_threads_alive) == 0:
+            self.finish_debugging_session()
+            for t in all_threads:
+                if hasattr(t, 'do_kill_pydev_thread'):
+                    t.do_kill_pydev_thread()
+            return False
+        return True
+
     def process_internal_commands(self):
         '''This function processes internal commands
         '''
         with self._main_lock:
             self.check_output_redirect()
 
-            program_threads_alive = {}
-            all_threads = threadingEnumerate()
-            program_threads_dead = []
-            with self._lock_running_thread_ids:
-                for t in all_threads:
-                    if getattr(t, 'is_pydev_daemon_thread', False):
-                        pass # I.e.: skip the DummyThreads created from pydev daemon threads
-                    elif isinstance(t, PyDBDaemonThread):
-                        pydev_log.error_once('Error in debugger: Found PyDBDaemonThread not marked with is_pydev_daemon_thread=True.\n')
-
-                    elif is_thread_alive(t):
-                        if not self._running_thread_ids:
-                            # Fix multiprocessing debug with breakpoints in both main and child processes
-                            # (https://youtrack.jetbrains.com/issue/PY-17092) When the new process is created, the main
-                            # thread in the new process already has the attribute 'pydevd_id', so the new thread doesn't
-                            # get new id with its process number and the debugger loses access to both threads.
-                            # Therefore we should update thread_id for every main thread in the new process.
-
-                            # Fix it for all existing threads.
-                            for existing_thread in all_threads:
-                                old_thread_id = get_thread_id(existing_thread)
-                                clear_cached_thread_id(t)
-
-                                thread_id = get_thread_id(t)
-                                if thread_id != old_thread_id:
-                                    if pydevd_vars.has_additional_frames_by_id(old_thread_id):
-                                        frames_by_id = pydevd_vars.get_additional_frames_by_id(old_thread_id)
-                                        pydevd_vars.add_additional_frame_by_id(thread_id, frames_by_id)
-
-                        thread_id = get_thread_id(t)
-                        program_threads_alive[thread_id] = t
-
-                        self.notify_thread_created(thread_id, t, use_lock=False)
-
-                # Compute and notify about threads which are no longer alive.
-                thread_ids = list(self._running_thread_ids.keys())
-                for thread_id in thread_ids:
-                    if thread_id not in program_threads_alive:
-                        program_threads_dead.append(thread_id)
-
-                for thread_id in program_threads_dead:
-                    self.notify_thread_not_alive(thread_id, use_lock=False)
-
-            # Without self._lock_running_thread_ids
-            if len(program_threads_alive) == 0:
-                self.finish_debugging_session()
-                for t in all_threads:
-                    if hasattr(t, 'do_kill_pydev_thread'):
-                        t.do_kill_pydev_thread()
-            else:
-                # Actually process the commands now (make sure we don't have a lock for _lock_running_thread_ids
-                # acquired at this point as it could lead to a deadlock if some command evaluated tried to
-                # create a thread and wait for it -- which would try to notify about it getting that lock).
-                curr_thread_id = None
-                for thread_id in program_threads_alive:
-                    queue = self.get_internal_queue(thread_id)
-                    cmdsToReadd = []  # some commands must be processed by the thread itself... if that's the case,
-                                        # we will re-add the commands to the queue after executing.
-                    try:
-                        while True:
-                            int_cmd = queue.get(False)
-
-                            if not self.mpl_hooks_in_debug_console and isinstance(int_cmd, InternalConsoleExec):
-                                # add import hooks for matplotlib patches if only debug console was started
-                                try:
-                                    self.init_matplotlib_in_debug_console()
-                                    self.mpl_in_use = True
-                                except:
-                                    pydevd_log(2, "Matplotlib support in debug console failed", traceback.format_exc())
-                                self.mpl_hooks_in_debug_console = True
-
-                            if curr_thread_id is None:
-                                # Lazily get the current thread id.
-                                curr_thread_id = get_thread_id(threadingCurrentThread())
-
-                            if int_cmd.can_be_executed_by(curr_thread_id):
-                                pydevd_log(2, "processing internal command ", str(int_cmd))
-                                int_cmd.do_it(self)
-                            else:
-                                pydevd_log(2, "NOT processing internal command ", str(int_cmd))
-                                cmdsToReadd.append(int_cmd)
-
-
-                    except _queue.Empty: #@UndefinedVariable
-                        # this is how we exit
-                        for int_cmd in cmdsToReadd:
-                            queue.put(int_cmd)
+            curr_time = time.time()
+            if not self._thread_lifecycle_hooks_installed or curr_time >= self._next_threads_reconcile_time:
+                # When the hooks from pydev_monkey are installed (see: patch_threads), threads are notified as
+                # created/finished as they start/stop, so, scanning all the threads is just a fallback for threads
+                # not started through those hooks (i.e.: threads created before the debugger or from C) and is
+                # only done periodically.
+                self._next_threads_reconcile_time = curr_time + THREADS_RECONCILE_INTERVAL
+                if not self._reconcile_running_threads():
+                    return
+
+            # Actually process the commands now (make sure we don't have a lock for _lock_running_thread_ids
+            # acquired at this point as it could lead to a deadlock if some command evaluated tried to
+            # create a thread and wait for it -- which would try to notify about it getting that lock).
+            # Note: only the queues of running threads which actually have pending commands are drained.
+            curr_thread_id = None
+            for thread_id, queue in dict_items(self._cmd_queue):
+                if queue.empty() or thread_id not in self._running_thread_ids:
+                    continue
+
+                cmdsToReadd = []  # some commands must be processed by the thread itself... if that's the case,
+                                  # we will re-add the commands to the queue after executing.
+                try:
+                    while True:
+                        int_cmd = queue.get(False)
+
+                        if not self.mpl_hooks_in_debug_console and isinstance(int_cmd, InternalConsoleExec):
+                            # add import hooks for matplotlib patches if only debug console was started
+                            try:
+                                self.init_matplotlib_in_debug_console()
+                                self.mpl_in_use = True
+                            except:
+                                pydevd_log(2, "Matplotlib support in debug console failed", traceback.format_exc())
+                            self.mpl_hooks_in_debug_console = True
+
+                        if curr_thread_id is None:
+                            # Lazily get the current thread id.
+                            curr_thread_id = get_thread_id(threadingCurrentThread())
+
+                        if int_cmd.can_be_executed_by(curr_thread_id):
+                            pydevd_log(2, "processing internal command ", str(int_cmd))
+                            initial_time = time.time()
+                            int_cmd.do_it(self)
+                            command_stats.add_internal_command(
+                                int_cmd.__class__.__name__, initial_time - int_cmd.posted_time, time.time() - initial_time)
+                        else:
+                            pydevd_log(2, "NOT processing internal command ", str(int_cmd))
+                            cmdsToReadd.append(int_cmd)
+
+
+                except _queue.Empty: #@UndefinedVariable
+                    # this is how we exit
+                    for int_cmd in cmdsToReadd:
+                        queue.put(int_cmd)
 
     def disable_tracing_while_running_if_frame_eval(self):
         pydevd_tracing.settrace_while_running_if_frame_eval(self, self.dummy_trace_dispatch)
@@ -579,16 +672,21 @@ class PyDB:
     def enable_tracing_in_frames_while_running_if_frame_eval(self):
         pydevd_tracing.settrace_while_running_if_frame_eval(self, self.trace_dispatch)
 
-    def set_tracing_for_untraced_contexts_if_not_frame_eval(self, ignore_frame=None, overwrite_prev_trace=False):
+    def set_tracing_for_untraced_contexts_if_not_frame_eval(self, ignore_frame=None, overwrite_prev_trace=False, file=None):
         if self.frame_eval_func is not None:
             return
-        self.set_tracing_for_untraced_contexts(ignore_frame, overwrite_prev_trace)
+        self.set_tracing_for_untraced_contexts(ignore_frame, overwrite_prev_trace, file)
 
-    def set_tracing_for_untraced_contexts(self, ignore_frame=None, overwrite_prev_trace=False):
+    def set_tracing_for_untraced_contexts(self, ignore_frame=None, overwrite_prev_trace=False, file=None):
         # Enable the tracing for existing threads (because there may be frames being executed that
         # are currently untraced).
+        # If a (canonical) file is given, only the frames whose code belongs to that file are changed
+        # (i.e.: when only the breakpoints of that file were changed).
         if self.frame_eval_func is not None:
             return
+        if pydevd_sys_monitoring.is_monitoring_active():
+            # sys.monitoring reports events for all the frames (there are no untraced contexts).
+            return
         threads = threadingEnumerate()
         try:
             for t in threads:
@@ -599,7 +697,10 @@ class PyDB:
                 frame = additional_info.get_topmost_frame(t)
                 try:
                     if frame is not None and frame is not ignore_frame:
-                        self.set_trace_for_frame_and_parents(frame, overwrite_prev_trace=overwrite_prev_trace)
+                        if file is None:
+                            self.set_trace_for_frame_and_parents(frame, overwrite_prev_trace=overwrite_prev_trace)
+                        else:
+                            self._set_trace_for_frames_in_file(frame, file, overwrite_prev_trace)
                 finally:
                     frame = None
         finally:
@@ -615,11 +716,47 @@ class PyDB:
             break_dict[pybreakpoint.line] = pybreakpoint
 
         breakpoints[file] = break_dict
-        self.clear_skip_caches()
+        if breakpoints is self.breakpoints:
+            # Line breakpoints only affect the skip decisions for the code in their own file.
+            self.clear_skip_caches_for_file(file)
+        else:
+            self.clear_skip_caches()
 
     def clear_skip_caches(self):
         global_cache_skips.clear()
         global_cache_frame_skips.clear()
+        self.code_to_trace_verdict.clear()
+        self.on_breakpoints_changed()
+
+    def on_breakpoints_changed(self):
+        # Locations disabled in sys.monitoring may have a breakpoint now.
+        pydevd_sys_monitoring.restart_events()
+        if self.increment_breakpoints_generation is not None:
+            # The code checked by the frame evaluation must be checked again.
+            self.increment_breakpoints_generation()
+
+    def clear_skip_caches_for_file(self, file):
+        '''
+        Removes from the skip caches only the entries related to the code of the given (canonical) file.
+        '''
+        # Keys are: (co_firstlineno, co_name, co_filename) or ((co_firstlineno, co_name, co_filename), line).
+        co_filename_to_matches = {}
+        for cache in (global_cache_skips, global_cache_frame_skips):
+            for key in dict_keys(cache):
+                co_filename = key[2] if len(key) == 3 else key[0][2]
+                matches = co_filename_to_matches.get(co_filename)
+                if matches is None:
+                    matches = co_filename_to_matches[co_filename] = \
+                        get_abs_path_real_path_and_base_from_file(co_filename)[1] == file
+                if matches:
+                    cache.pop(key, None)
+
+        self.on_breakpoints_changed()
+
+    def start_sys_monitoring_if_enabled(self):
+        if self.use_sys_monitoring and pydevd_sys_monitoring.start_monitoring(self):
+            # sys.monitoring takes the place of both: the tracing function and the frame evaluation.
+            self.frame_eval_func = None
 
     def add_break_on_exception(
         self,
@@ -645,6 +782,9 @@ class PyDB:
             pydev_log.error("Error unable to add break on exception for: %s (exception could not be imported)\n" % (exception,))
             return None
 
+        for error in eb.get_compile_errors():
+            pydev_log.error("Error compiling break on exception for: %s:\n%s\n" % (exception, error))
+
         if eb.notify_on_unhandled_exceptions:
             cp = self.break_on_uncaught_exceptions.copy()
             cp[exception] = eb
@@ -659,6 +799,7 @@ class PyDB:
                 pydev_log.error("Exceptions to hook always: %s\n" % (cp,))
             self.break_on_caught_exceptions = cp
 
+        clear_exception_breakpoint_cache()
         return eb
 
 
@@ -672,6 +813,7 @@ class PyDB:
             info.pydev_step_cmd = CMD_STEP_INTO
 
         thread.stop_reason = stop_reason
+        pydevd_sys_monitoring.update_thread_events(thread, info)
 
         # If conditional breakpoint raises any exception during evaluation send details to Java
         if stop_reason == CMD_SET_BREAK and self.suspend_on_breakpoint_exception:
@@ -756,7 +898,7 @@ class PyDB:
             self._main_lock.release()
 
     def do_wait_suspend(self, thread, frame, event, arg, suspend_type="trace", send_suspend_message=True): #@UnusedVariable
-        """ busy waits until the thread state changes to RUN
+        """ waits until the thread state changes to RUN (processing the commands posted to it)
         it expects thread's state as attributes of the thread.
         Upon running, processes any outstanding Stepping commands.
         """
@@ -765,11 +907,16 @@ class PyDB:
                                 # can retrieve it later.
         
         if send_suspend_message:
+            # Don't keep the output written before the thread was suspended.
+            flush_redirected_output()
             message = thread.additional_info.pydev_message
             cmd = self.cmd_factory.make_thread_suspend_message(get_thread_id(thread), frame, thread.stop_reason, message, suspend_type)
             thread_stack_str = cmd.thread_stack_str
             self.writer.add_command(cmd)
 
+        # Frames are looked up by id in the commands received while suspended.
+        pydevd_vars.add_suspended_frames(get_thread_id(thread), frame)
+
         with CustomFramesContainer.custom_frames_lock:  # @UndefinedVariable
             from_this_thread = []
 
@@ -787,15 +934,25 @@ class PyDB:
             # before every stop check if matplotlib modules were imported inside script code
             self._activate_mpl_if_needed()
 
+        # Instead of polling, wait until a command is posted to this thread or its state is changed
+        # (see: post_internal_command and notify_thread).
+        suspended_event = self.get_suspended_event(get_thread_id(thread))
         while info.pydev_state == STATE_SUSPEND and not self._finish_debugging_session:
             if self.mpl_in_use:
                 # call input hooks if only matplotlib is in use
                 self._call_mpl_hook()
 
+            suspended_event.clear()
             self.process_internal_commands()
-            time.sleep(0.01)
+            if info.pydev_state == STATE_SUSPEND and not self._finish_debugging_session:
+                # Note: the input hooks must still be called periodically when matplotlib is in use (the timeout
+                # is also a safety net for state changes without a notification).
+                suspended_event.wait(0.01 if self.mpl_in_use else 0.5)
 
         self.cancel_async_evaluation(get_thread_id(thread), str(id(frame)))
+        # The handles given to the variables (and the frames indexed) are only valid while the thread is suspended.
+        pydevd_vars.remove_variable_handles(get_thread_id(thread))
+        pydevd_vars.remove_suspended_frames(get_thread_id(thread))
 
         # process any stepping instructions
         if info.pydev_step_cmd == CMD_STEP_INTO or info.pydev_step_cmd == CMD_STEP_INTO_MY_CODE:
@@ -859,6 +1016,8 @@ class PyDB:
                 info.pydev_step_cmd = -1
                 info.pydev_state = STATE_RUN
 
+        pydevd_sys_monitoring.update_thread_events(thread, info)
+
         if self.frame_eval_func is not None and info.pydev_state == STATE_RUN:
             if info.pydev_step_cmd == -1:
                 if not self.do_not_use_frame_eval:
@@ -914,6 +1073,13 @@ class PyDB:
             frame = frame.f_back
         del frame
 
+    def _set_trace_for_frames_in_file(self, frame, file, overwrite_prev_trace):
+        while frame is not None:
+            if get_abs_path_real_path_and_base_from_file(frame.f_code.co_filename)[1] == file:
+                self.update_trace(frame, self.trace_dispatch, overwrite_prev_trace)
+            frame = frame.f_back
+        del frame
+
     def update_trace(self, frame, dispatch_func, overwrite_prev):
         if frame.f_trace is None:
             frame.f_trace = dispatch_func
@@ -944,12 +1110,14 @@ class PyDB:
         try:
             # not available in jython!
             import threading
-            threading.settrace(self.trace_dispatch)  # for all future threads
+            if not pydevd_sys_monitoring.is_monitoring_active():
+                threading.settrace(self.trace_dispatch)  # for all future threads
         except:
             pass
 
         from _pydev_bundle.pydev_monkey import patch_thread_modules
         patch_thread_modules()
+        self._thread_lifecycle_hooks_installed = True
 
     def run(self, file, globals=None, locals=None, is_module=False, set_trace=True):
         module_name = None
@@ -1034,6 +1202,8 @@ class PyDB:
                 # or if there are plugin exception breakpoints or if collecting run-time types is enabled
                 self.frame_eval_func = None
 
+            self.start_sys_monitoring_if_enabled()
+
             # call prepare_to_run when we already have all information about breakpoints
             self.prepare_to_run()
 
@@ -1078,7 +1248,11 @@ class PyDB:
         This function should have frames tracked by unhandled exceptions (the `_exec` name is important).
         '''
         if not is_module:
-            pydev_imports.execfile(file, globals, locals)  # execute the script
+            if pydevd_code_patching.is_code_patching_active():
+                # The script isn't imported, so, the breakpoints must be inserted in its code here.
+                pydevd_code_patching.execfile(file, globals, locals)
+            else:
+                pydev_imports.execfile(file, globals, locals)  # execute the script
         else:
             # treat ':' as a separator between module and entry point function
             # if there is no entry point we run we same as with -m switch. Otherwise we perform
@@ -1103,6 +1277,7 @@ class PyDB:
     def exiting(self):
         sys.stdout.flush()
         sys.stderr.flush()
+        flush_redirected_output()
         self.check_output_redirect()
         cmd = self.cmd_factory.make_exit_message()
         self.writer.add_command(cmd)
@@ -1128,9 +1303,12 @@ class PyDB:
             time.sleep(0.01)
 
     trace_dispatch = _trace_dispatch
-    frame_eval_func = frame_eval_func
-    dummy_trace_dispatch = dummy_trace_dispatch
-    enable_cache_frames_without_breaks = enable_cache_frames_without_breaks
+    # Note: staticmethod because these may be regular python functions (when patching the code).
+    frame_eval_func = staticmethod(frame_eval_func)
+    use_sys_monitoring = pydevd_sys_monitoring.use_sys_monitoring
+    dummy_trace_dispatch = staticmethod(dummy_trace_dispatch)
+    enable_cache_frames_without_breaks = staticmethod(enable_cache_frames_without_breaks)
+    increment_breakpoints_generation = staticmethod(increment_breakpoints_generation)
 
 def set_debug(setup):
     setup['DEBUG_RECORD_SOCKET_READS'] = True
@@ -1153,11 +1331,22 @@ def dump_threads(stream=None):
 def usage(doExit=0):
     sys.stdout.write('Usage:\n')
     sys.stdout.write('pydevd.py --port N [(--client hostname) | --server] --file executable [file_options]\n')
+    sys.stdout.write('pydevd.py --unix-socket PATH [--server] --file executable [file_options]\n')
+    sys.stdout.write('pydevd.py --inherited-fd N --file executable [file_options]\n')
     if doExit:
         sys.exit(0)
 
 
 class _CustomWriter(object):
+    '''
+    The output written is kept to be sent to the IDE in a single message along with the output written
+    afterwards (it's sent when it's big enough for a message, after OUTPUT_FLUSH_DELAY seconds or when flushed).
+    '''
+
+    # Only one writer has output pending at a time (the output of a writer is sent before other writer keeps
+    # its output, so that the IDE receives it in the same order it was written).
+    _lock = threading.RLock()
+    _writer_with_pending_output = None
 
     def __init__(self, out_ctx, wrap_stream, wrap_buffer, on_write=None):
         '''
@@ -1181,9 +1370,43 @@ class _CustomWriter(object):
         if wrap_buffer:
             self.buffer = _CustomWriter(out_ctx, wrap_stream, wrap_buffer=False, on_write=on_write)
         self._on_write = on_write
+        self._pending = []
+        self._pending_size = 0
+        self._pending_time = 0
+        self._dropped_size = 0
 
     def flush(self):
-        pass  # no-op here
+        with _CustomWriter._lock:
+            self._send_pending()
+
+    def _send_pending(self):
+        # Note: must be called with the lock held.
+        if not self._pending:
+            return
+
+        s = ''.join(self._pending)
+        self._pending = []
+        self._pending_size = 0
+        _CustomWriter._writer_with_pending_output = None
+
+        py_db = get_global_debugger()
+        if py_db is None or py_db.writer is None:
+            return
+
+        writer = py_db.writer
+        if OUTPUT_HIGH_WATER_MARK > 0 and not writer.wait_pending_output_below(OUTPUT_HIGH_WATER_MARK, OUTPUT_BLOCK_TIMEOUT):
+            # The IDE is not reading the output as fast as it's written.
+            self._dropped_size += len(s)
+            return
+
+        if self._dropped_size:
+            writer.add_command(py_db.cmd_factory.make_io_message(
+                '\n[pydevd: %s characters of output discarded]\n' % (self._dropped_size,), self._out_ctx))
+            self._dropped_size = 0
+
+        # Note that the actual message contents will be a xml with utf-8, although
+        # the entry is str on py3 and bytes on py2.
+        writer.add_command(py_db.cmd_factory.make_io_message(s, self._out_ctx))
 
     def write(self, s):
         if self._on_write is not None:
@@ -1201,12 +1424,32 @@ class _CustomWriter(object):
                 if isinstance(s, bytes):
                     s = s.decode(self.encoding, errors='replace')
 
-            py_db = get_global_debugger()
-            if py_db is not None:
-                # Note that the actual message contents will be a xml with utf-8, although
-                # the entry is str on py3 and bytes on py2.
-                cmd = py_db.cmd_factory.make_io_message(s, self._out_ctx)
-                py_db.writer.add_command(cmd)
+            if get_global_debugger() is not None:
+                with _CustomWriter._lock:
+                    writer_with_pending_output = _CustomWriter._writer_with_pending_output
+                    if writer_with_pending_output is not None and writer_with_pending_output is not self:
+                        writer_with_pending_output._send_pending()
+                    elif self._pending_size + len(s) > MAX_IO_MSG_SIZE:
+                        self._send_pending()
+
+                    if not self._pending:
+                        self._pending_time = time.time()
+                        _CustomWriter._writer_with_pending_output = self
+                    self._pending.append(s)
+                    self._pending_size += len(s)
+
+                    if self._pending_size >= MAX_IO_MSG_SIZE or time.time() - self._pending_time >= OUTPUT_FLUSH_DELAY:
+                        self._send_pending()
+
+
+def flush_redirected_output():
+    '''
+    Sends the output kept to be sent along with the output written afterwards.
+    '''
+    with _CustomWriter._lock:
+        writer = _CustomWriter._writer_with_pending_output
+        if writer is not None:
+            writer._send_pending()
 
 
 def init_stdout_redirect(on_write=None):
@@ -1239,6 +1482,7 @@ def settrace(
     overwrite_prev_trace=False,
     patch_multiprocessing=False,
     stop_at_frame=None,
+    unix_socket=None,
     ):
     '''Sets the tracing function with the pydev debug function and initializes needed facilities.
 
@@ -1265,6 +1509,9 @@ def settrace(
 
     @param stop_at_frame: if passed it'll stop at the given frame, otherwise it'll stop in the function which
         called this method.
+
+    @param unix_socket: if passed, the connection to the debug server is done through the unix domain socket
+        at the given path (and not through the host/port).
     '''
     _set_trace_lock.acquire()
     try:
@@ -1278,6 +1525,7 @@ def settrace(
             overwrite_prev_trace,
             patch_multiprocessing,
             stop_at_frame,
+            unix_socket,
         )
     finally:
         _set_trace_lock.release()
@@ -1296,6 +1544,7 @@ def _locked_settrace(
     overwrite_prev_trace,
     patch_multiprocessing,
     stop_at_frame,
+    unix_socket,
     ):
     if patch_multiprocessing:
         try:
@@ -1323,10 +1572,12 @@ def _locked_settrace(
                 'port': int(port),
                 'multiprocess': patch_multiprocessing,
             }
+            if unix_socket:
+                setup['unix-socket'] = unix_socket
             SetupHolder.setup = setup
 
         debugger = PyDB()
-        debugger.connect(host, port)  # Note: connect can raise error.
+        debugger.connect(host, port, unix_socket=unix_socket)  # Note: connect can raise error.
 
         # Mark connected only if it actually succeeded.
         connected = True
@@ -1357,6 +1608,8 @@ def _locked_settrace(
         while not debugger.ready_to_run:
             time.sleep(0.1)  # busy wait until we receive run command
 
+        debugger.start_sys_monitoring_if_enabled()
+
         global forked
         frame_eval_for_tracing = debugger.frame_eval_func
         if frame_eval_func is not None and not forked:
@@ -1414,6 +1667,7 @@ def stoptrace():
     if connected:
         pydevd_tracing.restore_sys_set_trace_func()
         sys.settrace(None)
+        pydevd_sys_monitoring.stop_monitoring()
         try:
             #not available in jython!
             threading.settrace(None) # for all future threads
@@ -1514,6 +1768,7 @@ def settrace_forked():
                 trace_only_current_thread=False,
                 overwrite_prev_trace=True,
                 patch_multiprocessing=True,
+                unix_socket=SetupHolder.setup.get('unix-socket') if SetupHolder.setup else None,
         )
 
 #=======================================================================================================================
@@ -1715,7 +1970,8 @@ def main():
         apply_debugger_options(setup)
 
         try:
-            debugger.connect(host, port)
+            debugger.connect(
+                host, port, unix_socket=setup['unix-socket'], inherited_fd=setup['inherited-fd'], server=setup['server'])
         except:
             sys.stderr.write("Could not connect to %s: %s\n" % (host, port))
             traceback.print_exc()
@@ -25,6 +25,7 @@ class TracingFunctionHolder:
     _lock = thread.allocate_lock()
     _traceback_limit = 1
     _warnings_shown = {}
+    _use_sys_monitoring = False  # When True the events come from sys.monitoring (see pydevd_sys_monitoring).
  
  
 def get_exception_traceback_str():
@@ -75,6 +76,10 @@ def SetTrace(tracing_func, frame_eval_func=None, dummy_tracing_func=None, apply_
         frame_eval_func()
         tracing_func = dummy_tracing_func
 
+    if tracing_func is not None and TracingFunctionHolder._use_sys_monitoring:
+        # sys.monitoring already reports the events for all the threads (no tracing function needed).
+        tracing_func = None
+
     if TracingFunctionHolder._original_tracing is None:
         #This may happen before replace_sys_set_trace_func is called.
         sys.settrace(tracing_func)
@@ -130,7 +135,6 @@ def settrace_while_running_if_frame_eval(py_db, trace_func):
                     py_db.set_trace_for_frame_and_parents(frame, overwrite_prev_trace=True, dispatch_func=trace_func)
                 finally:
                     frame = None
-            py_db.enable_cache_frames_without_breaks(False)
             # sometimes (when script enters new frames too fast), we can't enable tracing only in the appropriate
             # frame. So, if breakpoint was added during run, we should disable frame evaluation forever.
             py_db.do_not_use_frame_eval = True
@@ -1,243 +1,615 @@
-import debugger_unittest
-import sys
-import re
-import os
-import math
-
-CHECK_BASELINE, CHECK_REGULAR, CHECK_CYTHON = 'baseline', 'regular', 'cython'
-
-class PerformanceWriterThread(debugger_unittest.AbstractWriterThread):
-
-    CHECK = None
-
-    debugger_unittest.AbstractWriterThread.get_environ # overrides
-    def get_environ(self):
-        env = os.environ.copy()
-        if self.CHECK == CHECK_BASELINE:
-            env['PYTHONPATH'] = r'X:\PyDev.Debugger.baseline'
-        elif self.CHECK == CHECK_CYTHON:
-            env['PYDEVD_USE_CYTHON'] = 'YES'
-        elif self.CHECK == CHECK_REGULAR:
-            env['PYDEVD_USE_CYTHON'] = 'NO'
-        else:
-            raise AssertionError("Don't know what to check.")
-        return env
-
-    debugger_unittest.AbstractWriterThread.get_pydevd_file # overrides
-    def get_pydevd_file(self):
-        if self.CHECK == CHECK_BASELINE:
-            return os.path.abspath(os.path.join(r'X:\PyDev.Debugger.baseline', 'pydevd.py'))
-        dirname = os.path.dirname(__file__)
-        dirname = os.path.dirname(dirname)
-        return os.path.abspath(os.path.join(dirname, 'pydevd.py'))
-
-
-class WriterThreadPerformance1(PerformanceWriterThread):
-
-    TEST_FILE = debugger_unittest._get_debugger_test_file('_performance_1.py')
-    BENCHMARK_NAME = 'method_calls_with_breakpoint'
-
-    def run(self):
-        self.start_socket()
-        self.write_add_breakpoint(17, 'method')
-        self.write_make_initial_run()
-        self.finished_ok = True
-
-class WriterThreadPerformance2(PerformanceWriterThread):
-
-    TEST_FILE = debugger_unittest._get_debugger_test_file('_performance_1.py')
-    BENCHMARK_NAME = 'method_calls_without_breakpoint'
-
-    def run(self):
-        self.start_socket()
-        self.write_make_initial_run()
-        self.finished_ok = True
-
-class WriterThreadPerformance3(PerformanceWriterThread):
-
-    TEST_FILE = debugger_unittest._get_debugger_test_file('_performance_1.py')
-    BENCHMARK_NAME = 'method_calls_with_step_over'
-
-    def run(self):
-        self.start_socket()
-        self.write_add_breakpoint(26, None)
-
-        self.write_make_initial_run()
-        thread_id, frame_id, line = self.wait_for_breakpoint_hit('111', True)
-
-        self.write_step_over(thread_id)
-        thread_id, frame_id, line = self.wait_for_breakpoint_hit('108', True)
-
-        self.write_run_thread(thread_id)
-        self.finished_ok = True
-
-class WriterThreadPerformance4(PerformanceWriterThread):
-
-    TEST_FILE = debugger_unittest._get_debugger_test_file('_performance_1.py')
-    BENCHMARK_NAME = 'method_calls_with_exception_breakpoint'
-
-    def run(self):
-        self.start_socket()
-        self.write_add_exception_breakpoint('ValueError')
-
-        self.write_make_initial_run()
-        self.finished_ok = True
-
-class WriterThreadPerformance5(PerformanceWriterThread):
-
-    TEST_FILE = debugger_unittest._get_debugger_test_file('_performance_2.py')
-    BENCHMARK_NAME = 'global_scope_1_with_breakpoint'
-
-    def run(self):
-        self.start_socket()
-        self.write_add_breakpoint(23, None)
-
-        self.write_make_initial_run()
-        self.finished_ok = True
-        
-class WriterThreadPerformance6(PerformanceWriterThread):
-
-    TEST_FILE = debugger_unittest._get_debugger_test_file('_performance_3.py')
-    BENCHMARK_NAME = 'global_scope_2_with_breakpoint'
-
-    def run(self):
-        self.start_socket()
-        self.write_add_breakpoint(17, None)
-
-        self.write_make_initial_run()
-        self.finished_ok = True
-
-
-class CheckDebuggerPerformance(debugger_unittest.DebuggerRunner):
-
-    def get_command_line(self):
-        return [sys.executable]
-
-    def _get_time_from_result(self, result):
-        stdout = ''.join(result['stdout'])
-        match = re.search(r'TotalTime>>((\d|\.)+)<<', stdout)
-        time_taken = match.group(1)
-        return float(time_taken)
-
-    def obtain_results(self, writer_thread_class):
-        runs = 5
-        all_times = []
-        for _ in range(runs):
-            all_times.append(self._get_time_from_result(self.check_case(writer_thread_class)))
-            print('partial for: %s: %.3fs' % (writer_thread_class.BENCHMARK_NAME, all_times[-1]))
-        all_times.remove(min(all_times))
-        all_times.remove(max(all_times))
-        time_when_debugged = sum(all_times) / float(len(all_times))
-
-        args = self.get_command_line()
-        args.append(writer_thread_class.TEST_FILE)
-        # regular_time = self._get_time_from_result(self.run_process(args, writer_thread=None))
-        # simple_trace_time = self._get_time_from_result(self.run_process(args+['--regular-trace'], writer_thread=None))
-
-        if 'SPEEDTIN_AUTHORIZATION_KEY' in os.environ:
-
-            SPEEDTIN_AUTHORIZATION_KEY = os.environ['SPEEDTIN_AUTHORIZATION_KEY']
-
-            # sys.path.append(r'X:\speedtin\pyspeedtin')
-            import pyspeedtin # If the authorization key is there, pyspeedtin must be available
-            import pydevd
-            pydevd_cython_project_id, pydevd_pure_python_project_id = 6, 7
-            if writer_thread_class.CHECK == CHECK_BASELINE:
-                project_ids = (pydevd_cython_project_id, pydevd_pure_python_project_id)
-            elif writer_thread_class.CHECK == CHECK_REGULAR:
-                project_ids = (pydevd_pure_python_project_id,)
-            elif writer_thread_class.CHECK == CHECK_CYTHON:
-                project_ids = (pydevd_cython_project_id,)
-            else:
-                raise AssertionError('Wrong check: %s' % (writer_thread_class.CHECK))
-            for project_id in project_ids:
-                api = pyspeedtin.PySpeedTinApi(authorization_key=SPEEDTIN_AUTHORIZATION_KEY, project_id=project_id)
-                
-                benchmark_name = writer_thread_class.BENCHMARK_NAME
-                
-                if writer_thread_class.CHECK == CHECK_BASELINE:
-                    version = '0.0.1_baseline'
-                    return # No longer commit the baseline (it's immutable right now).
-                else:
-                    version=pydevd.__version__,
-                
-                commit_id, branch, commit_date = api.git_commit_id_branch_and_date_from_path(pydevd.__file__)
-                api.add_benchmark(benchmark_name)
-                api.add_measurement(
-                    benchmark_name,
-                    value=time_when_debugged, 
-                    version=version,
-                    released=False,
-                    branch=branch,
-                    commit_id=commit_id,
-                    commit_date=commit_date,
-                )
-                api.commit()
-                
-        return '%s: %.3fs ' % (writer_thread_class.BENCHMARK_NAME, time_when_debugged)
-
-
-    def check_performance1(self):
-        return self.obtain_results(WriterThreadPerformance1)
-
-    def check_performance2(self):
-        return self.obtain_results(WriterThreadPerformance2)
-
-    def check_performance3(self):
-        return self.obtain_results(WriterThreadPerformance3)
-
-    def check_performance4(self):
-        return self.obtain_results(WriterThreadPerformance4)
-        
-    def check_performance5(self):
-        return self.obtain_results(WriterThreadPerformance5)
-        
-    def check_performance6(self):
-        return self.obtain_results(WriterThreadPerformance6)
-
-if __name__ == '__main__':
-    # Local times gotten:
-    #
-    # Checking: regular
-    # method_calls_with_breakpoint: 1.139s 
-    # method_calls_without_breakpoint: 0.268s 
-    # method_calls_with_step_over: 2.601s 
-    # method_calls_with_exception_breakpoint: 0.242s 
-    # global_scope_1_with_breakpoint: 3.232s 
-    # global_scope_2_with_breakpoint: 3.059s 
-    # Checking: cython
-    # method_calls_with_breakpoint: 0.587s 
-    # method_calls_without_breakpoint: 0.176s 
-    # method_calls_with_step_over: 1.240s 
-    # method_calls_with_exception_breakpoint: 0.176s 
-    # global_scope_1_with_breakpoint: 2.523s 
-    # global_scope_2_with_breakpoint: 1.483s 
-    # TotalTime for profile: 157.73s
-
-    debugger_unittest.SHOW_WRITES_AND_READS = False
-    debugger_unittest.SHOW_OTHER_DEBUG_INFO = False
-    debugger_unittest.SHOW_STDOUT = False
-
-    import time
-    start_time = time.time()
-
-    msgs = []
-    for check in (
-            # CHECK_BASELINE, -- Checks against the version checked out at X:\PyDev.Debugger.baseline.
-            CHECK_REGULAR, 
-            CHECK_CYTHON
-        ):
-        PerformanceWriterThread.CHECK = check
-        msgs.append('Checking: %s' % (check,))
-        check_debugger_performance = CheckDebuggerPerformance()
-        msgs.append(check_debugger_performance.check_performance1())
-        msgs.append(check_debugger_performance.check_performance2())
-        msgs.append(check_debugger_performance.check_performance3())
-        msgs.append(check_debugger_performance.check_performance4())
-        msgs.append(check_debugger_performance.check_performance5())
-        msgs.append(check_debugger_performance.check_performance6())
-        
-    for msg in msgs:
-        print(msg)
-
-    print('TotalTime for profile: %.2fs' % (time.time()-start_time,))
+'''
+Benchmarks the overhead of the debugger in different scenarios (breakpoints, stepping, exceptions, generators,
+threads) with each of the tracing modes (regular, cython, frame evaluation, ...).
+
+Usage:
+
+    python performance_check.py [--modes regular,cython,frame_eval] [--scenarios no_breakpoints,threads]
+        [--runs 5] [--python <executable>] [--timeout <seconds>] [--json <output.json>]
+        [--baseline <baseline.json>] [--tolerance 0.2]
+
+Notes:
+
+- Each program (see: tests_python/resources/_performance_*.py) prints the time it took (TotalTime>>...<<), so,
+  the startup of the debugger isn't measured. The time of a scenario is the median of the runs.
+
+- Each program is also run without the debugger: the overhead is the time with the debugger divided by the time
+  without it (this is what's compared to the baseline as it's less dependent on the machine than the time).
+
+- Modes which aren't available are skipped (i.e.: the cython extensions weren't compiled with
+  "python setup_cython.py build_ext --inplace" or the Python version doesn't support it).
+
+- With --baseline, the results are compared to the ones saved with --json in a previous run and the exit code is 1
+  if the overhead of some scenario is higher than the one in the baseline by more than the tolerance
+  (i.e.: 0.2 means 20% higher).
+'''
+import json
+import os
+import platform
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from _pydevd_bundle.pydevd_comm import CMD_THREAD_SUSPEND, CMD_VERSION, CMD_SET_BREAK, CMD_ADD_EXCEPTION_BREAK, \
+    CMD_RUN, CMD_STEP_OVER, CMD_THREAD_RUN
+
+try:
+    from urllib import unquote_plus
+except ImportError:
+    from urllib.parse import unquote_plus  #@Reimport @UnresolvedImport
+
+try:
+    import Queue as _queue
+except ImportError:
+    import queue as _queue  #@Reimport @UnresolvedImport
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PYDEVD_FILE = os.path.join(ROOT_DIR, 'pydevd.py')
+
+RESOURCES_DIR = os.path.join(ROOT_DIR, 'tests_python', 'resources')
+
+REASON_STOP_ON_BREAKPOINT = '111'
+REASON_STEP_OVER = '108'
+
+# Mode name -> (environment variables, code which fails if the mode isn't available).
+MODES = (
+    ('regular', {
+        'PYDEVD_USE_CYTHON': 'NO',
+    }, None),
+    ('cython', {
+        'PYDEVD_USE_CYTHON': 'YES',
+    }, 'import _pydevd_bundle.pydevd_cython_wrapper'),
+    ('frame_eval', {
+        'PYDEVD_USE_CYTHON': 'YES',
+        'PYDEVD_USE_FRAME_EVAL': 'YES',
+    }, 'import sys; assert sys.version_info >= (3, 6); import _pydevd_frame_eval.pydevd_frame_eval_cython_wrapper'),
+    ('code_patching', {
+        'PYDEVD_USE_CYTHON': 'NO',
+        'PYDEVD_USE_CODE_PATCHING': 'YES',
+    }, 'from _pydevd_frame_eval.pydevd_code_patching import IS_CODE_PATCHING_SUPPORTED; assert IS_CODE_PATCHING_SUPPORTED'),
+    ('sys_monitoring', {
+        'PYDEVD_USE_CYTHON': 'NO',
+        'PYDEVD_USE_SYS_MONITORING': 'YES',
+    }, 'import sys; sys.monitoring'),
+)
+
+MODE_NAMES = tuple(mode[0] for mode in MODES)
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+def _get_test_file(basename):
+    return os.path.join(RESOURCES_DIR, basename)
+
+
+def _get_line(filename, marker):
+    '''
+    :return int:
+        The first line (starting at 1) with the given marker.
+    '''
+    with open(filename) as stream:
+        for i, line in enumerate(stream):
+            if marker in line:
+                return i + 1
+    raise AssertionError('%s not found in %s' % (marker, filename))
+
+
+#=======================================================================================================================
+# DebuggerClient
+#=======================================================================================================================
+class DebuggerClient(object):
+    '''
+    Plays the role of the IDE for a debuggee (started with pydevd.py --client).
+    '''
+
+    def __init__(self, sock, timeout):
+        self._sock = sock
+        self._timeout = timeout
+        self._seq = -1
+        self._breakpoint_id = 0
+        self._suspends = _queue.Queue()
+        self._reader = threading.Thread(target=self._read_messages)
+        self._reader.daemon = True
+        self._reader.start()
+
+    def _read_messages(self):
+        stream = self._sock.makefile('rb')
+        try:
+            while True:
+                line = stream.readline()
+                if not line:
+                    break
+                cmd_id, _seq, text = line.decode('utf-8').rstrip('\n').split('\t', 2)
+                if int(cmd_id) == CMD_THREAD_SUSPEND:
+                    self._suspends.put(unquote_plus(text))
+        except Exception:
+            pass  # i.e.: socket closed.
+        finally:
+            self._suspends.put(None)
+
+    def write(self, cmd_id, text):
+        self._seq += 2  # The requests from the IDE have odd numbers.
+        self._sock.sendall(('%s\t%s\t%s\n' % (cmd_id, self._seq, text)).encode('utf-8'))
+
+    def write_version(self):
+        self.write(CMD_VERSION, '1.1\tUNIX\tID')
+
+    def write_add_breakpoint(self, filename, line, func_name='None', condition='None'):
+        self._breakpoint_id += 1
+        # Format: breakpoint_id, type, file, line, func_name, condition, expression, hit_condition, is_logpoint
+        self.write(CMD_SET_BREAK, '%s\tpython-line\t%s\t%s\t%s\t%s\tNone\tNone\tFalse' % (
+            self._breakpoint_id, filename, line, func_name, condition))
+
+    def write_add_exception_breakpoint(self, exception, notify_on_handled_exceptions=0):
+        # Format: exception, condition, expression, notify_on_handled, notify_on_unhandled, ignore_libraries
+        self.write(CMD_ADD_EXCEPTION_BREAK, '%s\t\t\t%s\t0\t0' % (exception, notify_on_handled_exceptions))
+
+    def write_make_initial_run(self):
+        self.write(CMD_RUN, '')
+
+    def write_step_over(self, thread_id):
+        self.write(CMD_STEP_OVER, thread_id)
+
+    def write_run_thread(self, thread_id):
+        self.write(CMD_THREAD_RUN, thread_id)
+
+    def wait_for_breakpoint_hit(self, reason=REASON_STOP_ON_BREAKPOINT):
+        '''
+        :return tuple(str, int):
+            The id of the thread suspended and the line where it's suspended.
+        '''
+        try:
+            text = self._suspends.get(timeout=self._timeout)
+        except _queue.Empty:
+            text = None
+        if text is None:
+            raise BenchmarkError('Thread not suspended (reason expected: %s).' % (reason,))
+
+        stop_reason = re.search(r'stop_reason="([^"]*)"', text).group(1)
+        if stop_reason != reason:
+            raise BenchmarkError('Expected stop reason: %s. Found: %s' % (reason, stop_reason))
+        thread_id = re.search(r'thread id="([^"]*)"', text).group(1)
+        line = int(re.search(r'line="(\d+)"', text).group(1))
+        return thread_id, line
+
+    def close(self):
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except:
+            pass
+        self._sock.close()
+
+
+#=======================================================================================================================
+# Benchmarks
+#=======================================================================================================================
+class _Benchmark(object):
+
+    BENCHMARK_NAME = None
+    TEST_FILE = None
+
+    def run(self, client):
+        '''
+        Sends the commands of the scenario (the program is already connected but not running).
+        '''
+        raise NotImplementedError()
+
+
+class _BenchmarkNoBreakpoints(_Benchmark):
+
+    BENCHMARK_NAME = 'no_breakpoints'
+    TEST_FILE = _get_test_file('_performance_1.py')
+
+    def run(self, client):
+        client.write_make_initial_run()
+
+
+class _BenchmarkBreakpointInOtherFile(_Benchmark):
+
+    BENCHMARK_NAME = 'breakpoint_in_other_file'
+    TEST_FILE = _get_test_file('_performance_1.py')
+
+    def run(self, client):
+        other_file = _get_test_file('_performance_2.py')
+        client.write_add_breakpoint(other_file, _get_line(other_file, 'Breakpoint here'))
+        client.write_make_initial_run()
+
+
+class _BenchmarkBreakpointInHotFunction(_Benchmark):
+
+    BENCHMARK_NAME = 'breakpoint_in_hot_function'
+    TEST_FILE = _get_test_file('_performance_1.py')
+
+    def run(self, client):
+        client.write_add_breakpoint(self.TEST_FILE, _get_line(self.TEST_FILE, 'Unreachable breakpoint here'), 'method')
+        client.write_make_initial_run()
+
+
+class _BenchmarkConditionalBreakpoint(_Benchmark):
+
+    BENCHMARK_NAME = 'conditional_breakpoint'
+    TEST_FILE = _get_test_file('_performance_1.py')
+
+    def run(self, client):
+        # The condition is evaluated in each iteration (but it's never True).
+        client.write_add_breakpoint(
+            self.TEST_FILE, _get_line(self.TEST_FILE, 'Conditional breakpoint here'), 'method', condition='i < 0')
+        client.write_make_initial_run()
+
+
+class _BenchmarkStepOver(_Benchmark):
+
+    BENCHMARK_NAME = 'step_over'
+    TEST_FILE = _get_test_file('_performance_1.py')
+
+    def run(self, client):
+        client.write_add_breakpoint(self.TEST_FILE, _get_line(self.TEST_FILE, 'Initial breakpoint for a step-over here'))
+        client.write_make_initial_run()
+        thread_id, _line = client.wait_for_breakpoint_hit()
+
+        client.write_step_over(thread_id)
+        thread_id, _line = client.wait_for_breakpoint_hit(REASON_STEP_OVER)
+        client.write_run_thread(thread_id)
+
+
+class _BenchmarkStepOverDeepRecursion(_Benchmark):
+
+    BENCHMARK_NAME = 'step_over_deep_recursion'
+    TEST_FILE = _get_test_file('_performance_recursion.py')
+
+    def run(self, client):
+        client.write_add_breakpoint(self.TEST_FILE, _get_line(self.TEST_FILE, 'Breakpoint here'), 'recurse')
+        client.write_make_initial_run()
+        thread_id, _line = client.wait_for_breakpoint_hit()
+
+        for _ in range(3):
+            client.write_step_over(thread_id)
+            thread_id, _line = client.wait_for_breakpoint_hit(REASON_STEP_OVER)
+        client.write_run_thread(thread_id)
+
+
+class _BenchmarkExceptions(_Benchmark):
+
+    BENCHMARK_NAME = 'exceptions_with_exception_breakpoint'
+    TEST_FILE = _get_test_file('_performance_exceptions.py')
+
+    def run(self, client):
+        # Each exception raised must be checked (but the one with the breakpoint is never raised).
+        client.write_add_exception_breakpoint('KeyError', notify_on_handled_exceptions=1)
+        client.write_make_initial_run()
+
+
+class _BenchmarkGenerators(_Benchmark):
+
+    BENCHMARK_NAME = 'generators_with_breakpoint'
+    TEST_FILE = _get_test_file('_performance_generators.py')
+
+    def run(self, client):
+        client.write_add_breakpoint(self.TEST_FILE, _get_line(self.TEST_FILE, 'Breakpoint here'), 'method')
+        client.write_make_initial_run()
+
+
+class _BenchmarkThreads(_Benchmark):
+
+    BENCHMARK_NAME = 'threads_with_breakpoint'
+    TEST_FILE = _get_test_file('_performance_threads.py')
+
+    def run(self, client):
+        client.write_add_breakpoint(self.TEST_FILE, _get_line(self.TEST_FILE, 'Breakpoint here'), 'method')
+        client.write_make_initial_run()
+
+
+class _BenchmarkGlobalScope1(_Benchmark):
+
+    BENCHMARK_NAME = 'global_scope_1_with_breakpoint'
+    TEST_FILE = _get_test_file('_performance_2.py')
+
+    def run(self, client):
+        client.write_add_breakpoint(self.TEST_FILE, _get_line(self.TEST_FILE, 'Breakpoint here'))
+        client.write_make_initial_run()
+
+
+class _BenchmarkGlobalScope2(_Benchmark):
+
+    BENCHMARK_NAME = 'global_scope_2_with_breakpoint'
+    TEST_FILE = _get_test_file('_performance_3.py')
+
+    def run(self, client):
+        client.write_add_breakpoint(self.TEST_FILE, _get_line(self.TEST_FILE, 'Breakpoint here'))
+        client.write_make_initial_run()
+
+
+BENCHMARKS = (
+    _BenchmarkNoBreakpoints,
+    _BenchmarkBreakpointInOtherFile,
+    _BenchmarkBreakpointInHotFunction,
+    _BenchmarkConditionalBreakpoint,
+    _BenchmarkStepOver,
+    _BenchmarkStepOverDeepRecursion,
+    _BenchmarkExceptions,
+    _BenchmarkGenerators,
+    _BenchmarkThreads,
+    _BenchmarkGlobalScope1,
+    _BenchmarkGlobalScope2,
+)
+
+BENCHMARK_NAMES = tuple(benchmark.BENCHMARK_NAME for benchmark in BENCHMARKS)
+
+
+#=======================================================================================================================
+# Runner
+#=======================================================================================================================
+def _get_environ(mode_environ):
+    env = os.environ.copy()
+    # Everything not set by the mode is disabled.
+    for name in ('PYDEVD_USE_CYTHON', 'PYDEVD_USE_FRAME_EVAL', 'PYDEVD_USE_CODE_PATCHING', 'PYDEVD_USE_SYS_MONITORING'):
+        env[name] = 'NO'
+    env.update(mode_environ)
+
+    pythonpath = env.get('PYTHONPATH')
+    env['PYTHONPATH'] = ROOT_DIR if not pythonpath else os.pathsep.join((ROOT_DIR, pythonpath))
+    return env
+
+
+def _get_mode(mode):
+    for mode_info in MODES:
+        if mode_info[0] == mode:
+            return mode_info
+    raise ValueError('Unknown mode: %s (available: %s)' % (mode, ', '.join(MODE_NAMES)))
+
+
+def get_unavailable_reason(python, mode):
+    '''
+    :return str:
+        Why the given mode can't be used with the given python (or None if it's available).
+    '''
+    _name, mode_environ, check_code = _get_mode(mode)
+    if check_code is None:
+        return None
+
+    process = subprocess.Popen(
+        [python, '-c', check_code], env=_get_environ(mode_environ), stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    output = process.communicate()[0]
+    if process.returncode != 0:
+        lines = output.decode('utf-8', 'replace').strip().splitlines()
+        return lines[-1] if lines else 'Not available.'
+    return None
+
+
+def _wait_process(process, timeout):
+    initial_time = time.time()
+    while process.poll() is None:
+        if time.time() - initial_time > timeout:
+            process.kill()
+            raise BenchmarkError('Timed out waiting for the process to finish.')
+        time.sleep(0.01)
+    return process.returncode
+
+
+def run_program(python, benchmark, env, timeout, debug=True):
+    '''
+    :return float:
+        The time (in seconds) reported by the program (with or without the debugger).
+    '''
+    stdout = tempfile.TemporaryFile()
+    stderr = tempfile.TemporaryFile()
+    client = None
+    try:
+        if debug:
+            server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            server.bind(('127.0.0.1', 0))
+            server.listen(1)
+            server.settimeout(timeout)
+            port = server.getsockname()[1]
+            args = [python, PYDEVD_FILE, '--client', '127.0.0.1', '--port', str(port), '--file', benchmark.TEST_FILE]
+        else:
+            args = [python, benchmark.TEST_FILE]
+
+        process = subprocess.Popen(args, env=env, stdout=stdout, stderr=stderr)
+        try:
+            if debug:
+                try:
+                    sock, _addr = server.accept()
+                finally:
+                    server.close()
+                client = DebuggerClient(sock, timeout)
+                client.write_version()
+                benchmark.run(client)
+            returncode = _wait_process(process, timeout)
+        finally:
+            if process.poll() is None:
+                process.kill()
+            if client is not None:
+                client.close()
+
+        stdout.seek(0)
+        output = stdout.read().decode('utf-8', 'replace')
+        match = re.search(r'TotalTime>>([\d.e+-]+)<<', output)
+        if returncode != 0 or match is None:
+            stderr.seek(0)
+            raise BenchmarkError('%s failed (exit code: %s).\nstdout:\n%s\nstderr:\n%s' % (
+                benchmark.BENCHMARK_NAME, returncode, output, stderr.read().decode('utf-8', 'replace')))
+        return float(match.group(1))
+    finally:
+        stdout.close()
+        stderr.close()
+
+
+def _median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2 == 1:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2.0
+
+
+def run_benchmarks(python=sys.executable, modes=MODE_NAMES, benchmark_names=BENCHMARK_NAMES, runs=5, timeout=120,
+                   stream=None):
+    '''
+    :return dict:
+        The results by mode: {'skipped': reason} if the mode isn't available or the results by benchmark name
+        (times of each run, median time with and without the debugger and the overhead).
+    '''
+    benchmarks = []
+    for name in benchmark_names:
+        for benchmark_class in BENCHMARKS:
+            if benchmark_class.BENCHMARK_NAME == name:
+                benchmarks.append(benchmark_class())
+                break
+        else:
+            raise ValueError('Unknown benchmark: %s (available: %s)' % (name, ', '.join(BENCHMARK_NAMES)))
+
+    def log(msg):
+        if stream is not None:
+            stream.write(msg + '\n')
+            stream.flush()
+
+    results = {
+        'python': python,
+        'platform': platform.platform(),
+        'runs': runs,
+        'modes': {},
+    }
+
+    times_without_debugger = {}
+    for mode in modes:
+        unavailable_reason = get_unavailable_reason(python, mode)
+        if unavailable_reason is not None:
+            log('Skipping mode: %s (%s)' % (mode, unavailable_reason))
+            results['modes'][mode] = {'skipped': unavailable_reason}
+            continue
+
+        env = _get_environ(_get_mode(mode)[1])
+        mode_results = results['modes'][mode] = {}
+        for benchmark in benchmarks:
+            name = benchmark.BENCHMARK_NAME
+            if name not in times_without_debugger:
+                times_without_debugger[name] = _median([
+                    run_program(python, benchmark, env, timeout, debug=False) for _ in range(runs)])
+
+            times = []
+            for _ in range(runs):
+                times.append(run_program(python, benchmark, env, timeout))
+                log('partial for: %s (%s): %.3fs' % (name, mode, times[-1]))
+
+            time_with_debugger = _median(times)
+            mode_results[name] = {
+                'times': times,
+                'time': time_with_debugger,
+                'time_without_debugger': times_without_debugger[name],
+                'overhead': time_with_debugger / max(times_without_debugger[name], 1e-6),
+            }
+    return results
+
+
+def compare_results(baseline, results, tolerance):
+    '''
+    :return list(tuple(str, str, float, float)):
+        The mode, benchmark name, overhead in the baseline and current overhead of the benchmarks whose overhead
+        is higher than the one in the baseline by more than the tolerance.
+    '''
+    regressions = []
+    for mode, mode_results in sorted(results['modes'].items()):
+        baseline_mode_results = baseline['modes'].get(mode, {})
+        if 'skipped' in mode_results or 'skipped' in baseline_mode_results:
+            continue
+        for name, benchmark_results in sorted(mode_results.items()):
+            baseline_results = baseline_mode_results.get(name)
+            if baseline_results is None:
+                continue
+            if benchmark_results['overhead'] > baseline_results['overhead'] * (1 + tolerance):
+                regressions.append((mode, name, baseline_results['overhead'], benchmark_results['overhead']))
+    return regressions
+
+
+def print_results(results, baseline=None, stream=None):
+    if stream is None:
+        stream = sys.stdout
+    for mode, mode_results in sorted(results['modes'].items()):
+        if 'skipped' in mode_results:
+            stream.write('Mode: %s (skipped: %s)\n' % (mode, mode_results['skipped']))
+            continue
+
+        stream.write('Mode: %s\n' % (mode,))
+        stream.write('%-40s %10s %10s %10s %10s\n' % ('benchmark', 'time (s)', 'no debug', 'overhead', 'baseline'))
+        baseline_mode_results = {} if baseline is None else baseline['modes'].get(mode, {})
+        for name, benchmark_results in sorted(mode_results.items()):
+            baseline_overhead = '-'
+            if name in baseline_mode_results and 'skipped' not in baseline_mode_results:
+                baseline_overhead = '%.2fx' % (baseline_mode_results[name]['overhead'],)
+            stream.write('%-40s %10.3f %10.3f %9.2fx %10s\n' % (
+                name, benchmark_results['time'], benchmark_results['time_without_debugger'],
+                benchmark_results['overhead'], baseline_overhead))
+
+
+def main(args):
+    python = sys.executable
+    modes = MODE_NAMES
+    benchmark_names = BENCHMARK_NAMES
+    runs = 5
+    timeout = 120
+    json_file = None
+    baseline_file = None
+    tolerance = 0.2
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if i + 1 >= len(args):
+            sys.stderr.write(__doc__)
+            return 1
+        i += 1
+        if arg == '--python':
+            python = args[i]
+        elif arg == '--modes':
+            modes = args[i].split(',')
+        elif arg == '--scenarios':
+            benchmark_names = args[i].split(',')
+        elif arg == '--runs':
+            runs = int(args[i])
+        elif arg == '--timeout':
+            timeout = float(args[i])
+        elif arg == '--json':
+            json_file = args[i]
+        elif arg == '--baseline':
+            baseline_file = args[i]
+        elif arg == '--tolerance':
+            tolerance = float(args[i])
+        else:
+            sys.stderr.write(__doc__)
+            return 1
+        i += 1
+
+    baseline = None
+    if baseline_file:
+        with open(baseline_file) as stream:
+            baseline = json.load(stream)
+
+    start_time = time.time()
+    results = run_benchmarks(python, modes, benchmark_names, runs, timeout, stream=sys.stdout)
+    print_results(results, baseline)
+    print('TotalTime for profile: %.2fs' % (time.time() - start_time,))
+
+    if json_file:
+        with open(json_file, 'w') as stream:
+            json.dump(results, stream, indent=4, sort_keys=True)
+
+    if baseline is not None:
+        regressions = compare_results(baseline, results, tolerance)
+        for mode, name, baseline_overhead, overhead in regressions:
+            print('Regression: %s (%s): overhead %.2fx (baseline: %.2fx)' % (name, mode, overhead, baseline_overhead))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -11,7 +11,7 @@ def method2():
 def method():
 
     for i in xrange(200000):
-        method2()
+        method2()  # Conditional breakpoint here
 
         if False:
             # Unreachable breakpoint here
@@ -0,0 +1,29 @@
+import time
+
+try:
+    xrange
+except:
+    xrange = range
+
+
+def raise_and_catch(i):
+    try:
+        raise ValueError(i)
+    except ValueError:
+        pass
+
+
+def method():
+    for i in xrange(50000):
+        raise_and_catch(i)
+
+
+def caller():
+    start_time = time.time()
+    method()
+    print('TotalTime>>%s<<' % (time.time() - start_time,))
+
+
+if __name__ == '__main__':
+    caller()
+    print('TEST SUCEEDED')
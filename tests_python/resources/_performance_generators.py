@@ -0,0 +1,37 @@
+import time
+
+try:
+    xrange
+except:
+    xrange = range
+
+
+def numbers(n):
+    for i in xrange(n):
+        yield i
+
+
+def squares(iterable):
+    for i in iterable:
+        yield i * i
+
+
+def method():
+    total = 0
+    for _ in xrange(20):
+        total += sum(squares(numbers(10000)))
+
+    if False:
+        pass  # Breakpoint here
+    return total
+
+
+def caller():
+    start_time = time.time()
+    method()
+    print('TotalTime>>%s<<' % (time.time() - start_time,))
+
+
+if __name__ == '__main__':
+    caller()
+    print('TEST SUCEEDED')
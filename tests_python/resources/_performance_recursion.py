@@ -0,0 +1,35 @@
+import time
+
+try:
+    xrange
+except:
+    xrange = range
+
+
+def method2():
+    i = 1
+
+
+def work():
+    for i in xrange(50000):
+        method2()
+
+
+def recurse(depth):
+    if depth == 0:
+        work()  # Breakpoint here (the calls are stepped over while the stack is deep)
+        work()
+        work()
+        return 0
+    return recurse(depth - 1) + 1
+
+
+def caller():
+    start_time = time.time()
+    recurse(200)
+    print('TotalTime>>%s<<' % (time.time() - start_time,))
+
+
+if __name__ == '__main__':
+    caller()
+    print('TEST SUCEEDED')
@@ -0,0 +1,34 @@
+import threading
+import time
+
+try:
+    xrange
+except:
+    xrange = range
+
+
+def method2():
+    i = 1
+
+
+def method():
+    for i in xrange(20000):
+        method2()
+
+        if False:
+            pass  # Breakpoint here
+
+
+def caller():
+    start_time = time.time()
+    threads = [threading.Thread(target=method) for _ in xrange(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    print('TotalTime>>%s<<' % (time.time() - start_time,))
+
+
+if __name__ == '__main__':
+    caller()
+    print('TEST SUCEEDED')
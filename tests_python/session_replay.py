@@ -0,0 +1,321 @@
+'''
+Replays a session recorded with PYDEVD_RECORD_SESSION (see: _pydevd_bundle/pydevd_session_recorder.py) in a new
+debuggee (without the IDE) and reports the latency of each command and the slowdown of the program being debugged.
+
+Usage:
+
+    python session_replay.py <session.gz> [--python <executable>] [--json <output.json>] [--timeout <seconds>]
+        [-- <program> <program args>]
+
+If the program isn't given, the one recorded in the session is used (it's executed in the directory where it
+was recorded).
+
+Notes:
+
+- The commands from the IDE are sent as fast as possible (the pauses of the user aren't replayed), but each one is
+  only sent after the debuggee sends the messages the IDE had before sending it (threads suspended and responses).
+
+- The thread and frame ids are different in each run (they're mapped from the ones in the recorded messages
+  to the ones received in the same messages).
+'''
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from _pydevd_bundle.pydevd_comm import ReaderThread, NetCommand, ID_TO_MEANING, CMD_THREAD_SUSPEND, CMD_VERSION, \
+    PROTOCOL_COMPRESSION, BINARY_FRAME_MARKER, _binary_frame_length
+from _pydevd_bundle.pydevd_session_recorder import read_session, DIRECTION_WRITTEN
+
+PYDEVD_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'pydevd.py')
+
+# Thread ids and frame ids (which change in each run) in the messages from the debuggee.
+_ID_RE = re.compile(r'pid_\d+_id_\d+|(?<=id=")\d+')
+
+# Ids which may have to be mapped in the messages to the debuggee.
+_MAPPED_ID_RE = re.compile(r'pid_\d+_id_\d+|\b\d+\b')
+
+
+class ReplayError(Exception):
+    pass
+
+
+#=======================================================================================================================
+# _LiveMessages
+#=======================================================================================================================
+class _LiveMessages(object):
+    '''
+    Messages received from the debuggee (time received, cmd_id, seq, text).
+    '''
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self.messages = []
+        self.finished = False
+
+    def add(self, cmd_id, seq, text):
+        with self._condition:
+            self.messages.append((time.time(), cmd_id, seq, text))
+            self._condition.notify_all()
+
+    def finish(self):
+        with self._condition:
+            self.finished = True
+            self._condition.notify_all()
+
+    def wait_for(self, accept, timeout):
+        '''
+        :return tuple:
+            The first message for which accept(message, index) returns True (or None if it isn't received in the
+            given timeout).
+        '''
+        initial_time = time.time()
+        with self._condition:
+            checked = 0
+            while True:
+                while checked < len(self.messages):
+                    message = self.messages[checked]
+                    if accept(message, checked):
+                        return message
+                    checked += 1
+
+                remaining = timeout - (time.time() - initial_time)
+                if self.finished or remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+
+
+class _ReplayReaderThread(ReaderThread):
+
+    def __init__(self, sock, live_messages):
+        ReaderThread.__init__(self, sock)
+        self.live_messages = live_messages
+
+    def process_command(self, cmd_id, seq, text):
+        if cmd_id == CMD_VERSION:
+            # The text of the commands received afterwards may be compressed if it was accepted.
+            NetCommand.compression = PROTOCOL_COMPRESSION in text.split('\t')[-1].split(',')
+        self.live_messages.add(cmd_id, seq, text)
+
+    def handle_except(self):
+        self.live_messages.finish()
+
+
+def _accept_nth_message(cmd_id, nth):
+    found = []
+
+    def accept(message, index):
+        if message[1] == cmd_id:
+            found.append(index)
+        return len(found) > nth
+
+    return accept
+
+
+def _accept_response(seq):
+
+    def accept(message, index):
+        return message[2] == seq
+
+    return accept
+
+
+def _update_id_map(id_map, recorded_text, live_text):
+    for recorded_id, live_id in zip(_ID_RE.findall(recorded_text), _ID_RE.findall(live_text)):
+        id_map[recorded_id] = live_id
+
+
+def _map_ids(id_map, text):
+    return _MAPPED_ID_RE.sub(lambda match: id_map.get(match.group(0), match.group(0)), text)
+
+
+def _send(sock, cmd_id, seq, text):
+    if '\n' in text:
+        # i.e.: it was received in a binary frame.
+        payload = (u'%s\t%s\t%s' % (cmd_id, seq, text)).encode('utf-8')
+        sock.sendall(BINARY_FRAME_MARKER + _binary_frame_length.pack(len(payload)) + payload)
+    else:
+        sock.sendall((u'%s\t%s\t%s\n' % (cmd_id, seq, text)).encode('utf-8'))
+
+
+def _get_program_args(argv):
+    if '--file' in argv:
+        # i.e.: started as: pydevd.py ... --file program args
+        return argv[argv.index('--file') + 1:]
+    return argv
+
+
+def _wait_process(process, timeout):
+    initial_time = time.time()
+    while process.poll() is None:
+        if time.time() - initial_time > timeout:
+            process.kill()
+            raise ReplayError('Timed out waiting for the process to finish.')
+        time.sleep(0.01)
+    return process.returncode
+
+
+def _run_without_debugger(python, program_args, cwd, timeout):
+    devnull = open(os.devnull, 'w')
+    try:
+        initial_time = time.time()
+        _wait_process(subprocess.Popen([python] + program_args, cwd=cwd, stdout=devnull), timeout)
+        return time.time() - initial_time
+    finally:
+        devnull.close()
+
+
+def replay(session_file, python=sys.executable, program_args=None, timeout=60):
+    '''
+    :return dict:
+        The times of the program with and without the debugger and the latency of the commands
+        (by command name: count, mean and max time in seconds).
+    '''
+    header, entries = read_session(session_file)
+    if program_args is None:
+        program_args = _get_program_args(header['argv'])
+    cwd = header.get('cwd')
+
+    time_without_debugger = _run_without_debugger(python, program_args, cwd, timeout)
+
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(('127.0.0.1', 0))
+    server.listen(1)
+    server.settimeout(timeout)
+    port = server.getsockname()[1]
+
+    devnull = open(os.devnull, 'w')
+    initial_time = time.time()
+    process = subprocess.Popen(
+        [python, PYDEVD_FILE, '--client', '127.0.0.1', '--port', str(port), '--file'] + program_args,
+        cwd=cwd, stdout=devnull)
+    try:
+        sock, _addr = server.accept()
+    finally:
+        server.close()
+
+    live_messages = _LiveMessages()
+    reader = _ReplayReaderThread(sock, live_messages)
+    reader.start()
+
+    id_map = {}
+    sent = []  # (time sent, cmd_id, seq)
+    suspends_waited = 0
+    try:
+        for direction, _elapsed, cmd_id, seq, text in entries:
+            if direction == DIRECTION_WRITTEN:
+                if cmd_id == CMD_THREAD_SUSPEND:
+                    # Wait for the nth suspend (the same one received by the IDE).
+                    accept = _accept_nth_message(CMD_THREAD_SUSPEND, suspends_waited)
+                    suspends_waited += 1
+
+                elif seq % 2 == 1:
+                    # A response to a request from the IDE.
+                    accept = _accept_response(seq)
+
+                else:
+                    continue
+
+                message = live_messages.wait_for(accept, timeout)
+                if message is None:
+                    raise ReplayError('Message not received from the debuggee: %s (seq: %s)' % (
+                        ID_TO_MEANING.get(str(cmd_id), cmd_id), seq))
+                _update_id_map(id_map, text, message[3])
+
+            else:
+                sent.append((time.time(), cmd_id, seq))
+                _send(sock, cmd_id, seq, _map_ids(id_map, text))
+
+        returncode = _wait_process(process, timeout)
+        time_with_debugger = time.time() - initial_time
+    finally:
+        if process.poll() is None:
+            process.kill()
+        devnull.close()
+        reader.do_kill_pydev_thread()
+        sock.close()
+
+    response_times = {}
+    for message_time, _cmd_id, seq, _text in live_messages.messages:
+        if seq % 2 == 1:
+            response_times.setdefault(seq, message_time)
+
+    commands = {}
+    for sent_time, cmd_id, seq in sent:
+        if seq in response_times:
+            name = ID_TO_MEANING.get(str(cmd_id), str(cmd_id))
+            commands.setdefault(name, []).append(response_times[seq] - sent_time)
+
+    return {
+        'session': session_file,
+        'program': program_args,
+        'returncode': returncode,
+        'suspends': suspends_waited,
+        'time_without_debugger': time_without_debugger,
+        'time_with_debugger': time_with_debugger,
+        'slowdown': time_with_debugger / max(time_without_debugger, 1e-6),
+        'commands': dict((name, {
+            'count': len(latencies),
+            'mean': sum(latencies) / len(latencies),
+            'max': max(latencies),
+        }) for name, latencies in commands.items()),
+    }
+
+
+def print_results(results, stream=None):
+    if stream is None:
+        stream = sys.stdout
+    stream.write('Program: %s\n' % (' '.join(results['program']),))
+    stream.write('Time without debugger: %.3fs\n' % (results['time_without_debugger'],))
+    stream.write('Time with debugger: %.3fs (slowdown: %.2fx, threads suspended: %s)\n' % (
+        results['time_with_debugger'], results['slowdown'], results['suspends']))
+    stream.write('%-40s %8s %12s %12s\n' % ('command', 'count', 'mean (ms)', 'max (ms)'))
+    for name, stats in sorted(results['commands'].items()):
+        stream.write('%-40s %8s %12.2f %12.2f\n' % (name, stats['count'], stats['mean'] * 1000, stats['max'] * 1000))
+
+
+def main(args):
+    program_args = None
+    if '--' in args:
+        program_args = args[args.index('--') + 1:]
+        args = args[:args.index('--')]
+
+    python = sys.executable
+    json_file = None
+    timeout = 60
+    session_file = None
+    i = 0
+    while i < len(args):
+        if args[i] == '--python':
+            i += 1
+            python = args[i]
+        elif args[i] == '--json':
+            i += 1
+            json_file = args[i]
+        elif args[i] == '--timeout':
+            i += 1
+            timeout = float(args[i])
+        else:
+            session_file = args[i]
+        i += 1
+
+    if session_file is None:
+        sys.stderr.write(__doc__)
+        return 1
+
+    results = replay(session_file, python, program_args, timeout)
+    print_results(results)
+    if json_file:
+        with open(json_file, 'w') as stream:
+            json.dump(results, stream, indent=4, sort_keys=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,94 @@
+import sys
+
+
+class _DummyPyDB(object):
+
+    suspend_on_breakpoint_exception = True
+
+
+class _DummyInfo(object):
+
+    pydev_message = ''
+    conditional_breakpoint_exception = None
+
+
+def _get_frame():
+    a = 10  # @UnusedVariable
+    return sys._getframe()
+
+
+def test_line_breakpoint_compiles_condition_and_expression():
+    from _pydevd_bundle.pydevd_breakpoints import LineBreakpoint
+    from _pydevd_bundle.pydevd_frame import handle_breakpoint_condition, handle_breakpoint_expression
+
+    breakpoint = LineBreakpoint(1, 'a > 5', 'None', 'a * 2')
+    assert breakpoint.get_compile_errors() == []
+    assert breakpoint.compiled_condition is not None
+    assert breakpoint.compiled_expression is not None
+
+    info = _DummyInfo()
+    frame = _get_frame()
+    assert handle_breakpoint_condition(_DummyPyDB(), info, breakpoint, frame)
+    handle_breakpoint_expression(breakpoint, info, frame)
+    assert info.pydev_message == '20'
+
+
+def test_line_breakpoint_syntax_errors():
+    from _pydevd_bundle.pydevd_breakpoints import LineBreakpoint
+    from _pydevd_bundle.pydevd_frame import handle_breakpoint_condition, handle_breakpoint_expression
+
+    breakpoint = LineBreakpoint(1, 'a >', 'None', 'a *', hit_condition='@HIT@ ==')
+    errors = breakpoint.get_compile_errors()
+    assert len(errors) == 3
+    assert errors[0].startswith('Condition:\na >\n\nError:\n')
+    assert errors[1].startswith('Expression:\na *\n\nError:\n')
+    assert errors[2].startswith('Hit condition:\n@HIT@ ==\n\nError:\n')
+
+    info = _DummyInfo()
+    frame = _get_frame()
+    py_db = _DummyPyDB()
+    assert handle_breakpoint_condition(py_db, info, breakpoint, frame)
+    assert info.conditional_breakpoint_exception[0].startswith('Condition:\na >\n\nError:\n')
+
+    py_db.suspend_on_breakpoint_exception = False
+    assert not handle_breakpoint_condition(py_db, info, breakpoint, frame)
+
+    handle_breakpoint_expression(breakpoint, info, frame)
+    assert 'SyntaxError' in info.pydev_message
+
+
+def test_line_breakpoint_hit_condition():
+    from _pydevd_bundle.pydevd_breakpoints import LineBreakpoint
+
+    frame = _get_frame()
+    breakpoint = LineBreakpoint(1, None, 'None', None, hit_condition='@HIT@ == 2')
+    assert [breakpoint.handle_hit_condition(frame) for _i in range(3)] == [False, True, False]
+
+    # The frame locals are also available.
+    breakpoint = LineBreakpoint(1, None, 'None', None, hit_condition='@HIT@ + a == 12')
+    assert [breakpoint.handle_hit_condition(frame) for _i in range(3)] == [False, True, False]
+
+
+def test_get_exception_breakpoint_cache():
+    from _pydevd_bundle.pydevd_breakpoints import ExceptionBreakpoint, get_exception_breakpoint, \
+        clear_exception_breakpoint_cache, _exceptions_id_to_type_cache
+
+    clear_exception_breakpoint_cache()
+    lookup_error_breakpoint = ExceptionBreakpoint('LookupError', None, None, True, False, False, False)
+    exceptions = {'LookupError': lookup_error_breakpoint}
+
+    assert get_exception_breakpoint(KeyError, exceptions) is lookup_error_breakpoint
+    assert get_exception_breakpoint(ValueError, exceptions) is None
+
+    # Negative results are also cached.
+    assert _exceptions_id_to_type_cache[id(exceptions)][1] == {
+        KeyError: lookup_error_breakpoint, ValueError: None}
+
+    # A new dict (i.e.: breakpoints were changed) has a new cache.
+    exceptions = exceptions.copy()
+    key_error_breakpoint = ExceptionBreakpoint('KeyError', None, None, True, False, False, False)
+    exceptions['KeyError'] = key_error_breakpoint
+    assert get_exception_breakpoint(KeyError, exceptions) is key_error_breakpoint
+
+    clear_exception_breakpoint_cache()
+    assert not _exceptions_id_to_type_cache
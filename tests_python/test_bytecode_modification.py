@@ -4,7 +4,7 @@ import unittest
 from io import StringIO
 import pytest
 
-from _pydevd_frame_eval.pydevd_modify_bytecode import insert_code
+from _pydevd_frame_eval.pydevd_modify_bytecode import insert_code, insert_code_at_lines, insert_code_at_lines_cached
 from opcode import EXTENDED_ARG
 
 TRACE_MESSAGE = "Trace called"
@@ -552,3 +552,53 @@ class TestInsertCode(unittest.TestCase):
 
         finally:
             sys.stdout = self.original_stdout
+
+    def test_insert_at_many_lines(self):
+        self.original_stdout = sys.stdout
+        sys.stdout = StringIO()
+
+        try:
+            def original():
+                a = 1
+                for i in range(2):
+                    a += i
+                return a
+
+            first_line = original.__code__.co_firstlineno
+            success, result = insert_code_at_lines(
+                original.__code__, tracing.__code__, [first_line + 1, first_line + 3, first_line + 10])
+            self.assertTrue(success)
+            exec(result)
+            self.assertEqual(sys.stdout.getvalue().count(TRACE_MESSAGE), 3)
+            # The line numbers are kept.
+            self.assertEqual(
+                sorted(set(line for _offset, line in dis.findlinestarts(result))),
+                sorted(set(line for _offset, line in dis.findlinestarts(original.__code__))))
+
+        finally:
+            sys.stdout = self.original_stdout
+
+    def test_insert_at_lines_cached(self):
+        def original():
+            a = 1
+            b = 2
+            return a + b
+
+        code = original.__code__
+        first_line = code.co_firstlineno
+        success, result = insert_code_at_lines_cached(code, tracing.__code__, [first_line + 1])
+        self.assertTrue(success)
+        self.assertIs(insert_code_at_lines_cached(code, tracing.__code__, [first_line + 1])[1], result)
+
+        # The new line is added to the code which was already modified.
+        success, result2 = insert_code_at_lines_cached(code, tracing.__code__, [first_line + 1, first_line + 2])
+        self.assertTrue(success)
+        self.assertEqual(len(result2.co_names), len(code.co_names) + 2 * len(tracing.__code__.co_names))
+
+        self.original_stdout = sys.stdout
+        sys.stdout = StringIO()
+        try:
+            exec(result2)
+            self.assertEqual(sys.stdout.getvalue().count(TRACE_MESSAGE), 2)
+        finally:
+            sys.stdout = self.original_stdout
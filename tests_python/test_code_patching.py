@@ -0,0 +1,86 @@
+import sys
+
+import pytest
+
+from _pydevd_frame_eval import pydevd_code_patching
+import pydevd_file_utils
+
+
+class _DummyPyDB(object):
+
+    def __init__(self):
+        self.breakpoints = {}
+        self.hits = []
+
+    def set_suspend(self, thread, stop_reason):
+        pass
+
+    def do_wait_suspend(self, thread, frame, event, arg, suspend_type="trace", send_suspend_message=True):
+        self.hits.append((frame.f_code.co_name, frame.f_lineno))
+
+
+def _method():
+    a = 1
+
+    def inner():
+        return a + 1
+
+    return inner()
+
+
+@pytest.fixture
+def py_db():
+    from _pydevd_bundle.pydevd_breakpoints import LineBreakpoint
+    from _pydevd_bundle.pydevd_comm import set_global_debugger
+
+    py_db = _DummyPyDB()
+    py_db.add_breakpoint = lambda filename, line: py_db.breakpoints.setdefault(
+        pydevd_file_utils.get_abs_path_real_path_and_base_from_file(filename)[1], {}).__setitem__(
+            line, LineBreakpoint(line, None, 'None', None))
+    original_trace = sys.gettrace()
+    sys.settrace(None)
+    set_global_debugger(py_db)
+    pydevd_code_patching.frame_eval_func()
+    try:
+        yield py_db
+    finally:
+        pydevd_code_patching.stop_frame_eval()
+        set_global_debugger(None)
+        sys.settrace(original_trace)
+
+
+@pytest.mark.skipif(not pydevd_code_patching.IS_CODE_PATCHING_SUPPORTED, reason='Requires CPython 3.6 or 3.7.')
+def test_code_patching(py_db):
+    original_code = _method.__code__
+    first_line = original_code.co_firstlineno
+
+    py_db.add_breakpoint(__file__, first_line + 1)
+    py_db.add_breakpoint(__file__, first_line + 4)
+    pydevd_code_patching.increment_breakpoints_generation()
+    assert _method.__code__ is not original_code
+
+    assert _method() == 2
+    assert py_db.hits == [('_method', first_line + 1), ('inner', first_line + 4)]
+
+    # Removing the breakpoints restores the original code.
+    py_db.breakpoints.clear()
+    pydevd_code_patching.increment_breakpoints_generation()
+    assert _method.__code__ is original_code
+
+
+@pytest.mark.skipif(not pydevd_code_patching.IS_CODE_PATCHING_SUPPORTED, reason='Requires CPython 3.6 or 3.7.')
+def test_code_patching_on_import(py_db, tmpdir):
+    tmpdir.join('_code_patching_module.py').write('a = 1\nb = 2\n\ndef method():\n    return a + b\n')
+    py_db.add_breakpoint(str(tmpdir.join('_code_patching_module.py')), 2)
+    py_db.add_breakpoint(str(tmpdir.join('_code_patching_module.py')), 5)
+    pydevd_code_patching.increment_breakpoints_generation()
+
+    sys.path.insert(0, str(tmpdir))
+    try:
+        import _code_patching_module
+        assert _code_patching_module.method() == 3
+    finally:
+        sys.path.remove(str(tmpdir))
+        sys.modules.pop('_code_patching_module', None)
+
+    assert py_db.hits == [('<module>', 2), ('method', 5)]
@@ -0,0 +1,285 @@
+import socket as socket_module
+import struct
+import threading
+
+import pytest
+
+
+class _DummySocket(object):
+
+    def __init__(self):
+        self.sent = []
+
+    def sendall(self, data):
+        self.sent.append(data)
+
+    def shutdown(self, *args):
+        pass
+
+    def close(self):
+        pass
+
+
+def _run_writer(writer, cmds):
+    from _pydevd_bundle.pydevd_comm import NetCommand, CMD_EXIT
+
+    for cmd in cmds:
+        writer.add_command(cmd)
+    writer.add_command(NetCommand(CMD_EXIT, 1, ''))
+    writer.start()
+    writer.join(5)
+    assert not writer.is_alive()
+
+
+@pytest.mark.parametrize('max_batch_size, expected_batches', [(64 * 1024, 1), (1, 6)])
+def test_writer_batches_pending_commands(max_batch_size, expected_batches):
+    from _pydevd_bundle.pydevd_comm import WriterThread, NetCommand, CMD_WRITE_TO_CONSOLE
+
+    sock = _DummySocket()
+    writer = WriterThread(sock, max_batch_size=max_batch_size)
+    cmds = [NetCommand(CMD_WRITE_TO_CONSOLE, i + 1, 'msg%s' % (i,)) for i in range(5)]
+    _run_writer(writer, cmds)
+
+    assert len(sock.sent) == expected_batches
+    assert b''.join(sock.sent) == b''.join(cmd.outgoing.encode('utf-8') for cmd in cmds) + b'129\t1\t\n'
+
+
+def test_writer_control_commands_overtake_telemetry():
+    from _pydevd_bundle.pydevd_comm import (WriterThread, NetCommand, CMD_WRITE_TO_CONSOLE, CMD_THREAD_SUSPEND,
+        CMD_GET_VARIABLE)
+
+    sock = _DummySocket()
+    writer = WriterThread(sock, max_batch_size=1)
+    output = [NetCommand(CMD_WRITE_TO_CONSOLE, 0, 'msg%s' % (i,)) for i in range(3)]
+    response = NetCommand(CMD_GET_VARIABLE, 3, 'vars')
+    suspend = NetCommand(CMD_THREAD_SUSPEND, 2, 'suspend')
+    _run_writer(writer, output + [response, suspend])
+
+    assert sock.sent[:5] == [cmd.outgoing.encode('utf-8') for cmd in [suspend, response] + output]
+
+
+def test_priority_queue_drops_oldest_telemetry():
+    from _pydevd_bundle.pydevd_comm import PriorityCommandQueue, NetCommand, CMD_WRITE_TO_CONSOLE, CMD_THREAD_RUN
+
+    queue = PriorityCommandQueue(max_sizes=(2, 2, 2))
+    output = [NetCommand(CMD_WRITE_TO_CONSOLE, 0, 'msg%s' % (i,)) for i in range(4)]
+    for cmd in output:
+        queue.put(cmd)
+    run = NetCommand(CMD_THREAD_RUN, 2, 'run')
+    queue.put(run)
+
+    assert queue.dropped == 2
+    assert [queue.get(0) for _i in range(3)] == [run] + output[2:]
+    assert queue.empty()
+
+
+def test_send_all_without_sendall():
+    from _pydevd_bundle.pydevd_comm import send_all
+
+    class _PartialSocket(object):
+
+        def __init__(self):
+            self.sent = []
+
+        def send(self, data):
+            self.sent.append(data[:3])
+            return len(self.sent[-1])
+
+    sock = _PartialSocket()
+    send_all(sock, b'0123456789')
+    assert sock.sent == [b'012', b'345', b'678', b'9']
+
+
+class _DummyReadSocket(object):
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+
+    def recv_into(self, buf):
+        if not self.chunks:
+            return 0
+        chunk = self.chunks.pop(0)
+        buf[:len(chunk)] = chunk
+        return len(chunk)
+
+
+def _read_commands(sock, read_buffer_size=None):
+    from _pydevd_bundle.pydevd_comm import ReaderThread
+
+    reader = ReaderThread(sock)
+    if read_buffer_size is not None:
+        reader.read_buffer_size = read_buffer_size
+    received = []
+    reader.process_command = lambda cmd_id, seq, text: received.append((cmd_id, seq, text))
+    reader.handle_except = lambda: None
+    reader._on_run()
+    return received
+
+
+def test_reader_splits_messages():
+    text = u'\xe1\xe9 ' + u'x' * 100
+    data = (u'101\t1\t\n111\t3\t%s\n501\t5\t1.1\n' % (text,)).encode('utf-8')
+
+    # Messages (and multi-byte characters) split among many reads.
+    sock = _DummyReadSocket(data[i:i + 7] for i in range(0, len(data), 7))
+    assert _read_commands(sock, read_buffer_size=7) == [(101, 1, u''), (111, 3, text), (501, 5, u'1.1')]
+
+    sock = _DummyReadSocket([data])
+    assert _read_commands(sock) == [(101, 1, u''), (111, 3, text), (501, 5, u'1.1')]
+
+
+def test_binary_framing():
+    from _pydevd_bundle.pydevd_comm import NetCommand, CMD_GET_VARIABLE
+
+    text = u'<xml><var name="\xe1" value="a%20b\tc" /></xml>'
+    NetCommand.binary_framing = True
+    try:
+        cmd = NetCommand(CMD_GET_VARIABLE, 2, text)
+    finally:
+        NetCommand.binary_framing = False
+    # The payload is not quoted again.
+    payload = (u'110\t2\t' + text).encode('utf-8')
+    assert cmd.outgoing == b'\x00' + struct.pack('>I', len(payload)) + payload
+
+    # Binary frames and text commands may be mixed (and split among many reads).
+    data = b'101\t1\t\n' + cmd.outgoing + b'501\t3\t1.1\n' + cmd.outgoing
+    expected = [(101, 1, u''), (110, 2, text), (501, 3, u'1.1'), (110, 2, text)]
+    for chunk_size in (1, 3, 7, len(data)):
+        sock = _DummyReadSocket(data[i:i + chunk_size] for i in range(0, len(data), chunk_size))
+        assert _read_commands(sock, read_buffer_size=chunk_size) == expected
+
+
+def test_binary_framing_negotiation():
+    from _pydevd_bundle.pydevd_comm import NetCommand, CMD_VERSION, NetCommandFactory
+    from _pydevd_bundle.pydevd_process_net_command import process_net_command
+
+    class _DummyPyDB(object):
+
+        cmd_factory = NetCommandFactory()
+
+        def __init__(self):
+            self._main_lock = threading.Lock()
+            self.writer = _DummyWriter()
+
+    class _DummyWriter(object):
+
+        def __init__(self):
+            self.commands = []
+
+        def add_command(self, cmd):
+            self.commands.append(cmd)
+
+    py_db = _DummyPyDB()
+    try:
+        process_net_command(py_db, CMD_VERSION, 1, u'1.1\tUNIX\tLINE\tBINARY_FRAMING,UNKNOWN_FEATURE')
+        cmd, = py_db.writer.commands
+        # The response is still in the text format and has the features accepted.
+        assert not cmd.binary_framing
+        assert cmd.text.endswith(u'\tBINARY_FRAMING')
+        assert NetCommand.binary_framing
+
+        process_net_command(py_db, CMD_VERSION, 3, u'1.1\tUNIX\tLINE')
+        assert not NetCommand.binary_framing
+    finally:
+        NetCommand.binary_framing = False
+
+
+def test_command_stats():
+    from _pydevd_bundle.pydevd_comm import NetCommandFactory, CMD_GET_COMMAND_STATS, CMD_ERROR, CMD_STOP_ON_START
+    from _pydevd_bundle.pydevd_command_stats import command_stats
+    from _pydevd_bundle.pydevd_process_net_command import process_net_command
+
+    class _DummyPyDB(object):
+
+        cmd_factory = NetCommandFactory()
+
+        def __init__(self):
+            self._main_lock = threading.Lock()
+            self.writer = _DummyWriter()
+
+    class _DummyWriter(object):
+
+        def __init__(self):
+            self.commands = []
+
+        def add_command(self, cmd):
+            self.commands.append(cmd)
+
+    py_db = _DummyPyDB()
+    command_stats.clear()
+    process_net_command(py_db, CMD_STOP_ON_START, 1, u'True')
+    process_net_command(py_db, CMD_STOP_ON_START, 3, u'False')
+    process_net_command(py_db, 9999, 5, u'')
+    assert not py_db.stop_on_start
+
+    error, = py_db.writer.commands
+    assert error.id == CMD_ERROR
+    assert [(kind, name, stats.count) for kind, name, stats in command_stats.get_stats()] == [
+        ('processed', '9999', 1), ('processed', 'CMD_STOP_ON_START', 2)]
+
+    process_net_command(py_db, CMD_GET_COMMAND_STATS, 7, u'')
+    stats_cmd = py_db.writer.commands[-1]
+    assert stats_cmd.id == CMD_GET_COMMAND_STATS
+    assert 'name="CMD_STOP_ON_START" count="2"' in stats_cmd.text
+
+
+@pytest.mark.parametrize('binary_framing', [True, False])
+def test_compression(binary_framing):
+    from _pydevd_bundle.pydevd_comm import NetCommand, CMD_GET_VARIABLE, CMD_THREAD_RUN
+    from _pydevd_bundle.pydevd_constants import COMPRESSION_MIN_SIZE
+
+    big_text = u'<xml>%s</xml>' % (u'<var name="\xe1" value="10" />' * COMPRESSION_MIN_SIZE)
+    NetCommand.binary_framing = binary_framing
+    NetCommand.compression = True
+    try:
+        big_cmd = NetCommand(CMD_GET_VARIABLE, 2, big_text)
+        # Small commands aren't compressed.
+        small_cmd = NetCommand(CMD_THREAD_RUN, 4, u'pid_1_id_1\t108')
+        assert big_cmd.compressed
+        assert not small_cmd.compressed
+        assert len(big_cmd.outgoing) < len(big_text) / 10
+
+        data = big_cmd.outgoing + small_cmd.outgoing
+        if not binary_framing:
+            data = data.encode('utf-8')
+        sock = _DummyReadSocket(data[i:i + 1000] for i in range(0, len(data), 1000))
+        assert _read_commands(sock, read_buffer_size=1000) == [
+            (CMD_GET_VARIABLE, 2, big_text), (CMD_THREAD_RUN, 4, u'pid_1_id_1\t108')]
+    finally:
+        NetCommand.binary_framing = False
+        NetCommand.compression = False
+
+
+@pytest.mark.skipif(not hasattr(socket_module, 'AF_UNIX'), reason='Unix domain sockets not available.')
+def test_unix_socket_transport(tmpdir):
+    from _pydevd_bundle.pydevd_comm import start_server_unix_socket, start_client_unix_socket
+
+    path = str(tmpdir.join('pydevd.sock'))
+    accepted = []
+    t = threading.Thread(target=lambda: accepted.append(start_server_unix_socket(path)))
+    t.start()
+    client = start_client_unix_socket(path)
+    t.join(5)
+    server, = accepted
+    try:
+        client.sendall(b'501\t1\t1.1\n')
+        assert server.recv(100) == b'501\t1\t1.1\n'
+    finally:
+        client.close()
+        server.close()
+
+
+@pytest.mark.skipif(not hasattr(socket_module, 'socketpair'), reason='socketpair not available.')
+def test_socket_from_inherited_fd():
+    import os
+    from _pydevd_bundle.pydevd_comm import socket_from_fd
+
+    s1, s2 = socket_module.socketpair()
+    s = socket_from_fd(os.dup(s1.fileno()))
+    s1.close()
+    try:
+        s.sendall(b'501\t1\t1.1\n')
+        assert s2.recv(100) == b'501\t1\t1.1\n'
+    finally:
+        s.close()
+        s2.close()
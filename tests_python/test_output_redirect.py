@@ -0,0 +1,69 @@
+import pytest
+
+
+class _DummySocket(object):
+
+    def sendall(self, data):
+        pass
+
+
+@pytest.fixture
+def py_db():
+    import pydevd
+    import pydevd_tracing
+    from _pydevd_bundle.pydevd_comm import set_global_debugger, WriterThread
+    py_db = pydevd.PyDB()
+    py_db.writer = WriterThread(_DummySocket())  # Note: not started (the commands are kept in the queue).
+    yield py_db
+    pydevd_tracing.restore_sys_set_trace_func()
+    set_global_debugger(None)
+
+
+def _get_output(py_db):
+    from _pydevd_bundle.pydevd_comm import _queue
+    output = []
+    while True:
+        try:
+            cmd = py_db.writer.cmdQueue.get(0)
+        except _queue.Empty:
+            return output
+        output.append(cmd.text)
+
+
+def test_output_coalesced(py_db, monkeypatch):
+    import pydevd
+    from _pydevd_bundle.pydevd_comm import NetCommandFactory
+
+    monkeypatch.setattr(pydevd, 'OUTPUT_FLUSH_DELAY', 100)
+    stdout = pydevd._CustomWriter(1, None, wrap_buffer=False)
+    stderr = pydevd._CustomWriter(2, None, wrap_buffer=False)
+    for i in range(3):
+        stdout.write('out%s\n' % (i,))
+    assert _get_output(py_db) == []
+
+    # Output of the other stream is sent first (to keep the order).
+    stderr.write('err\n')
+    pydevd.flush_redirected_output()
+
+    factory = NetCommandFactory()
+    assert _get_output(py_db) == [
+        factory.make_io_message('out0\nout1\nout2\n', 1).text, factory.make_io_message('err\n', 2).text]
+
+
+def test_output_discarded_above_high_water_mark(py_db, monkeypatch):
+    import pydevd
+
+    monkeypatch.setattr(pydevd, 'OUTPUT_FLUSH_DELAY', 0)
+    monkeypatch.setattr(pydevd, 'OUTPUT_HIGH_WATER_MARK', 100)
+    monkeypatch.setattr(pydevd, 'OUTPUT_BLOCK_TIMEOUT', 0)
+    stdout = pydevd._CustomWriter(1, None, wrap_buffer=False)
+    stdout.write('a' * 200)
+    stdout.write('b' * 10)
+    stdout.write('c' * 10)
+    assert len(_get_output(py_db)) == 1
+
+    stdout.write('d' * 10)
+    output = _get_output(py_db)
+    assert len(output) == 2
+    assert '20 characters of output discarded' in output[0]
+    assert 'dddddddddd' in output[1]
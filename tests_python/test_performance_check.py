@@ -0,0 +1,38 @@
+def _make_results(mode_results):
+    return {'modes': mode_results}
+
+
+def test_compare_results():
+    from tests_python import performance_check
+
+    baseline = _make_results({
+        'regular': {
+            'no_breakpoints': {'overhead': 2.0},
+            'step_over': {'overhead': 10.0},
+        },
+        'cython': {'skipped': 'Not available.'},
+    })
+    results = _make_results({
+        'regular': {
+            'no_breakpoints': {'overhead': 2.2},
+            'step_over': {'overhead': 13.0},
+            'threads_with_breakpoint': {'overhead': 100.0},  # Not in the baseline.
+        },
+        'cython': {
+            'no_breakpoints': {'overhead': 100.0},  # Skipped in the baseline.
+        },
+    })
+    assert performance_check.compare_results(baseline, results, 0.2) == [('regular', 'step_over', 10.0, 13.0)]
+    assert performance_check.compare_results(baseline, results, 0.5) == []
+
+
+def test_run_benchmark_step_over():
+    import sys
+    from tests_python import performance_check
+
+    results = performance_check.run_benchmarks(
+        sys.executable, ['regular'], ['step_over_deep_recursion'], runs=1, timeout=60)
+    benchmark_results = results['modes']['regular']['step_over_deep_recursion']
+    assert len(benchmark_results['times']) == 1
+    assert benchmark_results['time'] > 0
+    assert benchmark_results['overhead'] > 0
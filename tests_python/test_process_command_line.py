@@ -26,3 +26,13 @@ class Test(unittest.TestCase):
         assert setup['qt-support'] == 'pyqt4'
 
         self.assertRaises(ValueError, process_command_line, ['pydevd.py', '--port', '1', '--qt-support=wrong'])
+
+    def testProcessCommandLineUnixSocket(self):
+        from _pydevd_bundle.pydevd_command_line_handling import process_command_line, setup_to_argv
+        setup = process_command_line(['pydevd.py', '--unix-socket', '/tmp/pydevd.sock', '--inherited-fd', '3', '--multiprocess'])
+        assert setup['unix-socket'] == '/tmp/pydevd.sock'
+        assert setup['inherited-fd'] == 3
+
+        # The inherited connection isn't passed to new processes.
+        argv = setup_to_argv(setup)[1:]
+        assert argv == ['--unix-socket', '/tmp/pydevd.sock', '--multiprocess']
@@ -69,6 +69,17 @@ class TestCase(unittest.TestCase):
         finally:
             SetupHolder.setup = original
 
+    def test_monkey_patch_args_indc_unix_socket(self):
+        original = SetupHolder.setup
+
+        try:
+            SetupHolder.setup = {'client': None, 'port': '0', 'unix-socket': '/tmp/pydevd.sock'}
+            check = ['C:\\bin\\python.exe', '-u', '-c', 'connect("127.0.0.1")']
+            res = pydev_monkey.patch_args(check)
+            assert "patch_multiprocessing=True, unix_socket='/tmp/pydevd.sock'); " in res[3]
+        finally:
+            SetupHolder.setup = original
+
     def test_monkey_patch_args_module(self):
         original = SetupHolder.setup
 
@@ -0,0 +1,201 @@
+import collections
+import re
+import sys
+
+from _pydevd_bundle.pydevd_resolver import tupleResolver, dictResolver, setResolver, dequeResolver
+
+
+def test_tuple_resolver_page():
+    lst = list(range(1000))
+    page = tupleResolver.get_dictionary_page(lst, 10, 3)
+    assert page == {'0010': 10, '0011': 11, '0012': 12}
+    assert tupleResolver.resolve(lst, '0011') == 11
+
+    first_page = tupleResolver.get_dictionary_page(lst, 0, 2)
+    assert first_page['0000'] == 0
+    assert first_page['__len__'] == 1000
+
+    assert tupleResolver.get_dictionary_page(lst, 999, 10) == {'0999': 999}
+    assert tupleResolver.get_dictionary_page(lst, 1000, 10) == {}
+
+
+def test_deque_resolver_page():
+    d = collections.deque(range(100), maxlen=200)
+    page = dequeResolver.get_dictionary_page(d, 0, 2)
+    assert page['000'] == 0
+    assert page['001'] == 1
+    assert page['maxlen'] == 200
+    assert dequeResolver.get_dictionary_page(d, 50, 2) == {'050': 50, '051': 51}
+
+
+def test_dict_and_set_resolver_page():
+    d = dict((i, i * 2) for i in range(1000))
+    page = dictResolver.get_dictionary_page(d, 500, 10)
+    assert len(page) == 10
+    for key, val in page.items():
+        assert dictResolver.resolve(d, key) == val
+
+    s = set(range(1000))
+    items = set()
+    for start in range(0, 1000, 300):
+        page = setResolver.get_dictionary_page(s, start, 300)
+        page.pop('__len__', None)
+        items.update(page.values())
+    assert items == s
+
+
+class _DummyWriter(object):
+
+    def __init__(self):
+        self.commands = []
+
+    def add_command(self, cmd):
+        self.commands.append(cmd)
+
+
+class _DummyPyDB(object):
+
+    def __init__(self):
+        from _pydevd_bundle.pydevd_comm import NetCommandFactory
+        from _pydev_imps._pydev_saved_modules import threading
+        self._main_lock = threading.Lock()
+        self.cmd_factory = NetCommandFactory()
+        self.writer = _DummyWriter()
+        self.internal_commands = []
+        self.use_variable_handles = False
+
+    def post_internal_command(self, int_cmd, thread_id):
+        self.internal_commands.append(int_cmd)
+
+
+def test_get_variable_paged():
+    from _pydevd_bundle.pydevd_comm import CMD_GET_VARIABLE
+    from _pydevd_bundle.pydevd_constants import get_thread_id
+    from _pydevd_bundle.pydevd_process_net_command import process_net_command
+    from _pydev_imps._pydev_saved_modules import threading
+
+    lst = list(range(1000000))  # @UnusedVariable
+    thread_id = get_thread_id(threading.currentThread())
+    frame_id = id(sys._getframe())
+
+    py_db = _DummyPyDB()
+    process_net_command(py_db, CMD_GET_VARIABLE, 1, '%s\t%s\tFRAME|500000|3\tlst' % (thread_id, frame_id))
+    int_cmd, = py_db.internal_commands
+    assert (int_cmd.start, int_cmd.count) == (500000, 3)
+
+    int_cmd.do_it(py_db)
+    cmd, = py_db.writer.commands
+    assert cmd.id == CMD_GET_VARIABLE
+    assert '<xml total="1000000">' in cmd.text
+    assert cmd.text.count('<var ') == 3
+    assert 'name="0500001"' in cmd.text
+
+    # Without the page, the format is the same as before.
+    py_db = _DummyPyDB()
+    process_net_command(py_db, CMD_GET_VARIABLE, 3, '%s\t%s\tFRAME\tlst' % (thread_id, frame_id))
+    py_db.internal_commands[0].do_it(py_db)
+    assert py_db.writer.commands[0].text.startswith('<xml><var ')
+
+
+def test_get_variable_by_handle():
+    from _pydevd_bundle.pydevd_comm import CMD_GET_VARIABLE, CMD_ERROR
+    from _pydevd_bundle.pydevd_constants import get_thread_id
+    from _pydevd_bundle.pydevd_process_net_command import process_net_command
+    from _pydevd_bundle.pydevd_vars import remove_variable_handles
+    from _pydev_imps._pydev_saved_modules import threading
+
+    tree = {'branch': [{'leaf': 'value'}]}  # @UnusedVariable
+    thread_id = get_thread_id(threading.currentThread())
+    frame_id = id(sys._getframe())
+
+    def get_variable(frame_id_or_handle, scope, attrs=None):
+        py_db = _DummyPyDB()
+        py_db.use_variable_handles = True
+        text = '%s\t%s\t%s' % (thread_id, frame_id_or_handle, scope)
+        if attrs is not None:
+            text += '\t' + attrs
+        process_net_command(py_db, CMD_GET_VARIABLE, 1, text)
+        py_db.internal_commands[0].do_it(py_db)
+        cmd, = py_db.writer.commands
+        return cmd
+
+    try:
+        cmd = get_variable(frame_id, 'FRAME', 'tree')
+        assert cmd.id == CMD_GET_VARIABLE
+        branch_handle, = re.findall(r'branch.*handle="(\d+)"', cmd.text)
+
+        # The children of the handle are found without resolving the path again.
+        cmd = get_variable(branch_handle, 'BY_HANDLE')
+        leaf_handle, = re.findall(r'handle="(\d+)"', cmd.text)
+
+        cmd = get_variable(leaf_handle, 'BY_HANDLE')
+        assert 'leaf' in cmd.text
+        assert 'handle=' not in cmd.text  # A str isn't a container.
+
+        # The same object always has the same handle while the thread is suspended.
+        cmd = get_variable(frame_id, 'FRAME', 'tree')
+        assert re.findall(r'branch.*handle="(\d+)"', cmd.text) == [branch_handle]
+    finally:
+        remove_variable_handles(thread_id)
+
+    # The handles aren't valid after the thread is resumed.
+    cmd = get_variable(branch_handle, 'BY_HANDLE')
+    assert cmd.id == CMD_ERROR
+    assert 'Variable handle not found' in cmd.text
+
+
+def test_find_frame_suspended():
+    from _pydevd_bundle import pydevd_vars
+    from _pydevd_bundle.pydevd_constants import get_thread_id
+    from _pydev_imps._pydev_saved_modules import threading
+
+    thread_id = get_thread_id(threading.currentThread())
+
+    def recurse(n, frames):
+        frames.append(sys._getframe())
+        if n > 0:
+            return recurse(n - 1, frames)
+
+        pydevd_vars.add_suspended_frames(thread_id, frames[-1])
+        original_iter_frames = pydevd_vars._iter_frames
+
+        def _iter_frames(initialFrame):
+            raise AssertionError('The stack should not be walked for a suspended thread.')
+
+        pydevd_vars._iter_frames = _iter_frames
+        try:
+            for frame in frames:
+                assert pydevd_vars.find_frame(thread_id, str(id(frame))) is frame
+        finally:
+            pydevd_vars._iter_frames = original_iter_frames
+            pydevd_vars.remove_suspended_frames(thread_id)
+
+        # After the thread is resumed the stack is walked again.
+        assert pydevd_vars.find_frame(thread_id, str(id(frames[0]))) is frames[0]
+
+    recurse(50, [])
+
+
+def test_type_presentation_cache():
+    from _pydevd_bundle.pydevd_xml import TypeResolveHandler, var_to_xml
+
+    class Weird(object):
+        pass
+
+    Weird.__name__ = 'Weird<"name">'
+    Weird.__module__ = 'mod&"x'
+
+    handler = TypeResolveHandler()
+    presentation = handler.get_type_presentation(Weird, Weird.__name__)
+    assert presentation[:2] == ('Weird&lt;&quot;name&quot;&gt;', 'qualifier="mod&amp;&quot;x"')
+    assert handler.get_type_presentation(Weird, Weird.__name__) is presentation
+
+    assert handler.get_type_presentation(collections.OrderedDict, 'OrderedDict')[2] == 'OrderedDict'
+    assert handler.get_type_presentation(list, 'list')[2] == str(list)
+
+    xml = var_to_xml(Weird(), 'w')
+    assert 'type="Weird&lt;&quot;name&quot;&gt;" qualifier="mod&amp;&quot;x"' in xml
+
+    # Types which aren't containers (whose resolver is None) are also cached.
+    assert handler.get_type(1)[2] is None
+    assert handler._type_to_resolver_cache[int] is None
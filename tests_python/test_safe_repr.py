@@ -0,0 +1,92 @@
+# coding: utf-8
+import collections
+
+import pytest
+
+from _pydevd_bundle.pydevd_constants import MAXIMUM_VARIABLE_REPRESENTATION_SIZE
+from _pydevd_bundle.pydevd_safe_repr import safe_repr
+
+
+class _ListSubclass(list):
+    pass
+
+
+class _SetSubclass(set):
+    pass
+
+
+class _CustomRepr(object):
+
+    def __repr__(self):
+        return 'CustomRepr'
+
+
+def _get_small_objects():
+    lst = [1, 2]
+    lst.append(lst)
+    d = {'a': 1}
+    d['self'] = d
+    return [
+        None, True, 1, -2, 1.5, 2j, 10 ** 30,
+        'text', u'text with unicode: \xe1', b'bytes\x00', bytearray(b'ba'),
+        (), (1,), (1, 'a', None), [], [1, [2, [3, (4,)]]], {}, {'a': [1, 2], 3: (4,)},
+        set(), set([1]), frozenset(), frozenset([1]), _SetSubclass(), _SetSubclass([2]),
+        _ListSubclass([1, 2]), collections.deque([1, 2]), collections.deque([1], maxlen=3),
+        collections.OrderedDict([('a', 1)]), [_CustomRepr(), {'b': _CustomRepr()}],
+        lst, d,
+    ]
+
+
+@pytest.mark.parametrize('obj', _get_small_objects())
+def test_safe_repr_same_as_builtin(obj):
+    assert safe_repr(obj) == (repr(obj), False)
+    assert safe_repr(obj, as_str=True) == ('%s' % (obj,), False)
+
+
+def test_safe_repr_truncated():
+    obj = list(range(1000))
+    expected = repr(obj)
+    for max_size in (0, 1, 10, len(expected) - 1):
+        assert safe_repr(obj, max_size) == (expected[:max_size], True)
+    assert safe_repr(obj, len(expected)) == (expected, False)
+    assert safe_repr(obj, None) == (expected, False)
+
+
+def test_safe_repr_big_objects():
+    assert safe_repr(b'a' * (50 * 1024 * 1024), 10) == (repr(b'a' * 10)[:10], True)
+    assert safe_repr(u'b' * (50 * 1024 * 1024), 10, as_str=True) == (u'b' * 10, True)
+
+    big_dict = dict((i, i) for i in range(2000000))
+    assert safe_repr(big_dict, 20) == ('{0: 0, 1: 1, 2: 2, 3', True)
+
+    nested = []
+    for _ in range(1000):
+        nested = [nested]
+    value, truncated = safe_repr(nested, None)
+    assert not truncated
+    assert '[...]' in value
+
+    assert safe_repr(collections.OrderedDict((i, i) for i in range(1000)), 100) == (
+        '<Too big to print. Len: 1000>', False)
+
+    assert safe_repr(10 ** 100000, 100) == ('<int with about 100000 digits>', False)
+
+
+def test_var_to_xml_trimmed():
+    from _pydevd_bundle.pydevd_xml import var_to_xml
+
+    xml = var_to_xml(list(range(100000)), 'lst')
+    assert '...' in xml
+    assert len(xml) < MAXIMUM_VARIABLE_REPRESENTATION_SIZE * 2
+
+    xml = var_to_xml(list(range(100000)), 'lst', doTrim=False)
+    assert '99999' in xml
+
+
+def test_safe_repr_numpy():
+    numpy = pytest.importorskip('numpy')
+
+    value, truncated = safe_repr(numpy.arange(10 ** 6), 1000)
+    assert not truncated
+    assert '...' in value
+    assert safe_repr(numpy.arange(3)) == (repr(numpy.arange(3)), False)
@@ -0,0 +1,59 @@
+def test_session_recorder(tmpdir):
+    from _pydevd_bundle.pydevd_comm import ReaderThread, WriterThread, NetCommand, CMD_THREAD_RUN, CMD_VERSION
+    from _pydevd_bundle.pydevd_session_recorder import start_session_recorder, stop_session_recorder, read_session
+
+    class _DummySocket(object):
+
+        def __init__(self, chunks):
+            self.chunks = list(chunks)
+            self.sent = []
+
+        def recv(self, size):
+            if not self.chunks:
+                return b''
+            return self.chunks.pop(0)
+
+        def sendall(self, data):
+            self.sent.append(data)
+
+        def shutdown(self, *args):
+            pass
+
+        def close(self):
+            pass
+
+    recorder = start_session_recorder(str(tmpdir))
+    try:
+        sock = _DummySocket([u'501\t1\t1.1\tUNIX\tID\n106\t3\tpid_1_id_2\n'.encode('utf-8')])
+        reader = ReaderThread(sock)
+        reader.process_command = lambda cmd_id, seq, text: None
+        reader.handle_except = lambda: None
+        reader._on_run()
+
+        writer = WriterThread(sock)
+        writer.add_command(NetCommand(CMD_THREAD_RUN, 2, u'pid_1_id_2\t108'))
+        writer.add_command(NetCommand(129, 4, u''))
+        writer.start()
+        writer.join(5)
+    finally:
+        stop_session_recorder()
+
+    header, entries = read_session(recorder.filename)
+    assert header['version'] == 1
+    assert [entry[:1] + entry[2:] for entry in entries] == [
+        ('R', CMD_VERSION, 1, u'1.1\tUNIX\tID'),
+        ('R', CMD_THREAD_RUN, 3, u'pid_1_id_2'),
+        ('W', CMD_THREAD_RUN, 2, u'pid_1_id_2\t108'),
+        ('W', 129, 4, u''),
+    ]
+
+
+def test_session_replay_id_mapping():
+    from tests_python import session_replay
+
+    id_map = {}
+    session_replay._update_id_map(
+        id_map,
+        u'<xml><thread id="pid_1_id_2" stop_reason="111"><frame id="10" name="foo" /><frame id="20" /></thread></xml>',
+        u'<xml><thread id="pid_5_id_6" stop_reason="111"><frame id="30" name="foo" /><frame id="40" /></thread></xml>')
+    assert session_replay._map_ids(id_map, u'pid_1_id_2\t20\tFRAME\ta') == u'pid_5_id_6\t40\tFRAME\ta'
@@ -0,0 +1,74 @@
+import pytest
+
+
+@pytest.fixture
+def py_db():
+    import pydevd
+    import pydevd_tracing
+    from _pydevd_bundle.pydevd_comm import set_global_debugger
+    py_db = pydevd.PyDB()
+    yield py_db
+    pydevd_tracing.restore_sys_set_trace_func()
+    set_global_debugger(None)
+
+
+def test_clear_skip_caches_for_file(py_db, tmpdir):
+    from _pydevd_bundle.pydevd_trace_dispatch import global_cache_skips, global_cache_frame_skips
+    import pydevd_file_utils
+
+    file1 = str(tmpdir.join('file1.py'))
+    file2 = str(tmpdir.join('file2.py'))
+    canonical_file1 = pydevd_file_utils.get_abs_path_real_path_and_base_from_file(file1)[1]
+
+    key1 = (1, 'method', file1)
+    key2 = (1, 'method', file2)
+    global_cache_skips.clear()
+    global_cache_frame_skips.clear()
+    try:
+        global_cache_skips[key1] = 1
+        global_cache_skips[key2] = 1
+        global_cache_frame_skips[key1] = 0
+        global_cache_frame_skips[(key1, 2)] = 0
+        global_cache_frame_skips[key2] = 0
+        global_cache_frame_skips[(key2, 2)] = 0
+
+        py_db.consolidate_breakpoints(canonical_file1, {}, py_db.breakpoints)
+
+        assert global_cache_skips == {key2: 1}
+        assert global_cache_frame_skips == {key2: 0, (key2, 2): 0}
+    finally:
+        global_cache_skips.clear()
+        global_cache_frame_skips.clear()
+
+
+def test_trace_verdict_cache(py_db):
+    import sys
+    from _pydevd_bundle.pydevd_frame import get_trace_verdict, TRACE_VERDICT_SKIP, TRACE_VERDICT_SKIP_WHEN_STEPPING
+
+    frame = sys._getframe()
+    code = frame.f_code
+    frame_cache_key = (code.co_firstlineno, code.co_name, code.co_filename)
+
+    verdict, filename = get_trace_verdict(py_db, frame, frame_cache_key)
+    assert not verdict & TRACE_VERDICT_SKIP
+    assert py_db.code_to_trace_verdict[frame_cache_key] == (verdict, filename)
+
+    # Cached verdicts are discarded along with the other skip caches.
+    py_db.clear_skip_caches()
+    assert not py_db.code_to_trace_verdict
+
+    py_db.is_filter_enabled = True
+    py_db.is_ignored_by_filters = lambda filename: True
+    verdict, _filename = get_trace_verdict(py_db, frame, frame_cache_key)
+    assert verdict & TRACE_VERDICT_SKIP_WHEN_STEPPING
+
+
+def test_breakpoints_generation_incremented(py_db):
+    generations = []
+    py_db.increment_breakpoints_generation = lambda: generations.append(len(generations) + 1)
+
+    py_db.consolidate_breakpoints('/tmp/file1.py', {}, py_db.breakpoints)
+    assert generations == [1]
+
+    py_db.clear_skip_caches()
+    assert generations == [1, 2]
@@ -0,0 +1,129 @@
+import sys
+import threading
+import time
+
+import pytest
+
+
+class _DummyWriter(object):
+
+    def __init__(self):
+        self.commands = []
+
+    def add_command(self, cmd):
+        self.commands.append(cmd)
+
+
+@pytest.fixture
+def py_db():
+    import pydevd
+    import pydevd_tracing
+    from _pydevd_bundle.pydevd_comm import set_global_debugger
+    py_db = pydevd.PyDB()
+    py_db.writer = _DummyWriter()
+    yield py_db
+    pydevd_tracing.restore_sys_set_trace_func()
+    set_global_debugger(None)
+
+
+def _start_suspended_thread(py_db):
+    from _pydevd_bundle.pydevd_additional_thread_info import set_additional_thread_info
+    from _pydevd_bundle.pydevd_comm import CMD_THREAD_SUSPEND
+    from _pydevd_bundle.pydevd_constants import STATE_SUSPEND, get_thread_id
+
+    started = threading.Event()
+    finished = threading.Event()
+
+    def target():
+        t = threading.current_thread()
+        info = set_additional_thread_info(t)
+        info.pydev_state = STATE_SUSPEND
+        t.stop_reason = CMD_THREAD_SUSPEND
+        started.set()
+        py_db.do_wait_suspend(t, sys._getframe(), 'line', None, send_suspend_message=False)
+        finished.set()
+
+    t = threading.Thread(target=target)
+    t.daemon = True
+    t.start()
+    assert started.wait(5)
+    # Wait for the thread to block in do_wait_suspend.
+    while get_thread_id(t) not in py_db._thread_id_to_suspended_event:
+        time.sleep(0.01)
+    time.sleep(0.1)
+    return t, finished
+
+
+def test_suspended_thread_woken_up_by_internal_command(py_db):
+    from _pydevd_bundle.pydevd_comm import InternalRunThread
+    from _pydevd_bundle.pydevd_constants import get_thread_id
+
+    from _pydevd_bundle.pydevd_command_stats import command_stats
+
+    command_stats.clear()
+    t, finished = _start_suspended_thread(py_db)
+    thread_id = get_thread_id(t)
+    initial_time = time.time()
+    py_db.post_internal_command(InternalRunThread(thread_id), thread_id)
+    assert finished.wait(5)
+    # i.e.: it didn't have to wait for the timeout.
+    assert time.time() - initial_time < 0.4
+    t.join(5)
+
+    # The time the command was queued is recorded.
+    assert [(kind, name, stats.count) for kind, name, stats in command_stats.get_stats()] == [
+        ('executed', 'InternalRunThread', 1), ('queued', 'InternalRunThread', 1)]
+
+
+def test_suspended_thread_woken_up_by_finish_debugging_session(py_db):
+    t, finished = _start_suspended_thread(py_db)
+    initial_time = time.time()
+    py_db.finish_debugging_session()
+    assert finished.wait(5)
+    assert time.time() - initial_time < 0.4
+    t.join(5)
+
+
+def test_thread_lifecycle_tracked_through_hooks(py_db):
+    from _pydev_bundle import pydev_monkey
+    from _pydevd_bundle.pydevd_comm import set_global_debugger
+    from _pydevd_bundle.pydevd_constants import get_thread_id
+
+    set_global_debugger(py_db)
+    reconciled = []
+    original_reconcile = py_db._reconcile_running_threads
+
+    def reconcile():
+        reconciled.append(1)
+        return original_reconcile()
+
+    py_db._reconcile_running_threads = reconcile
+    py_db._thread_lifecycle_hooks_installed = True
+    pydev_monkey.patch_thread_modules()
+    try:
+        py_db.process_internal_commands()
+        assert len(reconciled) == 1
+
+        started = threading.Event()
+        finish = threading.Event()
+
+        def target():
+            started.set()
+            finish.wait(5)
+
+        t = threading.Thread(target=target)
+        t.start()
+        assert started.wait(5)
+        thread_id = get_thread_id(t)
+
+        # The new thread is notified by the hooks (without a new scan of all the threads).
+        py_db.process_internal_commands()
+        assert len(reconciled) == 1
+        assert thread_id in py_db._running_thread_ids
+
+        finish.set()
+        t.join(5)
+        assert thread_id not in py_db._running_thread_ids
+    finally:
+        pydev_monkey.undo_patch_thread_modules()
+        py_db.SetTrace(None)
@@ -0,0 +1,77 @@
+import sys
+
+import pytest
+
+from _pydevd_bundle import pydevd_sys_monitoring
+import pydevd_file_utils
+import pydevd_tracing
+
+
+class _DummyPyDB(object):
+
+    def __init__(self):
+        self.breakpoints = {}
+        self.has_plugin_line_breaks = False
+        self.has_plugin_exception_breaks = False
+        self.break_on_caught_exceptions = {}
+        self.signature_factory = None
+        self._finish_debugging_session = False
+
+
+def _method():
+    a = 1
+    return a
+
+
+def test_set_trace_ignored_when_using_sys_monitoring():
+    def tracing_func(frame, event, arg):
+        return None
+
+    original_trace = sys.gettrace()
+    pydevd_tracing.TracingFunctionHolder._use_sys_monitoring = True
+    try:
+        pydevd_tracing.SetTrace(tracing_func)
+        assert sys.gettrace() is None
+    finally:
+        pydevd_tracing.TracingFunctionHolder._use_sys_monitoring = False
+        sys.settrace(original_trace)
+
+
+@pytest.mark.skipif(not pydevd_sys_monitoring.IS_SYS_MONITORING_SUPPORTED, reason='Requires sys.monitoring (Python 3.12 onwards).')
+def test_can_disable_location():
+    py_db = _DummyPyDB()
+    code = _method.__code__
+    filename = pydevd_file_utils.get_abs_path_real_path_and_base_from_file(code.co_filename)[1]
+    line = code.co_firstlineno + 1
+
+    assert pydevd_sys_monitoring._can_disable_location(py_db, code, line)
+
+    py_db.breakpoints[filename] = {line: object()}
+    assert not pydevd_sys_monitoring._can_disable_location(py_db, code, line)
+    assert pydevd_sys_monitoring._can_disable_location(py_db, code, line + 1)
+    assert pydevd_sys_monitoring._can_disable_location(py_db, code, None)
+
+    pydevd_sys_monitoring._MonitoringState.thread_ids_requiring_events.add(0)
+    try:
+        assert not pydevd_sys_monitoring._can_disable_location(py_db, code, line + 1)
+    finally:
+        pydevd_sys_monitoring._MonitoringState.thread_ids_requiring_events.discard(0)
+
+
+@pytest.mark.skipif(not pydevd_sys_monitoring.IS_SYS_MONITORING_SUPPORTED, reason='Requires sys.monitoring (Python 3.12 onwards).')
+def test_start_and_stop_monitoring():
+    py_db = _DummyPyDB()
+    assert pydevd_sys_monitoring.start_monitoring(py_db)
+    try:
+        assert pydevd_sys_monitoring.is_monitoring_active()
+        assert pydevd_tracing.TracingFunctionHolder._use_sys_monitoring
+        assert sys.monitoring.get_tool(sys.monitoring.DEBUGGER_ID) == 'pydevd'
+
+        # No breakpoints: the code must run normally (with its locations disabled).
+        assert _method() == 1
+    finally:
+        pydevd_sys_monitoring.stop_monitoring()
+
+    assert not pydevd_sys_monitoring.is_monitoring_active()
+    assert not pydevd_tracing.TracingFunctionHolder._use_sys_monitoring
+    assert sys.monitoring.get_tool(sys.monitoring.DEBUGGER_ID) is None